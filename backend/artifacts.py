@@ -0,0 +1,220 @@
+import os
+import threading
+import uuid
+import weakref
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from freecad_convert import write_dxf, write_svg
+from geometry import load_geometry
+from storage import geometry_path, objects_dir
+
+# =============================
+# 저장된 중간 형상 → 산출물 (FreeCAD 없이, 요청 시 생성)
+# =============================
+# - 변환(견적)은 geometry.npz까지만 만들고, 산출물은 첫 요청 때 생성해서 objects/<job>/ 에 캐시
+# - 캐시 유효 = 산출물 mtime >= geometry.npz mtime (재변환되면 자동으로 다시 생성)
+#   생성 도중 형상이 바뀐 결과는 저장하지 않음(형상 stat 전후 비교)
+# - 같은 (job, 포맷)을 동시에 요청하면 한 번만 생성(프로세스 내 single-flight), 쓰기는 임시 파일 → rename
+# - 새 포맷 = FORMATS에 렌더러 하나 추가
+
+SVG_STROKE_MM = 0.20
+PDF_MARGIN_MM = 10.0
+PDF_STROKE_MM = 0.20
+
+_MM_TO_PT = 72.0 / 25.4
+
+
+@dataclass(frozen=True)
+class ArtifactFormat:
+    key: str
+    filename: str          # objects/<job>/ 아래 캐시 파일명
+    media_type: str
+    download_suffix: str   # 다운로드 파일명 = <job_id><download_suffix>
+    render: Callable[[Dict[str, Any], str], None]
+
+
+def _render_dxf_r2010(geo: Dict[str, Any], out: str) -> None:
+    write_dxf(out, geo["polylines"], geo.get("entities"))
+
+
+def _render_dxf_r12(geo: Dict[str, Any], out: str) -> None:
+    write_dxf(out, geo["polylines"], geo.get("entities"), dxfversion="R12")
+
+
+def _render_dxf_binary(geo: Dict[str, Any], out: str) -> None:
+    write_dxf(out, geo["polylines"], geo.get("entities"), binary=True)
+
+
+def _render_svg(geo: Dict[str, Any], out: str) -> None:
+    write_svg(out, geo["polylines"], SVG_STROKE_MM)
+
+
+def _render_pdf(geo: Dict[str, Any], out: str) -> None:
+    """
+    1페이지 벡터 PDF(실척 1:1, mm → pt). 외부 라이브러리 없이 직접 작성.
+    """
+    pset = geo["polylines"]
+    xmin, ymin, xmax, ymax = pset.bbox()
+    m = PDF_MARGIN_MM
+    page_w = (xmax - xmin + 2 * m) * _MM_TO_PT
+    page_h = (ymax - ymin + 2 * m) * _MM_TO_PT
+
+    # 페이지 좌표(pt) = (mm - 원점 + 여백) * 스케일, 변환은 cm 연산자로 한 번만
+    ops = [
+        f"{_MM_TO_PT:.6f} 0 0 {_MM_TO_PT:.6f} {(m - xmin) * _MM_TO_PT:.4f} {(m - ymin) * _MM_TO_PT:.4f} cm",
+        f"{PDF_STROKE_MM:.3f} w 1 J 1 j 0 G",
+    ]
+    closed = pset.closed_mask().tolist()
+    for pts, is_closed in zip(pset, closed):
+        if len(pts) < 2:
+            continue
+        xy = pts.tolist()
+        if is_closed:
+            xy = xy[:-1]
+        seg = [f"{xy[0][0]:.4f} {xy[0][1]:.4f} m"]
+        seg.extend(f"{x:.4f} {y:.4f} l" for x, y in xy[1:])
+        seg.append("h S" if is_closed else "S")
+        ops.append(" ".join(seg))
+    content = zlib.compress("\n".join(ops).encode("ascii"), 6)
+
+    objs = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {page_w:.4f} {page_h:.4f}] "
+            f"/Contents 4 0 R /Resources << >> >>"
+        ).encode("ascii"),
+        f"<< /Length {len(content)} /Filter /FlateDecode >>\nstream\n".encode("ascii") + content + b"\nendstream",
+    ]
+
+    with open(out, "wb") as f:
+        f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        xref = []
+        for i, body in enumerate(objs, start=1):
+            xref.append(f.tell())
+            f.write(f"{i} 0 obj\n".encode("ascii") + body + b"\nendobj\n")
+        start = f.tell()
+        f.write(f"xref\n0 {len(objs) + 1}\n0000000000 65535 f \n".encode("ascii"))
+        for off in xref:
+            f.write(f"{off:010d} 00000 n \n".encode("ascii"))
+        f.write(f"trailer\n<< /Size {len(objs) + 1} /Root 1 0 R >>\nstartxref\n{start}\n%%EOF\n".encode("ascii"))
+
+
+FORMATS: Dict[str, ArtifactFormat] = {
+    f.key: f
+    for f in (
+        ArtifactFormat("dxf", "output.dxf", "application/dxf", ".dxf", _render_dxf_r2010),
+        ArtifactFormat("dxf-r12", "output.r12.dxf", "application/dxf", ".r12.dxf", _render_dxf_r12),
+        ArtifactFormat("dxf-binary", "output.bin.dxf", "application/dxf", ".bin.dxf", _render_dxf_binary),
+        ArtifactFormat("svg", "preview.svg", "image/svg+xml", ".svg", _render_svg),
+        ArtifactFormat("pdf", "output.pdf", "application/pdf", ".pdf", _render_pdf),
+    )
+}
+
+# (job, 포맷)별 생성 락 — 쓰는 쪽이 없으면 자동으로 사라짐
+_locks_guard = threading.Lock()
+_locks: "weakref.WeakValueDictionary[tuple, Any]" = weakref.WeakValueDictionary()
+
+
+def _lock_for(job_id: str, key: str):
+    with _locks_guard:
+        lock = _locks.get((job_id, key))
+        if lock is None:
+            lock = threading.Lock()
+            _locks[(job_id, key)] = lock
+        return lock
+
+
+def artifact_path(job_id: str, key: str) -> Path:
+    return objects_dir(job_id) / FORMATS[key].filename
+
+
+def _is_fresh(out: Path, gp: Path) -> bool:
+    try:
+        st = out.stat()
+    except FileNotFoundError:
+        return False
+    try:
+        return st.st_mtime_ns >= gp.stat().st_mtime_ns
+    except FileNotFoundError:
+        # 형상 없이 남아 있는 산출물(이전 버전에서 만든 파일)은 그대로 사용
+        return True
+
+
+def _geometry_stamp(gp: Path) -> Optional[tuple]:
+    try:
+        st = gp.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+
+def render(job_id: str, key: str, attempts: int = 3) -> Optional[Path]:
+    """
+    geometry.npz에서 산출물 생성(임시 파일 → rename). 형상이 없으면 None.
+    생성 중 형상이 바뀌면(재견적) 결과를 버리고 새 형상으로 다시 생성
+    (버리지 않으면 mtime이 새 형상보다 늦어 최신처럼 보임)
+    """
+    fmt = FORMATS[key]
+    gp = geometry_path(job_id)
+    out = artifact_path(job_id, key)
+
+    for _ in range(max(1, attempts)):
+        stamp = _geometry_stamp(gp)
+        if stamp is None:
+            return None
+        geo = load_geometry(str(gp))
+        tmp = out.with_name(f".{out.name}.{uuid.uuid4().hex[:8]}.part")
+        try:
+            fmt.render(geo, str(tmp))
+            if _geometry_stamp(gp) != stamp:
+                continue
+            os.replace(tmp, out)
+        finally:
+            tmp.unlink(missing_ok=True)
+        if _geometry_stamp(gp) == stamp:
+            return out
+        # rename 직전/직후에 형상이 바뀜 → 방금 쓴 파일은 이전 형상 기준
+        out.unlink(missing_ok=True)
+    return None
+
+
+def ensure(job_id: str, key: str) -> Optional[Path]:
+    """
+    캐시된 산출물이 최신이면 그대로, 아니면 생성(동시 요청은 한 번만 생성). 만들 수 없으면 None.
+    """
+    if key not in FORMATS:
+        raise KeyError(key)
+    out = artifact_path(job_id, key)
+    gp = geometry_path(job_id)
+    if _is_fresh(out, gp):
+        return out
+
+    with _lock_for(job_id, key):
+        # 기다리는 동안 다른 요청이 만들었으면 재사용
+        if _is_fresh(out, gp):
+            return out
+        return render(job_id, key)
+
+
+def invalidate(job_id: str) -> None:
+    """
+    캐시된 산출물 + 압축본(downloads가 만든 <name>.<hash>.gz|br) 삭제
+    """
+    d = objects_dir(job_id)
+    for fmt in FORMATS.values():
+        (d / fmt.filename).unlink(missing_ok=True)
+        for p in d.glob(f"{fmt.filename}.*"):
+            if p.suffix in (".gz", ".br"):
+                p.unlink(missing_ok=True)
+
+
+def render_dxf(job_id: str) -> Optional[Path]:
+    return render(job_id, "dxf")
+
+
+def ensure_dxf(job_id: str) -> Optional[Path]:
+    return ensure(job_id, "dxf")
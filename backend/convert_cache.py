@@ -0,0 +1,235 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+import weakref
+from contextlib import contextmanager
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from freecad_convert import ConvertOptions, CONVERTER_VERSION
+from storage import cache_dir, locks_dir
+
+# fcntl(flock)은 POSIX 전용 → 없으면 프로세스 내 락만 사용
+try:
+    import fcntl  # type: ignore
+except Exception:
+    fcntl = None
+
+# =============================
+# 변환 결과 캐시 (content-addressed)
+# =============================
+# 키 = sha256(CONVERTER_VERSION + 업로드 파일 sha256 + ConvertOptions 지문)
+# 엔트리 = cache/<key[:2]>/<key>/{result.json, geometry.npz}
+# (DXF는 저장된 형상에서 필요할 때 생성하므로 캐시하지 않음)
+# - LRU: 조회 시 result.json mtime 갱신 → 용량 초과 시 오래된 것부터 삭제
+# - 같은 부품을 다른 job으로 다시 올려도 FreeCAD를 다시 돌리지 않음
+# - 같은 키를 동시에 변환하려 하면 하나만 실행(single-flight): locks/<key>.lock flock
+#   → 나머지는 락을 기다렸다가 캐시에서 결과를 받음(uvicorn 워커/별도 worker 프로세스 간에도 유효)
+
+CACHE_MAX_BYTES = int(float(os.getenv("CONVERT_CACHE_MAX_MB", "2048")) * 1024 * 1024)
+
+_RESULT_FILE = "result.json"
+_GEOMETRY_FILE = "geometry.npz"
+_CHUNK = 1024 * 1024
+
+_lock = threading.Lock()
+_stats: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "shared": 0}
+
+# 같은 프로세스 안의 스레드끼리도 키별로 직렬화(flock이 없을 때 대비) — 쓰는 쪽이 없으면 자동으로 사라짐
+_key_locks_guard = threading.Lock()
+_key_locks: "weakref.WeakValueDictionary[str, Any]" = weakref.WeakValueDictionary()
+
+
+def _bump(key: str, n: int = 1) -> None:
+    with _lock:
+        _stats[key] += n
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(_CHUNK)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# 결과(형상)에 영향 없는 실행 옵션 → 지문에서 제외(같은 부품이면 설정이 달라도 캐시 공유)
+_EXECUTION_ONLY_OPTIONS = ("candidate_workers", "debug")
+
+
+def options_fingerprint(opts: ConvertOptions) -> str:
+    d = asdict(opts)
+    for k in _EXECUTION_ONLY_OPTIONS:
+        d.pop(k, None)
+    raw = json.dumps(d, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def cache_key(file_hash: str, opts: ConvertOptions) -> str:
+    raw = f"{CONVERTER_VERSION}:{file_hash}:{options_fingerprint(opts)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _entry_dir(key: str) -> Path:
+    return cache_dir() / key[:2] / key
+
+
+@contextmanager
+def inflight(key: str) -> Iterator[None]:
+    """
+    키별 변환 single-flight 구간. 블록 안에서 lookup을 다시 해서 먼저 끝난 변환의 결과를 재사용할 것.
+    """
+    with _key_locks_guard:
+        tlock = _key_locks.get(key)
+        if tlock is None:
+            tlock = threading.Lock()
+            _key_locks[key] = tlock
+
+    with tlock:
+        if fcntl is None:
+            yield
+            return
+        with open(locks_dir() / f"{key}.lock", "a+b") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _copy_atomic(src: Path, dst: str) -> None:
+    os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+    tmp = f"{dst}.{uuid.uuid4().hex[:8]}.part"
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+def contains(key: str) -> bool:
+    """
+    엔트리 존재 여부만(통계/LRU 갱신 없음) — 스케줄러 비용 추정용
+    """
+    return (_entry_dir(key) / _RESULT_FILE).exists()
+
+
+def lookup(key: str, out_geometry: str, shared: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    캐시 적중 시 결과 dict를 반환하고, 중간 형상을 out_geometry로 복사.
+    미스/손상 엔트리는 None.
+    shared=True: inflight 대기 후 재조회(다른 요청의 변환 결과를 받은 경우 stats.shared 집계)
+    """
+    d = _entry_dir(key)
+    rp = d / _RESULT_FILE
+    try:
+        result = json.loads(rp.read_text(encoding="utf-8"))
+    except Exception:
+        # 재조회(shared)의 미스는 첫 조회에서 이미 집계됨
+        if not shared:
+            _bump("misses")
+        return None
+
+    if result.get("status") == "ok":
+        geo = d / _GEOMETRY_FILE
+        if not geo.exists():
+            if not shared:
+                _bump("misses")
+            return None
+        _copy_atomic(geo, out_geometry)
+        result["geometry"] = out_geometry
+
+    try:
+        os.utime(rp)
+    except OSError:
+        pass
+
+    _bump("hits")
+    if shared:
+        _bump("shared")
+    result["cache"] = "shared" if shared else "hit"
+    return result
+
+
+def store(key: str, result: Dict[str, Any], geometry_path: Optional[str]) -> None:
+    """
+    변환 결과 저장. ok 결과는 중간 형상도 함께, failed(판정 실패) 결과는 JSON만.
+    임시 디렉토리에 쓰고 rename → 동시 저장/부분 엔트리 방지.
+    """
+    final = _entry_dir(key)
+    if final.exists():
+        return
+
+    final.parent.mkdir(parents=True, exist_ok=True)
+    tmp = final.parent / f".{key}.{uuid.uuid4().hex[:8]}.tmp"
+    tmp.mkdir()
+    try:
+        # 폴리라인/엔티티는 geometry.npz에 있으므로 JSON에서 제외
+        payload = {k: v for k, v in result.items() if k not in ("out_dxf", "geometry", "cache", "polylines", "entities")}
+        if result.get("status") == "ok":
+            if not geometry_path or not os.path.exists(geometry_path):
+                return
+            shutil.copyfile(geometry_path, tmp / _GEOMETRY_FILE)
+        (tmp / _RESULT_FILE).write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        try:
+            os.rename(tmp, final)
+        except OSError:
+            # 다른 프로세스가 먼저 저장함
+            return
+        _bump("stores")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    evict(CACHE_MAX_BYTES)
+
+
+def _entries() -> list[tuple[float, int, Path]]:
+    out = []
+    root = cache_dir()
+    for shard in root.iterdir():
+        if not shard.is_dir():
+            continue
+        for d in shard.iterdir():
+            if not d.is_dir() or d.name.startswith("."):
+                continue
+            try:
+                used = (d / _RESULT_FILE).stat().st_mtime
+                size = sum(f.stat().st_size for f in d.iterdir() if f.is_file())
+            except OSError:
+                continue
+            out.append((used, size, d))
+    return out
+
+
+def evict(max_bytes: int) -> int:
+    entries = _entries()
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    if total <= max_bytes:
+        return 0
+
+    # 가장 오래 안 쓴 것부터 삭제
+    for _, size, d in sorted(entries, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(d, ignore_errors=True)
+        total -= size
+        removed += 1
+
+    if removed:
+        _bump("evictions", removed)
+    return removed
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        s = dict(_stats)
+    lookups = s["hits"] + s["misses"]
+    s["hit_rate"] = round(s["hits"] / lookups, 4) if lookups else None
+    s["max_bytes"] = CACHE_MAX_BYTES
+    s["converter_version"] = CONVERTER_VERSION
+    return s
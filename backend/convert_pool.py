@@ -0,0 +1,312 @@
+import atexit
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from freecad_convert import ConvertOptions, ConvertError, ProgressFn
+
+# =============================
+# FreeCAD 변환 전용 프로세스 풀
+# =============================
+# - 워커는 시작 시 FreeCAD/Part/Import를 한 번만 로드하고 계속 재사용
+# - 변환 1건 = 워커 1개 독점(문서/OCC 상태 격리)
+# - N건 처리 후 또는 RSS 임계 초과 시 워커 교체(OCC 메모리 누적 대응)
+# - CONVERT_POOL_SIZE=0 이면 풀 없이 호출 스레드에서 직접 변환(디버그용)
+# - 후보 병렬 평가(CONVERT_CANDIDATE_WORKERS>1)는 변환 1건이 프로세스 여러 개를 쓰므로
+#   기본 풀 크기 = CPU 수 // 후보 워커 수
+
+CANDIDATE_WORKERS = max(1, int(os.getenv("CONVERT_CANDIDATE_WORKERS", "1")))
+POOL_SIZE = int(os.getenv("CONVERT_POOL_SIZE", str(max(1, (os.cpu_count() or 1) // CANDIDATE_WORKERS))))
+MAX_JOBS_PER_WORKER = int(os.getenv("CONVERT_WORKER_MAX_JOBS", "50"))
+MAX_RSS_MB = float(os.getenv("CONVERT_WORKER_MAX_RSS_MB", "2048"))
+TASK_TIMEOUT_S = float(os.getenv("CONVERT_TIMEOUT_S", "900"))
+_ACQUIRE_POLL_S = 0.5
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except Exception:
+        import resource
+
+        # ru_maxrss: Linux에서 KB 단위(최대치 기준이라 보수적)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _worker_main(conn, max_jobs: int, max_rss_mb: float, parent_pid: int) -> None:
+    # ✅ 워커 시작 시 1회 로드(요청마다 import 비용 없음)
+    import signal
+
+    import freecad_convert
+
+    try:
+        import Import  # type: ignore  # noqa: F401
+    except Exception:
+        pass
+
+    # 부모가 종료(terminate)하면 후보 평가 자식까지 정리하고 나감
+    def _on_term(signum, frame) -> None:
+        freecad_convert.shutdown_candidate_executor()
+        os._exit(0)
+
+    signal.signal(signal.SIGTERM, _on_term)
+    # 변환 중에 부모가 SIGKILL로 죽어도 남지 않도록
+    freecad_convert.exit_with_parent(parent_pid)
+
+    jobs = 0
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            break
+        if msg is None:
+            break
+
+        step_path, out_dxf, opts, want_progress, out_geometry = msg
+
+        def _progress(stage: str, data: Dict[str, Any]) -> None:
+            # 진행 이벤트는 최종 결과 전에 같은 파이프로 부모에게 전달
+            conn.send(("progress", (stage, data), False))
+
+        try:
+            result = freecad_convert.convert_step_to_dxf(
+                step_path,
+                out_dxf,
+                opts,
+                progress=_progress if want_progress else None,
+                out_geometry=out_geometry,
+            )
+            reply = ("ok", result)
+        except ConvertError as e:
+            reply = ("convert_error", str(e))
+        except Exception as e:
+            reply = ("error", f"{type(e).__name__}: {e}")
+
+        jobs += 1
+        retire = jobs >= max_jobs or _rss_mb() > max_rss_mb
+        try:
+            conn.send((reply[0], reply[1], retire))
+        except (EOFError, OSError):
+            break
+        if retire:
+            break
+
+    freecad_convert.shutdown_candidate_executor()
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+class _Worker:
+    def __init__(self, ctx) -> None:
+        parent_conn, child_conn = ctx.Pipe()
+        self.conn = parent_conn
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, MAX_JOBS_PER_WORKER, MAX_RSS_MB, os.getpid()),
+            name="freecad-convert",
+            # 후보 병렬 평가용 자식 프로세스를 띄울 수 있도록 non-daemon
+            # (부모가 죽으면 파이프 EOF / 부모 pid 감시로 스스로 종료)
+            daemon=False,
+        )
+        self.process.start()
+        child_conn.close()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        try:
+            self.conn.send(None)
+        except Exception:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.terminate()
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+    def terminate(self, timeout: float = 3.0) -> None:
+        # SIGTERM → 워커가 후보 평가 자식을 정리하고 종료, 응답 없으면 SIGKILL
+        self.process.terminate()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(1.0)
+
+
+class ConvertPool:
+    def __init__(self, size: int) -> None:
+        # fork는 uvicorn 스레드/OCC 상태를 복제하므로 spawn 사용
+        self._ctx = mp.get_context("spawn")
+        self._size = max(1, int(size))
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._all: "set[_Worker]" = set()
+        self._lock = threading.Lock()
+        self._busy = 0
+        self._recycled = 0
+        self._crashed = 0
+        self._closed = False
+        for _ in range(self._size):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> _Worker:
+        w = _Worker(self._ctx)
+        with self._lock:
+            self._all.add(w)
+        return w
+
+    def _replace(self, w: _Worker, crashed: bool) -> None:
+        w.stop(timeout=1.0 if crashed else 5.0)
+        with self._lock:
+            self._all.discard(w)
+            if crashed:
+                self._crashed += 1
+            else:
+                self._recycled += 1
+        if not self._closed:
+            self._idle.put(self._spawn())
+
+    def _acquire(self) -> _Worker:
+        # 빈 워커를 기다리는 동안에도 shutdown을 확인(get()만 하면 종료 후 영원히 대기)
+        while True:
+            if self._closed:
+                raise ConvertError("변환 풀이 종료되었습니다.")
+            try:
+                w = self._idle.get(timeout=_ACQUIRE_POLL_S)
+            except queue.Empty:
+                continue
+            if self._closed:
+                w.stop()
+                raise ConvertError("변환 풀이 종료되었습니다.")
+            return w
+
+    def convert(
+        self,
+        step_path: str,
+        out_dxf: str,
+        opts: ConvertOptions,
+        progress: Optional[ProgressFn] = None,
+        out_geometry: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        w = self._acquire()
+        with self._lock:
+            self._busy += 1
+        try:
+            try:
+                w.conn.send((step_path, out_dxf, opts, progress is not None, out_geometry))
+                deadline = time.monotonic() + TASK_TIMEOUT_S
+                while True:
+                    if not w.conn.poll(max(0.0, deadline - time.monotonic())):
+                        self._replace(w, crashed=True)
+                        raise ConvertError(f"변환 시간 초과({TASK_TIMEOUT_S:.0f}s)")
+                    kind, payload, retire = w.conn.recv()
+                    if kind != "progress":
+                        break
+                    try:
+                        progress(*payload)
+                    except Exception:
+                        pass
+            except (EOFError, OSError) as e:
+                self._replace(w, crashed=True)
+                raise ConvertError(f"변환 워커가 비정상 종료되었습니다: {type(e).__name__}")
+
+            if retire:
+                self._replace(w, crashed=False)
+            elif self._closed:
+                # 변환 중에 shutdown → 풀에 돌려놓지 않고 종료
+                w.stop()
+            else:
+                self._idle.put(w)
+
+            if kind == "ok":
+                return payload
+            if kind == "convert_error":
+                raise ConvertError(payload)
+            raise RuntimeError(payload)
+        finally:
+            with self._lock:
+                self._busy -= 1
+
+    def shutdown(self) -> None:
+        self._closed = True
+        idle = set()
+        while True:
+            try:
+                idle.add(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        with self._lock:
+            busy = self._all - idle
+            self._all.clear()
+        for w in idle:
+            w.stop()
+        # ✅ 변환 중인 워커도 기다리지 않고 종료(최대 TASK_TIMEOUT_S 동안 종료가 막히지 않도록)
+        #    → 기다리던 convert()는 파이프 EOF로 ConvertError
+        for w in busy:
+            w.terminate()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": self._size,
+                "busy": self._busy,
+                "recycled": self._recycled,
+                "crashed": self._crashed,
+                "max_jobs_per_worker": MAX_JOBS_PER_WORKER,
+                "max_rss_mb": MAX_RSS_MB,
+            }
+
+
+_pool: Optional[ConvertPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> Optional[ConvertPool]:
+    global _pool
+    if POOL_SIZE <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConvertPool(POOL_SIZE)
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+def pool_stats() -> Dict[str, Any]:
+    if POOL_SIZE <= 0:
+        return {"size": 0, "mode": "in_process"}
+    with _pool_lock:
+        if _pool is None:
+            return {"size": POOL_SIZE, "started": False}
+        return _pool.stats()
+
+
+def convert(
+    step_path: str,
+    out_dxf: str,
+    opts: ConvertOptions,
+    progress: Optional[ProgressFn] = None,
+    out_geometry: Optional[str] = None,
+) -> Dict[str, Any]:
+    pool = get_pool()
+    if pool is None:
+        from freecad_convert import convert_step_to_dxf
+
+        return convert_step_to_dxf(step_path, out_dxf, opts, progress=progress, out_geometry=out_geometry)
+    return pool.convert(step_path, out_dxf, opts, progress=progress, out_geometry=out_geometry)
+
+
+atexit.register(shutdown_pool)
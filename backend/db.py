@@ -1,5 +1,5 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 # 기본 DB 경로 (필요하면 env로 덮어쓰기)
@@ -31,3 +31,24 @@ def init_db() -> None:
     import models  # noqa: F401
 
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+
+
+# create_all은 기존 테이블에 컬럼을 추가하지 않음 → 나중에 추가된 nullable 컬럼만 여기서 보충
+# (테이블, 컬럼, DDL 타입)
+_ADDED_COLUMNS = [
+    ("jobs", "source_sha256", "VARCHAR(64)"),
+    ("jobs", "preflight_json", "TEXT"),
+    ("convert_tasks", "est_cost_s", "FLOAT"),
+    ("convert_tasks", "lane", "VARCHAR(16)"),
+    ("convert_tasks", "convert_s", "FLOAT"),
+]
+
+
+def _add_missing_columns() -> None:
+    insp = inspect(engine)
+    with engine.begin() as conn:
+        for table, column, ddl in _ADDED_COLUMNS:
+            existing = {c["name"] for c in insp.get_columns(table)}
+            if column not in existing:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
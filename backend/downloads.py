@@ -0,0 +1,295 @@
+import gzip
+import hashlib
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import anyio
+from fastapi import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+# brotli는 선택(없으면 gzip만 협상)
+try:
+    import brotli  # type: ignore
+except Exception:
+    brotli = None
+
+# =============================
+# 산출물(DXF/SVG) 파일 응답
+# =============================
+# - 강한 ETag = 파일 내용 sha256(인코딩별로 접미사) → If-None-Match 일치 시 304
+# - Range(bytes=단일 구간) → 206, If-Range 지원
+# - Accept-Encoding: br / gzip → 압축본을 처음 한 번 만들어 파일 옆에 두고 재사용(해시가 파일명에 포함)
+# - 본문 전송: 서버가 지원하면 zerocopysend(sendfile) / pathsend, 아니면 청크 단위 읽기
+#   (파일 전체를 메모리에 올리지 않음)
+
+_CHUNK = 64 * 1024
+_HASH_CACHE_MAX = 1024
+
+_hash_lock = threading.Lock()
+_hash_cache: "OrderedDict[Tuple[str, int, int, int], str]" = OrderedDict()
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _stat_key(path: Path, st: os.stat_result) -> Tuple[str, int, int, int]:
+    return (str(path), st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def file_digest(path: Path, st: Optional[os.stat_result] = None) -> str:
+    """
+    파일 sha256 (mtime/size/inode가 같으면 메모리 캐시 재사용)
+    """
+    st = st or path.stat()
+    key = _stat_key(path, st)
+    with _hash_lock:
+        h = _hash_cache.get(key)
+        if h is not None:
+            _hash_cache.move_to_end(key)
+            return h
+
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(1024 * 1024)
+            if not chunk:
+                break
+            sha.update(chunk)
+    h = sha.hexdigest()
+
+    with _hash_lock:
+        _hash_cache[key] = h
+        while len(_hash_cache) > _HASH_CACHE_MAX:
+            _hash_cache.popitem(last=False)
+    return h
+
+
+def _accepted_encodings(header: str) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for part in (header or "").split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        m = re.search(r"q\s*=\s*([0-9.]+)", params)
+        if m:
+            try:
+                q = float(m.group(1))
+            except ValueError:
+                q = 0.0
+        out[token] = q
+    return out
+
+
+def _pick_encoding(request: Request) -> Optional[str]:
+    acc = _accepted_encodings(request.headers.get("accept-encoding", ""))
+    choices = []
+    if brotli is not None and acc.get("br", 0.0) > 0:
+        choices.append((acc["br"], 1, "br"))
+    if acc.get("gzip", 0.0) > 0:
+        choices.append((acc["gzip"], 0, "gzip"))
+    if not choices:
+        return None
+    return max(choices)[2]
+
+
+def _compressed_variant(path: Path, digest: str, encoding: str) -> Path:
+    """
+    path 옆에 압축본 생성/재사용: <name>.<hash16>.gz|br
+    """
+    suffix = "br" if encoding == "br" else "gz"
+    target = path.with_name(f"{path.name}.{digest[:16]}.{suffix}")
+    if target.exists():
+        return target
+
+    tmp = path.with_name(f".{target.name}.{uuid.uuid4().hex[:8]}.part")
+    try:
+        with open(path, "rb") as src, open(tmp, "wb") as dst:
+            if encoding == "br":
+                comp = brotli.Compressor(quality=5)
+                while True:
+                    chunk = src.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    dst.write(comp.process(chunk))
+                dst.write(comp.finish())
+            else:
+                # mtime=0 → 같은 입력이면 같은 바이트(ETag 안정)
+                with gzip.GzipFile(fileobj=dst, mode="wb", compresslevel=6, mtime=0) as gz:
+                    while True:
+                        chunk = src.read(1024 * 1024)
+                        if not chunk:
+                            break
+                        gz.write(chunk)
+        os.replace(tmp, target)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+    # 이전 내용의 압축본 정리
+    for old in path.parent.glob(f"{path.name}.*.{suffix}"):
+        if old != target:
+            old.unlink(missing_ok=True)
+    return target
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match는 약한 비교(W/ 무시)
+    for tag in (header or "").split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    단일 bytes 구간 → (start, end 포함). 형식이 이상하거나 다중 구간이면 None(전체 응답).
+    만족 불가면 (-1, -1).
+    """
+    m = _RANGE_RE.match((header or "").strip())
+    if not m:
+        return None
+    a, b = m.group(1), m.group(2)
+    if not a and not b:
+        return None
+    if not a:
+        n = int(b)
+        if n == 0:
+            return (-1, -1)
+        return (max(0, size - n), size - 1)
+    start = int(a)
+    end = int(b) if b else size - 1
+    if start >= size or end < start:
+        return (-1, -1)
+    return (start, min(end, size - 1))
+
+
+class ArtifactFileResponse(Response):
+    """
+    파일 구간(offset, length)을 보내는 응답. 본문은 __call__에서 전송.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        offset: int,
+        length: int,
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        media_type: Optional[str] = None,
+    ) -> None:
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.body = b""
+        self.init_headers(headers)
+        self.headers["content-length"] = str(length)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope.get("method") == "HEAD" or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        extensions = scope.get("extensions") or {}
+        if "http.response.zerocopysend" in extensions:
+            # 서버 sendfile 경로
+            with open(self.path, "rb") as f:
+                await send(
+                    {
+                        "type": "http.response.zerocopysend",
+                        "file": f.fileno(),
+                        "offset": self.offset,
+                        "count": self.length,
+                        "more_body": False,
+                    }
+                )
+            return
+
+        if "http.response.pathsend" in extensions and self.offset == 0 and self.length == os.path.getsize(self.path):
+            await send({"type": "http.response.pathsend", "path": str(self.path)})
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as f:
+            await f.seek(self.offset)
+            remaining = self.length
+            while remaining > 0:
+                chunk = await f.read(min(_CHUNK, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def serve_artifact(
+    request: Request,
+    path: Path,
+    media_type: str,
+    filename: Optional[str] = None,
+    digest: Optional[str] = None,
+) -> Response:
+    """
+    ETag/304, Range(206/416), gzip/br 협상을 처리한 파일 응답.
+    digest: 호출자가 이미 아는 내용 해시(없으면 계산, 메모리 캐시)
+    """
+    st = path.stat()
+    digest = digest or file_digest(path, st)
+
+    headers: Dict[str, str] = {
+        # 저장은 허용하되 매번 재검증 → 변경 없으면 304
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+    # Range 요청은 원본(identity) 기준으로만 처리
+    range_header = request.headers.get("range")
+    encoding = None if range_header else _pick_encoding(request)
+
+    send_path = path
+    size = st.st_size
+    etag = f'"{digest[:32]}"'
+    if encoding is not None:
+        send_path = _compressed_variant(path, digest, encoding)
+        size = send_path.stat().st_size
+        etag = f'"{digest[:32]}-{"br" if encoding == "br" else "gz"}"'
+        headers["Content-Encoding"] = encoding
+    else:
+        headers["Accept-Ranges"] = "bytes"
+    headers["ETag"] = etag
+
+    inm = request.headers.get("if-none-match")
+    if inm and _etag_matches(inm, etag):
+        return Response(status_code=304, headers={k: v for k, v in headers.items() if k != "Content-Disposition"})
+
+    if range_header:
+        if_range = request.headers.get("if-range")
+        if not if_range or if_range.strip() == etag:
+            rng = _parse_range(range_header, size)
+            if rng == (-1, -1):
+                return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+            if rng is not None:
+                start, end = rng
+                headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+                return ArtifactFileResponse(
+                    send_path, start, end - start + 1, status_code=206, headers=headers, media_type=media_type
+                )
+
+    return ArtifactFileResponse(send_path, 0, size, headers=headers, media_type=media_type)
@@ -0,0 +1,66 @@
+import json
+import time
+from typing import Any, Dict, List, Tuple
+
+from storage import events_path
+
+# =============================
+# job 진행 이벤트 로그 (jsonl)
+# =============================
+# - enqueue 시 새로 시작(reset), 워커가 단계별로 append
+# - SSE 엔드포인트가 파일을 tail → 폴링/DB 조회 없이 진행 상황 전달
+# - 파일 기반이라 API/워커가 다른 프로세스여도 동작
+
+# 이 상태의 "state" 이벤트가 나오면 스트림 종료
+# (단, 같은 job에 대기/실행 중인 작업이 남아 있으면 계속 — 예: QUOTE 뒤에 START가 대기 중)
+TERMINAL_STATES = {"quoted", "done", "error"}
+
+
+def _line(event: str, data: Dict[str, Any]) -> str:
+    rec = {"event": event, "ts": round(time.time(), 3), "data": data}
+    return json.dumps(rec, ensure_ascii=False) + "\n"
+
+
+def reset(job_id: str, event: str, **data) -> None:
+    p = events_path(job_id)
+    p.write_text(_line(event, data), encoding="utf-8")
+
+
+def emit(job_id: str, event: str, **data) -> None:
+    try:
+        with open(events_path(job_id), "a", encoding="utf-8") as f:
+            f.write(_line(event, data))
+    except OSError:
+        # 진행 알림 실패가 변환을 깨면 안 됨
+        pass
+
+
+def read_from(job_id: str, offset: int) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    offset(바이트) 이후의 완결된 줄만 읽어 (이벤트들, 새 offset) 반환
+    """
+    p = events_path(job_id)
+    try:
+        if p.stat().st_size < offset:
+            # reset 됨(새 실행) → 처음부터
+            offset = 0
+        with open(p, "rb") as f:
+            f.seek(offset)
+            chunk = f.read()
+    except OSError:
+        return [], offset
+
+    out: List[Dict[str, Any]] = []
+    end = chunk.rfind(b"\n")
+    if end < 0:
+        return out, offset
+    for raw in chunk[: end + 1].splitlines():
+        try:
+            out.append(json.loads(raw))
+        except Exception:
+            continue
+    return out, offset + end + 1
+
+
+def is_terminal(evt: Dict[str, Any]) -> bool:
+    return evt.get("event") == "state" and (evt.get("data") or {}).get("status") in TERMINAL_STATES
@@ -1,7 +1,12 @@
 import math
+import multiprocessing
 import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass
-from typing import List, Optional, Tuple, Dict, Any
+from typing import List, Optional, Tuple, Dict, Any, Callable
 
 # FreeCAD는 런타임에만 존재하므로 import 에러 방지용 try
 try:
@@ -11,11 +16,33 @@ except Exception:
     FreeCAD = None
     Part = None
 
+# numpy: 메시 기반 단면 엔진 / 배열 기반 폴리라인(PolylineSet)용, 없으면 리스트 루프로 동작
+try:
+    import numpy as np  # type: ignore
+    from polyline_set import PolylineSet
+    from geometry import save_geometry
+except Exception:
+    np = None
+    PolylineSet = None
+    save_geometry = None
+
+
+# 변환 결과가 달라지는 수정을 하면 올릴 것(변환 캐시 키에 포함됨)
+CONVERTER_VERSION = "7"
+
 
 @dataclass
 class ConvertOptions:
     k_face_candidates: int = 2              # K=2
     n_slices: int = 40                      # 30~50 권장
+    adaptive_slices: bool = False           # True면 일부 단면만 계산(변화 구간만 세분, 단면 사이 국소 변화는 놓칠 수 있어 선택)
+    adaptive_initial_slices: int = 5        # 적응형 시작 단면 수(양 끝 포함, 균등 간격)
+    slice_engine: str = "occ"               # "occ": shape.section / "mesh": 삼각망 + numpy 일괄 단면
+    mesh_deflection_mm: float = 0.05        # mesh 엔진 테셀레이션 허용오차
+    candidate_workers: int = 1              # >1이면 방향 후보를 별도 프로세스에서 병렬 평가(occ 엔진)
+    analytic_precheck: bool = True          # 평면 cap 쌍 + 수직 측면이면 슬라이싱 없이 바로 판정
+    chord_tol_mm: float = 0.01              # 에지 샘플링 현 오차(직선=2점, 곡선은 오차 만족하는 만큼만)
+    dxf_entities: str = "polyline"          # "polyline": LWPOLYLINE만 / "native": LINE/ARC/CIRCLE/SPLINE 유지
     rel_tol: float = 0.008                  # 0.5~1% 권장 → 기본 0.8%
     abs_tol_area: float = 1e-6              # 면적 절대오차(보조)
     silhouette: bool = True                 # True면 실루엣(투영), False면 특정 z 단면
@@ -29,6 +56,25 @@ class ConvertError(RuntimeError):
     pass
 
 
+class _CandidateCancelled(Exception):
+    # 병렬 후보 평가에서 앞선 후보가 이미 통과 → 남은 단면 계산 중단
+    pass
+
+
+# 진행 상황 콜백: progress(stage, data)
+ProgressFn = Callable[[str, Dict[str, Any]], None]
+
+
+def _emit(progress: Optional[ProgressFn], stage: str, **data) -> None:
+    if progress is None:
+        return
+    try:
+        progress(stage, data)
+    except Exception:
+        # 진행 알림 실패가 변환을 깨면 안 됨
+        pass
+
+
 def _require_freecad():
     if FreeCAD is None or Part is None:
         raise ConvertError("FreeCAD Python 모듈을 불러오지 못했습니다. 컨테이너/FreeCADCmd 환경을 확인하세요.")
@@ -71,6 +117,97 @@ def _rotation_from_to(src: "FreeCAD.Vector", dst: "FreeCAD.Vector") -> "FreeCAD.
 
 
 def _cluster_normals(faces: List["Part.Face"], ang_tol_deg: float = 3.0) -> List[Dict]:
+    """
+    면 법선을 방향(±)별로 묶고 면적 합 내림차순 정렬.
+    결과는 _cluster_normals_py(순차 탐욕 방식)와 동일:
+    각 면은 "먼저 만들어진 클러스터 중 첫 번째로 허용각 안에 드는 것"에 들어감.
+
+    - 법선/면적을 numpy 배열로 모은 뒤, 블록 단위로 기존 대표 법선들과 |dot|을 한 번에 비교
+    - 기존 클러스터에 안 맞는 면만 블록 안에서 순차 처리(새 클러스터 생성)
+    - 면적 합은 bincount로 일괄 누적
+    """
+    if np is None:
+        return _cluster_normals_py(faces, ang_tol_deg)
+
+    kept: List["Part.Face"] = []
+    raw: List[Tuple[float, float, float]] = []
+    areas: List[float] = []
+    for f in faces:
+        try:
+            n = f.normalAt(0.5, 0.5)
+        except Exception:
+            continue
+        kept.append(f)
+        raw.append((float(n.x), float(n.y), float(n.z)))
+        areas.append(float(getattr(f, "Area", 0.0)))
+
+    if not kept:
+        return []
+
+    N = np.array(raw, dtype=np.float64)
+    lens = np.sqrt((N * N).sum(axis=1))
+    valid = lens > 1e-12
+    N = N[valid] / lens[valid][:, None]
+    A = np.array(areas, dtype=np.float64)[valid]
+    kept = [f for f, ok in zip(kept, valid) if ok]
+
+    F = len(kept)
+    if F == 0:
+        return []
+
+    # acos(|dot|) <= tol  <=>  |dot| >= cos(tol)
+    cos_tol = math.cos(math.radians(ang_tol_deg))
+
+    reps = np.empty((F, 3), dtype=np.float64)
+    n_clusters = 0
+    labels = np.empty(F, dtype=np.int64)
+
+    block = 1024
+    for s0 in range(0, F, block):
+        Nb = N[s0 : s0 + block]
+        pending = np.arange(len(Nb))
+
+        if n_clusters:
+            match = np.abs(Nb @ reps[:n_clusters].T) >= cos_tol
+            has = match.any(axis=1)
+            labels[s0 + np.flatnonzero(has)] = match[has].argmax(axis=1)
+            pending = np.flatnonzero(~has)
+
+        # 블록 안 새 클러스터는 순서대로(앞 면이 만든 클러스터에 뒤 면이 들어갈 수 있음)
+        base = n_clusters
+        for j in pending:
+            v = Nb[j]
+            if n_clusters > base:
+                d = np.abs(reps[base:n_clusters] @ v) >= cos_tol
+                hit = np.flatnonzero(d)
+                if len(hit):
+                    labels[s0 + j] = base + int(hit[0])
+                    continue
+            reps[n_clusters] = v
+            labels[s0 + j] = n_clusters
+            n_clusters += 1
+
+    area_sums = np.bincount(labels, weights=A, minlength=n_clusters)
+    order = np.argsort(labels, kind="stable")
+    starts = np.searchsorted(labels[order], np.arange(n_clusters))
+    ends = np.append(starts[1:], F)
+
+    clusters = []
+    for c in range(n_clusters):
+        members = order[starts[c] : ends[c]]
+        clusters.append(
+            {
+                "normal": FreeCAD.Vector(*(float(x) for x in reps[c])),
+                "faces": [kept[i] for i in members],
+                "area_sum": float(area_sums[c]),
+            }
+        )
+
+    clusters.sort(key=lambda x: x["area_sum"], reverse=True)
+    return clusters
+
+
+def _cluster_normals_py(faces: List["Part.Face"], ang_tol_deg: float = 3.0) -> List[Dict]:
     ang_tol = math.radians(ang_tol_deg)
     clusters = []
     for f in faces:
@@ -161,6 +298,499 @@ def _areas_are_constant(areas: List[float], rel_tol: float, abs_tol: float) -> b
     return False
 
 
+# ----------------------------
+# Mesh slicing engine (numpy)
+# ----------------------------
+def _tessellate_np(shape: "Part.Shape", deflection_mm: float):
+    pts, tris = shape.tessellate(float(deflection_mm))
+    if not pts or not tris:
+        raise ConvertError("메시 단면 엔진: 테셀레이션 결과가 비어 있습니다.")
+    P = np.array([(float(v.x), float(v.y), float(v.z)) for v in pts], dtype=np.float64)
+    T = np.array(tris, dtype=np.int64).reshape(-1, 3)
+    return P, T
+
+
+def _rotation_matrix_np(rot: "FreeCAD.Rotation"):
+    m = rot.toMatrix()
+    return np.array(
+        [
+            [m.A11, m.A12, m.A13],
+            [m.A21, m.A22, m.A23],
+            [m.A31, m.A32, m.A33],
+        ],
+        dtype=np.float64,
+    )
+
+
+def _mesh_section_areas(P, T, zs: List[float], max_cells: int = 2_000_000):
+    """
+    닫힌 삼각망의 z 단면적을 모든 z에 대해 한 번에 계산.
+    - 삼각형-평면 교차 선분을 면 법선 기준으로 방향을 맞추고(단면 외곽 CCW)
+      선분별 shoelace 항(x0*y1 - x1*y0)/2 를 합산
+    - (z 개수 x 삼각형 수) 브로드캐스트, max_cells 단위로 z를 나눠 메모리 제한
+    """
+    zs_arr = np.asarray(zs, dtype=np.float64)
+    out = np.zeros(len(zs_arr), dtype=np.float64)
+    if len(zs_arr) == 0 or len(T) == 0:
+        return out
+
+    A = P[T[:, 0]]
+    B = P[T[:, 1]]
+    C = P[T[:, 2]]
+
+    # 단면 범위 밖 삼각형 제외
+    tz_min = np.minimum(np.minimum(A[:, 2], B[:, 2]), C[:, 2])
+    tz_max = np.maximum(np.maximum(A[:, 2], B[:, 2]), C[:, 2])
+    keep = (tz_max >= zs_arr.min()) & (tz_min <= zs_arr.max())
+    A, B, C = A[keep], B[keep], C[keep]
+    if len(A) == 0:
+        return out
+
+    nrm = np.cross(B - A, C - A)
+    # 단면 외곽을 CCW로 도는 접선 방향 = z x n
+    tx = -nrm[:, 1]
+    ty = nrm[:, 0]
+
+    edges = ((A, B), (B, C), (C, A))
+    step = max(1, int(max_cells // len(A)))
+
+    for s0 in range(0, len(zs_arr), step):
+        Z = zs_arr[s0 : s0 + step, None]
+
+        cross_pts = []
+        for P0, P1 in edges:
+            z0 = P0[:, 2][None, :]
+            z1 = P1[:, 2][None, :]
+            crosses = (z0 >= Z) != (z1 >= Z)
+            dz = np.where(crosses, z1 - z0, 1.0)
+            t = np.where(crosses, (Z - z0) / dz, 0.0)
+            x = P0[:, 0][None, :] + t * (P1[:, 0] - P0[:, 0])[None, :]
+            y = P0[:, 1][None, :] + t * (P1[:, 1] - P0[:, 1])[None, :]
+            cross_pts.append((crosses, x, y))
+
+        (c_ab, x_ab, y_ab), (c_bc, x_bc, y_bc), (c_ca, x_ca, y_ca) = cross_pts
+
+        # 교차 삼각형은 정확히 두 변이 교차: (ab,bc) / (ab,ca) / (bc,ca)
+        px = np.where(c_ab, x_ab, x_bc)
+        py = np.where(c_ab, y_ab, y_bc)
+        qx = np.where(c_ca, x_ca, x_bc)
+        qy = np.where(c_ca, y_ca, y_bc)
+
+        cr = 0.5 * (px * qy - qx * py)
+        along = (qx - px) * tx[None, :] + (qy - py) * ty[None, :]
+        cr = np.where(along < 0, -cr, cr)
+        cr = np.where(c_ab | c_bc | c_ca, cr, 0.0)
+
+        out[s0 : s0 + step] = np.abs(cr.sum(axis=1))
+
+    return out
+
+
+def _slice_z_positions(zmin: float, thickness_mm: float, n_slices: int) -> List[float]:
+    eps = 0.02
+    zs = []
+    for i in range(n_slices):
+        t = (i + 0.5) / n_slices
+        t = eps + (1 - 2 * eps) * t
+        zs.append(zmin + thickness_mm * t)
+    return zs
+
+
+def _areas_already_rejected(mn: float, mx: float, rel_tol: float, abs_tol: float) -> bool:
+    """
+    일부 단면만으로도 전체 판정이 '불일치'로 확정되는지.
+    전체 집합은 MN<=mn, MX>=mx, mean<=MX 이므로
+      rel_err = (MX-MN)/mean >= (MX-MN)/MX >= (mx-mn)/mx
+    → (mx-mn) > rel_tol*mx 이고 (mx-mn) > abs_tol 이면 _areas_are_constant는 반드시 False.
+    """
+    spread = mx - mn
+    return spread > abs_tol and spread > rel_tol * mx
+
+
+def _section_constancy(
+    placed: "Part.Shape",
+    zmin: float,
+    thickness_mm: float,
+    opts: ConvertOptions,
+    progress: Optional[ProgressFn] = None,
+    candidate: int = 0,
+    mesh=None,
+    cancelled: Optional[Callable[[], bool]] = None,
+) -> Tuple[bool, List[float]]:
+    """
+    두께 방향 단면적 일정성 검사. 반환: (ok, 실제 계산한 단면적들)
+
+    - 고정 격자(n_slices개 z)는 기존과 동일, 그 중 일부만 계산
+    - 조기 기각: 누적 min/max만으로 불일치가 확정되면 즉시 중단(판정 동일)
+    - 적응형: 시작 단면(양 끝 포함) 계산 후, 이웃 단면적이 다른 구간만 이분 세분
+      (평판은 모든 단면적이 같아 시작 단면만으로 끝남)
+    - mesh=(P, T)가 주어지면 삼각망 엔진으로 전 단면을 한 번에 계산
+    - cancelled()가 True가 되면 다음 단면 전에 _CandidateCancelled
+    """
+    n = max(1, int(opts.n_slices))
+    zs = _slice_z_positions(zmin, thickness_mm, n)
+
+    if mesh is not None:
+        vals = [float(a) for a in _mesh_section_areas(mesh[0], mesh[1], zs)]
+        _emit(progress, "slice", candidate=candidate, k=n, n=n, engine="mesh")
+        return _areas_are_constant(vals, opts.rel_tol, opts.abs_tol_area), vals
+    areas: Dict[int, float] = {}
+    bounds = [float("inf"), float("-inf")]
+
+    def sample(i: int) -> bool:
+        # 반환: 조기 기각 여부
+        if cancelled is not None and cancelled():
+            raise _CandidateCancelled()
+        a = _section_area_at_z(placed, zs[i])
+        areas[i] = a
+        bounds[0] = min(bounds[0], a)
+        bounds[1] = max(bounds[1], a)
+        _emit(progress, "slice", candidate=candidate, k=len(areas), n=n)
+        return _areas_already_rejected(bounds[0], bounds[1], opts.rel_tol, opts.abs_tol_area)
+
+    def result(rejected: bool) -> Tuple[bool, List[float]]:
+        vals = [areas[i] for i in sorted(areas)]
+        if rejected:
+            return False, vals
+        return _areas_are_constant(vals, opts.rel_tol, opts.abs_tol_area), vals
+
+    if not opts.adaptive_slices or n <= 2:
+        for i in range(n):
+            if sample(i):
+                return result(True)
+        return result(False)
+
+    k0 = max(2, min(n, int(opts.adaptive_initial_slices)))
+    initial = sorted({round(j * (n - 1) / (k0 - 1)) for j in range(k0)})
+    for i in initial:
+        if sample(i):
+            return result(True)
+
+    def changed(a0: float, a1: float) -> bool:
+        return abs(a1 - a0) > max(opts.abs_tol_area, 1e-6 * max(abs(a0), abs(a1)))
+
+    stack = list(zip(initial[:-1], initial[1:]))
+    while stack:
+        lo, hi = stack.pop()
+        if hi - lo <= 1 or not changed(areas[lo], areas[hi]):
+            continue
+        mid = (lo + hi) // 2
+        if sample(mid):
+            return result(True)
+        stack.append((mid, hi))
+        stack.append((lo, mid))
+
+    return result(False)
+
+
+# ----------------------------
+# Orientation candidates
+# ----------------------------
+def _place(shape: "Part.Shape", rot: "FreeCAD.Rotation") -> "Part.Shape":
+    placed = shape.copy()
+    placed.Placement = FreeCAD.Placement(
+        FreeCAD.Vector(0, 0, 0),
+        rot,
+        FreeCAD.Vector(0, 0, 0),
+    )
+    return placed
+
+
+def _evaluate_candidate(
+    shape: "Part.Shape",
+    idx: int,
+    normal: "FreeCAD.Vector",
+    area_sum: float,
+    opts: ConvertOptions,
+    progress: Optional[ProgressFn] = None,
+    base_mesh=None,
+    cancelled: Optional[Callable[[], bool]] = None,
+) -> Tuple[Dict[str, Any], Optional["Part.Shape"]]:
+    """
+    후보 방향 1개 평가: 법선을 +Z로 돌린 뒤 두께/단면 일정성 판정.
+    반환: (debug dict(ok 포함), 회전된 shape)
+    """
+    rot = _rotation_from_to(normal, FreeCAD.Vector(0, 0, 1))
+    placed = _place(shape, rot)
+
+    zmin, zmax = _bbox_zminmax(placed)
+    thickness_mm = float(zmax - zmin)
+
+    if thickness_mm <= 1e-9:
+        return {"candidate": idx, "ok": False, "reason": "bbox thickness ~0"}, None
+
+    mesh = None
+    if base_mesh is not None:
+        mesh = (base_mesh[0] @ _rotation_matrix_np(rot).T, base_mesh[1])
+
+    ok, areas = _section_constancy(
+        placed, zmin, thickness_mm, opts, progress, candidate=idx, mesh=mesh, cancelled=cancelled
+    )
+
+    dbg = {
+        "candidate": idx,
+        "area_sum_cluster": area_sum,
+        "sections": len(areas),
+        "areas_min": min(areas),
+        "areas_max": max(areas),
+        "areas_mean": sum(areas) / len(areas),
+        "ok": ok,
+        "thickness_mm": thickness_mm,
+    }
+    return dbg, placed
+
+
+def _surface_type(f: "Part.Face") -> str:
+    try:
+        return str(getattr(f.Surface, "TypeId", "") or "")
+    except Exception:
+        return ""
+
+
+def _planar_prism_precheck(
+    shape: "Part.Shape",
+    faces: List["Part.Face"],
+    idx: int,
+    normal: "FreeCAD.Vector",
+    ang_tol_rad: float = 1e-3,
+) -> Optional[Dict[str, Any]]:
+    """
+    토폴로지만으로 2.5D(직선 압출) 형상 확정:
+    - 법선 방향 평면(cap)은 양 끝 높이 두 곳에만 존재, 위/아래 cap 면적 합이 같음
+    - 나머지 면은 모두 법선에 평행: 수직 평면 / 축이 평행한 원통 / 방향이 평행한 압출면
+    - 모든 꼭짓점이 두 cap 높이 사이
+    → 모든 z에서 단면적 동일(슬라이싱 판정과 같은 결론), 두께 = 두 cap 사이 거리
+    하나라도 애매하면 None (슬라이싱으로 폴백)
+    """
+    n = _unit(FreeCAD.Vector(normal))
+    cos_tol = math.cos(ang_tol_rad)
+    sin_tol = math.sin(ang_tol_rad)
+
+    caps: List[Tuple[float, float]] = []
+    for f in faces:
+        st = _surface_type(f)
+        try:
+            if st == "Part::GeomPlane":
+                d = abs(_unit(f.normalAt(0.5, 0.5)).dot(n))
+                if d >= cos_tol:
+                    caps.append((float(f.Vertexes[0].Point.dot(n)), float(f.Area)))
+                elif d > sin_tol:
+                    return None
+            elif st == "Part::GeomCylinder":
+                if abs(_unit(FreeCAD.Vector(f.Surface.Axis)).dot(n)) < cos_tol:
+                    return None
+            elif st == "Part::GeomSurfaceOfExtrusion":
+                if abs(_unit(FreeCAD.Vector(f.Surface.Direction)).dot(n)) < cos_tol:
+                    return None
+            else:
+                return None
+        except Exception:
+            return None
+
+    if len(caps) < 2:
+        return None
+
+    hs = [h for h, _ in caps]
+    hmin, hmax = min(hs), max(hs)
+    thickness = hmax - hmin
+    if thickness <= 1e-9:
+        return None
+
+    lin_tol = 1e-3 + 1e-6 * thickness
+    bottom = top = 0.0
+    for h, a in caps:
+        if abs(h - hmin) <= lin_tol:
+            bottom += a
+        elif abs(h - hmax) <= lin_tol:
+            top += a
+        else:
+            # 중간 높이 평면(단차/포켓 바닥) → 단면 변화
+            return None
+
+    if bottom <= 0 or abs(top - bottom) > 1e-6 * max(top, bottom) + 1e-6:
+        return None
+
+    for v in shape.Vertexes:
+        h = float(v.Point.dot(n))
+        if h < hmin - lin_tol or h > hmax + lin_tol:
+            return None
+
+    return {
+        "candidate": idx,
+        "ok": True,
+        "analytic": True,
+        "thickness_mm": float(thickness),
+        "cap_area_mm2": float(bottom),
+    }
+
+
+# 병렬 후보 평가용 프로세스 풀(변환 워커 프로세스 안에서 재사용)
+_cand_executor: Optional[ProcessPoolExecutor] = None
+_cand_executor_size = 0
+_cand_executor_lock = threading.Lock()
+
+# 취소 신호(자식과 공유 메모리): [실행 번호, 현재 승자 index]
+# → 같은 실행에서 자기보다 앞선 후보가 통과했으면 자식이 단면 사이에서 스스로 중단
+# (Future.cancel()은 아직 시작 안 한 후보만 멈춤)
+_cand_cancel: Any = None
+_cand_run_seq = 0
+
+# 후보 평가 자식 프로세스: 같은 shape(BREP)은 한 번만 import
+_cand_shape_cache: Dict[str, Any] = {"key": None, "shape": None}
+
+
+def exit_with_parent(parent_pid: int, interval_s: float = 1.0) -> None:
+    """
+    부모 프로세스가 사라지면(SIGKILL 등) 이 프로세스도 종료 — 감시 스레드(daemon)
+    """
+    def watch() -> None:
+        while True:
+            time.sleep(interval_s)
+            if os.getppid() != parent_pid:
+                os._exit(1)
+
+    threading.Thread(target=watch, name="parent-watch", daemon=True).start()
+
+
+def _candidate_worker_init(cancel: Any, parent_pid: int) -> None:
+    global _cand_cancel
+    _cand_cancel = cancel
+    exit_with_parent(parent_pid)
+
+
+def _candidate_executor(workers: int) -> ProcessPoolExecutor:
+    global _cand_executor, _cand_executor_size, _cand_cancel
+    with _cand_executor_lock:
+        if _cand_executor is None or _cand_executor_size != workers:
+            if _cand_executor is not None:
+                _shutdown_executor(_cand_executor)
+            ctx = multiprocessing.get_context("spawn")
+            _cand_cancel = ctx.Array("q", [0, -1])
+            _cand_executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=ctx,
+                initializer=_candidate_worker_init,
+                initargs=(_cand_cancel, os.getpid()),
+            )
+            _cand_executor_size = workers
+        return _cand_executor
+
+
+def _shutdown_executor(ex: ProcessPoolExecutor) -> None:
+    # 실행 중인 후보까지 즉시 종료(shutdown만으로는 돌고 있는 자식이 끝날 때까지 남음)
+    procs = list((getattr(ex, "_processes", None) or {}).values())
+    ex.shutdown(wait=False, cancel_futures=True)
+    for p in procs:
+        try:
+            p.terminate()
+        except Exception:
+            pass
+    for p in procs:
+        try:
+            p.join(1.0)
+        except Exception:
+            pass
+
+
+def _reset_candidate_executor() -> None:
+    global _cand_executor
+    with _cand_executor_lock:
+        if _cand_executor is not None:
+            _shutdown_executor(_cand_executor)
+        _cand_executor = None
+
+
+def shutdown_candidate_executor() -> None:
+    """
+    후보 평가 자식 프로세스 정리(변환 워커 종료 시 호출)
+    """
+    _reset_candidate_executor()
+
+
+def _candidate_task(
+    brep_key: str,
+    brep: str,
+    run: int,
+    idx: int,
+    normal_xyz: Tuple[float, float, float],
+    area_sum: float,
+    opts: ConvertOptions,
+) -> Dict[str, Any]:
+    def cancelled() -> bool:
+        c = _cand_cancel
+        return c is not None and c[0] == run and 0 <= c[1] < idx
+
+    if cancelled():
+        return {"candidate": idx, "ok": False, "cancelled": True}
+    _require_freecad()
+    if _cand_shape_cache["key"] != brep_key:
+        sh = Part.Shape()
+        sh.importBrepFromString(brep)
+        _cand_shape_cache.update(key=brep_key, shape=sh)
+    try:
+        dbg, _ = _evaluate_candidate(
+            _cand_shape_cache["shape"], idx, FreeCAD.Vector(*normal_xyz), area_sum, opts, cancelled=cancelled
+        )
+    except _CandidateCancelled:
+        return {"candidate": idx, "ok": False, "cancelled": True}
+    return dbg
+
+
+def _evaluate_candidates_parallel(
+    shape: "Part.Shape",
+    cand: List[Dict],
+    opts: ConvertOptions,
+    progress: Optional[ProgressFn] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """
+    후보들을 자식 프로세스에서 동시에 평가.
+    - 규칙은 순차와 동일: 통과한 후보 중 "가장 낮은 index"가 승자
+    - 후보 i가 통과하면 i보다 뒤 후보는 취소(대기 중은 Future.cancel, 실행 중은 공유 취소 신호),
+      i보다 앞 후보 결과만 기다림
+    반환: (index 순 debug 목록, 승자 index 또는 None)
+    """
+    global _cand_run_seq
+    brep = shape.exportBrepToString()
+    brep_key = uuid.uuid4().hex
+    ex = _candidate_executor(max(1, min(int(opts.candidate_workers), len(cand))))
+    cancel = _cand_cancel
+    with _cand_executor_lock:
+        _cand_run_seq += 1
+        run = _cand_run_seq
+    with cancel.get_lock():
+        cancel[0], cancel[1] = run, -1
+
+    futures = {}
+    for idx, c in enumerate(cand):
+        n = _unit(FreeCAD.Vector(c["normal"]))
+        fut = ex.submit(_candidate_task, brep_key, brep, run, idx, (n.x, n.y, n.z), c["area_sum"], opts)
+        futures[fut] = idx
+
+    results: Dict[int, Dict[str, Any]] = {}
+    winner: Optional[int] = None
+    for fut in as_completed(futures):
+        idx = futures[fut]
+        if fut.cancelled():
+            continue
+        results[idx] = fut.result()
+        _emit(progress, "candidate", candidate=idx, ok=bool(results[idx].get("ok")))
+
+        if results[idx].get("ok") and (winner is None or idx < winner):
+            winner = idx
+            with cancel.get_lock():
+                cancel[1] = idx
+            for f, j in futures.items():
+                if j > idx:
+                    f.cancel()
+
+        # 승자보다 앞선 후보가 모두 끝났으면 결정 완료
+        if winner is not None and all(j in results for j in range(winner)):
+            break
+
+    # 취소로 끝난 후보는 평가 결과가 아니므로 debug 목록에서 제외
+    return [results[i] for i in sorted(results) if not results[i].get("cancelled")], winner
+
+
 # ----------------------------
 # 2D extraction helpers
 # ----------------------------
@@ -175,7 +805,47 @@ def _dedupe_points_xy(pts: List[Tuple[float, float]], tol: float = 1e-6) -> List
     return out
 
 
-def _wire_to_points_xy(wire: "Part.Wire") -> List[Tuple[float, float]]:
+def _curve_type(e: "Part.Edge") -> str:
+    try:
+        return str(getattr(e.Curve, "TypeId", "") or "")
+    except Exception:
+        return ""
+
+
+def _sample_edge(e: "Part.Edge", chord_tol: float) -> List["FreeCAD.Vector"]:
+    """
+    현 오차(chord_tol) 기준 에지 샘플링 (파라미터 증가 방향)
+    - 직선: 양 끝 2점
+    - 원/원호: 반지름으로 각 간격 계산(균등 분할)
+    - 그 외(B-spline 등): OCC discretize(Deflection)
+    - 실패 시 기존 고정 간격(0.5mm) 샘플링
+    """
+    pr = e.ParameterRange
+    u0, u1 = float(pr[0]), float(pr[1])
+    tol = max(1e-6, float(chord_tol))
+    ct = _curve_type(e)
+
+    try:
+        if ct in ("Part::GeomLine", "Part::GeomLineSegment"):
+            return [e.valueAt(u0), e.valueAt(u1)]
+
+        if ct == "Part::GeomCircle":
+            r = float(e.Curve.Radius)
+            step = 2.0 * math.acos(1.0 - tol / r) if tol < r else math.pi / 2
+            n = max(2, int(math.ceil(abs(u1 - u0) / step)))
+            return [e.valueAt(u0 + (u1 - u0) * (i / n)) for i in range(n + 1)]
+
+        pts = e.discretize(Deflection=tol)
+        if len(pts) >= 2:
+            return list(pts)
+    except Exception:
+        pass
+
+    n = max(16, min(400, int(float(e.Length) / 0.5)))
+    return [e.valueAt(u0 + (u1 - u0) * (i / n)) for i in range(n + 1)]
+
+
+def _wire_to_points_xy(wire: "Part.Wire", chord_tol: float = 0.01) -> List[Tuple[float, float]]:
     pts: List[Tuple[float, float]] = []
     edges = list(getattr(wire, "Edges", []))
     if not edges:
@@ -183,13 +853,7 @@ def _wire_to_points_xy(wire: "Part.Wire") -> List[Tuple[float, float]]:
 
     for e in edges:
         try:
-            # 길이에 따라 샘플 수 가변(0.5mm 정도)
-            n = max(16, min(400, int(float(e.Length) / 0.5)))
-            pr = e.ParameterRange
-            u0, u1 = float(pr[0]), float(pr[1])
-            for i in range(n + 1):
-                u = u0 + (u1 - u0) * (i / n)
-                p = e.valueAt(u)
+            for p in _sample_edge(e, chord_tol):
                 pts.append((float(p.x), float(p.y)))
         except Exception:
             continue
@@ -264,14 +928,18 @@ def _is_closed_loop(pts: List[Tuple[float, float]], tol: float = 1e-6) -> bool:
     return (abs(sx - ex) <= tol) and (abs(sy - ey) <= tol)
 
 
-def _metrics_from_polylines(polylines: List[List[Tuple[float, float]]]) -> Dict[str, Any]:
-    """
-    ✅ 요구사항 반영:
-    - outer(가장 큰 면적 폐곡선) / holes(나머지 폐곡선) 분리
-    - 가공 길이 = outer_perimeter + hole_total_perimeter
-    - 피어싱 수(loops) = outer 1 + hole_count
-    - 소재비용 기준 bbox_area_mm2 = bbox_w * bbox_h
-    """
+def _loop_stats_np(pset: "PolylineSet") -> Tuple[Tuple[float, float, float, float], List[float], List[float], float]:
+    closed = pset.closed_mask()
+    lengths = pset.lengths()
+    areas = np.abs(pset.signed_areas())
+    usable = pset.counts >= 2
+    open_len = float(lengths[usable & ~closed].sum())
+    return pset.bbox(), lengths[closed].tolist(), areas[closed].tolist(), open_len
+
+
+def _loop_stats_py(
+    polylines: List[List[Tuple[float, float]]],
+) -> Tuple[Tuple[float, float, float, float], List[float], List[float], float]:
     xmin = ymin = float("inf")
     xmax = ymax = float("-inf")
 
@@ -302,6 +970,24 @@ def _metrics_from_polylines(polylines: List[List[Tuple[float, float]]]) -> Dict[
     if xmin == float("inf"):
         xmin = ymin = xmax = ymax = 0.0
 
+    return (xmin, ymin, xmax, ymax), closed_perims, closed_areas, open_len
+
+
+def _metrics_from_polylines(polylines) -> Dict[str, Any]:
+    """
+    ✅ 요구사항 반영:
+    - outer(가장 큰 면적 폐곡선) / holes(나머지 폐곡선) 분리
+    - 가공 길이 = outer_perimeter + hole_total_perimeter
+    - 피어싱 수(loops) = outer 1 + hole_count
+    - 소재비용 기준 bbox_area_mm2 = bbox_w * bbox_h
+    polylines: PolylineSet 또는 점 리스트의 리스트
+    """
+    if PolylineSet is not None:
+        bb, closed_perims, closed_areas, open_len = _loop_stats_np(PolylineSet.from_lists(polylines))
+    else:
+        bb, closed_perims, closed_areas, open_len = _loop_stats_py(polylines)
+    xmin, ymin, xmax, ymax = bb
+
     bbox_w = float(xmax - xmin)
     bbox_h = float(ymax - ymin)
     bbox_area = float(max(bbox_w, 0.0) * max(bbox_h, 0.0))
@@ -360,10 +1046,10 @@ def _metrics_from_polylines(polylines: List[List[Tuple[float, float]]]) -> Dict[
     }
 
 
-def _polylines_from_wires(wires: List["Part.Wire"]) -> List[List[Tuple[float, float]]]:
+def _polylines_from_wires(wires: List["Part.Wire"], chord_tol: float = 0.01) -> List[List[Tuple[float, float]]]:
     polylines: List[List[Tuple[float, float]]] = []
     for w in wires:
-        pts = _wire_to_points_xy(w)
+        pts = _wire_to_points_xy(w, chord_tol)
         if len(pts) >= 2:
             polylines.append(pts)
     return polylines
@@ -372,29 +1058,61 @@ def _polylines_from_wires(wires: List["Part.Wire"]) -> List[List[Tuple[float, fl
 # ----------------------------
 # DXF writer (ezdxf)
 # ----------------------------
-def _write_dxf_from_polylines(out_dxf: str, polylines: List[List[Tuple[float, float]]]) -> None:
-    os.makedirs(os.path.dirname(out_dxf) or ".", exist_ok=True)
+# R12는 LWPOLYLINE/SPLINE이 없어 POLYLINE(2D)로, SPLINE은 평탄화해서 기록
+DXF_VERSIONS = ("R2010", "R12")
 
+
+def _new_dxf_doc(dxfversion: str = "R2010"):
     try:
         import ezdxf  # type: ignore
     except Exception as e:
         raise ConvertError(f"ezdxf import 실패: {e}")
 
-    doc = ezdxf.new(dxfversion="R2010")
-    try:
-        doc.units = ezdxf.units.MM
-    except Exception:
-        pass
+    if dxfversion not in DXF_VERSIONS:
+        raise ConvertError(f"지원하지 않는 DXF 버전: {dxfversion}")
+    doc = ezdxf.new(dxfversion=dxfversion)
+    if dxfversion != "R12":  # R12 헤더에는 $INSUNITS 없음
+        try:
+            doc.units = ezdxf.units.MM
+        except Exception:
+            pass
+    return doc
+
+
+def _save_dxf(doc, out_dxf: str, binary: bool = False) -> None:
+    doc.saveas(out_dxf, fmt="bin" if binary else "asc")
+
+    if (not os.path.exists(out_dxf)) or os.path.getsize(out_dxf) <= 0:
+        raise ConvertError(f"ezdxf로 DXF 저장을 시도했지만 파일이 생성되지 않았습니다: {out_dxf}")
 
+
+def _add_polyline(msp, pts, close: bool) -> None:
+    if msp.doc.dxfversion == "AC1009":
+        msp.add_polyline2d(pts, close=close)
+    else:
+        msp.add_lwpolyline(pts, close=close)
+
+
+def _write_dxf_from_polylines(out_dxf: str, polylines, dxfversion: str = "R2010", binary: bool = False) -> None:
+    """
+    polylines: PolylineSet 또는 점 리스트의 리스트
+    """
+    os.makedirs(os.path.dirname(out_dxf) or ".", exist_ok=True)
+
+    doc = _new_dxf_doc(dxfversion)
     msp = doc.modelspace()
 
+    if PolylineSet is not None and isinstance(polylines, PolylineSet):
+        closed = polylines.closed_mask().tolist()
+        polylines = polylines.to_lists()
+    else:
+        closed = [_is_closed_loop(pts) for pts in polylines]
+
     wrote_any = False
-    for pts in polylines:
+    for pts, close_flag in zip(polylines, closed):
         if len(pts) < 2:
             continue
 
-        close_flag = _is_closed_loop(pts)
-
         # close_flag면 마지막 점 제거하고 close로 닫기
         if close_flag and len(pts) >= 2:
             pts2 = pts[:-1]
@@ -404,25 +1122,108 @@ def _write_dxf_from_polylines(out_dxf: str, polylines: List[List[Tuple[float, fl
         if len(pts2) < 2:
             continue
 
-        msp.add_lwpolyline(pts2, close=close_flag)
+        _add_polyline(msp, pts2, close_flag)
         wrote_any = True
 
     if not wrote_any:
         raise ConvertError("DXF로 내보낼 2D 폴리라인을 만들지 못했습니다(결과가 비어있음).")
 
-    doc.saveas(out_dxf)
+    _save_dxf(doc, out_dxf, binary)
 
-    if (not os.path.exists(out_dxf)) or os.path.getsize(out_dxf) <= 0:
-        raise ConvertError(f"ezdxf로 DXF 저장을 시도했지만 파일이 생성되지 않았습니다: {out_dxf}")
+
+def write_dxf(
+    out_dxf: str,
+    polylines,
+    entities: Optional[List[Dict[str, Any]]] = None,
+    dxfversion: str = "R2010",
+    binary: bool = False,
+    chord_tol_mm: float = 0.01,
+) -> None:
+    """
+    해석적 엔티티가 있으면 그대로, 없으면 폴리라인으로 DXF 저장 (FreeCAD 불필요 → 저장된 형상에서 재생성 가능)
+    - dxfversion: "R2010" | "R12", binary=True면 바이너리 DXF
+    """
+    if entities:
+        _write_dxf_from_entities(out_dxf, entities, dxfversion, binary, chord_tol_mm)
+    else:
+        _write_dxf_from_polylines(out_dxf, polylines, dxfversion, binary)
+
+
+def _spline_points_xy(ent: Dict[str, Any], chord_tol: float) -> List[Tuple[float, float]]:
+    from ezdxf.math import BSpline  # type: ignore
+
+    weights = ent.get("weights")
+    if weights and all(abs(w - 1.0) <= 1e-12 for w in weights):
+        weights = None
+    bs = BSpline(ent["control_points"], order=ent["degree"] + 1, knots=ent["knots"], weights=weights)
+    return [(float(v.x), float(v.y)) for v in bs.flattening(max(1e-4, chord_tol))]
+
+
+def _write_dxf_from_entities(
+    out_dxf: str,
+    entities: List[Dict[str, Any]],
+    dxfversion: str = "R2010",
+    binary: bool = False,
+    chord_tol: float = 0.01,
+) -> None:
+    """
+    해석적 엔티티(LINE/CIRCLE/ARC/SPLINE) 그대로 기록, 나머지는 LWPOLYLINE
+    (R12: SPLINE → 현 오차 chord_tol로 평탄화한 POLYLINE)
+    """
+    os.makedirs(os.path.dirname(out_dxf) or ".", exist_ok=True)
+
+    doc = _new_dxf_doc(dxfversion)
+    r12 = dxfversion == "R12"
+    msp = doc.modelspace()
+
+    wrote_any = False
+    for ent in entities:
+        t = ent.get("type")
+        if t == "line":
+            msp.add_line(ent["start"], ent["end"])
+        elif t == "circle":
+            msp.add_circle(ent["center"], ent["radius"])
+        elif t == "arc":
+            msp.add_arc(ent["center"], ent["radius"], ent["start_angle"], ent["end_angle"])
+        elif t == "spline" and r12:
+            pts = _spline_points_xy(ent, chord_tol)
+            if len(pts) < 2:
+                continue
+            _add_polyline(msp, pts, False)
+        elif t == "spline":
+            weights = ent.get("weights")
+            if weights and any(abs(w - 1.0) > 1e-12 for w in weights):
+                msp.add_rational_spline(ent["control_points"], weights, degree=ent["degree"], knots=ent["knots"])
+            else:
+                msp.add_open_spline(ent["control_points"], degree=ent["degree"], knots=ent["knots"])
+        elif t == "polyline":
+            pts = ent["points"]
+            if len(pts) < 2:
+                continue
+            _add_polyline(msp, pts, bool(ent.get("closed")))
+        else:
+            continue
+        wrote_any = True
+
+    if not wrote_any:
+        raise ConvertError("DXF로 내보낼 2D 엔티티를 만들지 못했습니다(결과가 비어있음).")
+
+    _save_dxf(doc, out_dxf, binary)
 
 
 # ----------------------------
 # SVG preview
 # ----------------------------
-def _svg_from_polylines(polylines: List[List[Tuple[float, float]]], stroke_mm: float = 0.15) -> str:
-    m = _metrics_from_polylines(polylines)
-    bb = m["bbox_xy"]
-    xmin, ymin, xmax, ymax = bb["xmin"], bb["ymin"], bb["xmax"], bb["ymax"]
+def _svg_from_polylines(polylines, stroke_mm: float = 0.15) -> str:
+    """
+    polylines: PolylineSet 또는 점 리스트의 리스트
+    """
+    if PolylineSet is not None and isinstance(polylines, PolylineSet):
+        xmin, ymin, xmax, ymax = polylines.bbox()
+        polylines = polylines.to_lists()
+    else:
+        bb = _metrics_from_polylines(polylines)["bbox_xy"]
+        xmin, ymin, xmax, ymax = bb["xmin"], bb["ymin"], bb["xmax"], bb["ymax"]
     w = max(1e-6, xmax - xmin)
     h = max(1e-6, ymax - ymin)
 
@@ -462,33 +1263,172 @@ def _svg_from_polylines(polylines: List[List[Tuple[float, float]]], stroke_mm: f
     return svg
 
 
+def write_svg(out_svg: str, polylines, stroke_mm: float = 0.15) -> None:
+    """
+    저장된 형상에서 SVG 프리뷰 파일 생성(FreeCAD 불필요)
+    """
+    with open(out_svg, "w", encoding="utf-8") as f:
+        f.write(_svg_from_polylines(polylines, stroke_mm))
+
+
 # ----------------------------
 # 2D generation (silhouette / section)
 # ----------------------------
-def _project_silhouette_polylines(shape3d: "Part.Shape") -> Tuple[List[List[Tuple[float, float]]], Dict[str, Any]]:
+def _edge_to_entity_xy(e: "Part.Edge", chord_tol: float, tol: float = 1e-6) -> Optional[Dict[str, Any]]:
+    """
+    에지를 z=0 평면 투영한 2D DXF 엔티티로 변환(평행 투영이라 해석적 형상 유지)
+    - 직선 → line (수직 에지처럼 점으로 줄어들면 None)
+    - 축이 z와 평행한 원/원호 → circle/arc
+    - B-spline → spline (제어점 xy 투영 = 정확한 투영)
+    - 그 외(기울어진 원 → 타원 등) → 샘플링 polyline
+    """
+    pr = e.ParameterRange
+    u0, u1 = float(pr[0]), float(pr[1])
+    ct = _curve_type(e)
+
+    if ct in ("Part::GeomLine", "Part::GeomLineSegment"):
+        a = e.valueAt(u0)
+        b = e.valueAt(u1)
+        if math.hypot(b.x - a.x, b.y - a.y) <= tol:
+            return None
+        return {"type": "line", "start": (float(a.x), float(a.y)), "end": (float(b.x), float(b.y))}
+
+    if ct == "Part::GeomCircle":
+        circ = e.Curve
+        axis = _unit(FreeCAD.Vector(circ.Axis))
+        if abs(abs(axis.z) - 1.0) <= 1e-9:
+            c = circ.Center
+            center = (float(c.x), float(c.y))
+            r = float(circ.Radius)
+            if abs(abs(u1 - u0) - 2 * math.pi) <= 1e-9:
+                return {"type": "circle", "center": center, "radius": r}
+
+            a = e.valueAt(u0)
+            b = e.valueAt(u1)
+            sa = math.degrees(math.atan2(a.y - c.y, a.x - c.x))
+            ea = math.degrees(math.atan2(b.y - c.y, b.x - c.x))
+            # DXF ARC는 +z에서 본 반시계 방향 → 축이 -z면 파라미터 증가가 시계 방향
+            if axis.z < 0:
+                sa, ea = ea, sa
+            return {"type": "arc", "center": center, "radius": r, "start_angle": sa, "end_angle": ea}
+
+    if ct == "Part::GeomBSplineCurve":
+        try:
+            bs = e.Curve.copy()
+            if abs(float(bs.FirstParameter) - u0) > 1e-12 or abs(float(bs.LastParameter) - u1) > 1e-12:
+                bs.segment(u0, u1)
+            if bs.isPeriodic():
+                bs.setNotPeriodic()
+            knots = []
+            for k, m in zip(bs.getKnots(), bs.getMultiplicities()):
+                knots.extend([float(k)] * int(m))
+            return {
+                "type": "spline",
+                "degree": int(bs.Degree),
+                "control_points": [(float(p.x), float(p.y)) for p in bs.getPoles()],
+                "weights": [float(w) for w in bs.getWeights()],
+                "knots": knots,
+            }
+        except Exception:
+            pass
+
+    pts = _dedupe_points_xy([(float(p.x), float(p.y)) for p in _sample_edge(e, chord_tol)], tol=tol)
+    if len(pts) < 2:
+        return None
+    return {"type": "polyline", "points": pts, "closed": False}
+
+
+def _projected_edge_key(tag: str, pts: List[Tuple[float, float]], q: float = 1e-5) -> Tuple:
+    """
+    투영 에지 공간 해시 키: 격자(q) 스냅한 양 끝점(정렬) + 무게중심 + 점 개수
+    - 방향이 반대인 쌍둥이 에지(윗면/아랫면)도 같은 키
+    """
+    def snap(x: float, y: float) -> Tuple[int, int]:
+        return (int(round(x / q)), int(round(y / q)))
+
+    a = snap(*pts[0])
+    b = snap(*pts[-1])
+    n = len(pts)
+    cx = sum(p[0] for p in pts) / n
+    cy = sum(p[1] for p in pts) / n
+    return (tag, min(a, b), max(a, b), snap(cx, cy), n)
+
+
+def _is_degenerate_xy(pts: List[Tuple[float, float]], tol: float = 1e-6) -> bool:
+    # 수직 에지처럼 투영하면 한 점으로 줄어드는 경우
+    if len(pts) < 2:
+        return True
+    xs = [p[0] for p in pts]
+    ys = [p[1] for p in pts]
+    return (max(xs) - min(xs)) <= tol and (max(ys) - min(ys)) <= tol
+
+
+def _entity_key(ent: Dict[str, Any]) -> Tuple:
+    t = ent["type"]
+    if t == "line":
+        return _projected_edge_key(t, [ent["start"], ent["end"]])
+    if t == "circle":
+        cx, cy = ent["center"]
+        return _projected_edge_key(t, [ent["center"], (cx + ent["radius"], cy)])
+    if t == "arc":
+        # 양 끝점 + 호 중간점(반시계 start→end) → 끝점/중심이 같은 상보 호(0→180°, 180→0°)는 다른 키
+        cx, cy = ent["center"]
+        r = ent["radius"]
+        sa, ea = float(ent["start_angle"]), float(ent["end_angle"])
+        ma = sa + ((ea - sa) % 360.0) / 2.0
+        pts = [
+            (cx + r * math.cos(math.radians(a)), cy + r * math.sin(math.radians(a)))
+            for a in (sa, ma, ea)
+        ]
+        return _projected_edge_key(t, pts)
+    if t == "spline":
+        return _projected_edge_key(t, ent["control_points"])
+    return _projected_edge_key(t, ent["points"])
+
+
+def _entities_from_edges(edges: List["Part.Edge"], chord_tol: float) -> List[Dict[str, Any]]:
+    out: List[Dict[str, Any]] = []
+    seen = set()
+    for e in edges:
+        try:
+            ent = _edge_to_entity_xy(e, chord_tol)
+        except Exception:
+            continue
+        if ent is None:
+            continue
+        # 윗면/아랫면 쌍둥이 에지는 투영하면 겹침 → 1개만
+        key = _entity_key(ent)
+        if key in seen:
+            continue
+        seen.add(key)
+        out.append(ent)
+    return out
+
+
+def _project_silhouette_polylines(
+    shape3d: "Part.Shape", chord_tol: float = 0.01
+) -> Tuple[List[List[Tuple[float, float]]], Dict[str, Any]]:
     proj_edges = []
+    seen = set()
+    n_degenerate = 0
+    n_duplicate = 0
 
     for e in shape3d.Edges:
         try:
-            n = max(24, min(500, int(float(e.Length) / 0.5)))
-            pr = e.ParameterRange
-            u0, u1 = float(pr[0]), float(pr[1])
-            pts = []
-            for i in range(n + 1):
-                u = u0 + (u1 - u0) * (i / n)
-                p = e.valueAt(u)
-                pts.append(FreeCAD.Vector(float(p.x), float(p.y), 0.0))
-
-            clean = []
-            for v in pts:
-                if not clean:
-                    clean.append(v)
-                else:
-                    if (v.sub(clean[-1])).Length > 1e-6:
-                        clean.append(v)
+            # 3D에서 현 오차를 만족하면 투영(축소 사상) 후에도 만족
+            pts = _dedupe_points_xy([(float(p.x), float(p.y)) for p in _sample_edge(e, chord_tol)], tol=1e-6)
+
+            # 수직 에지(점으로 축소) / 윗면·아랫면 쌍둥이(같은 투영) 제거 → makePolygon/sortEdges 전에
+            if _is_degenerate_xy(pts):
+                n_degenerate += 1
+                continue
+            key = _projected_edge_key("p", pts)
+            if key in seen:
+                n_duplicate += 1
+                continue
+            seen.add(key)
 
-            if len(clean) >= 2:
-                proj_edges.append(Part.makePolygon(clean))
+            proj_edges.append(Part.makePolygon([FreeCAD.Vector(x, y, 0.0) for x, y in pts]))
         except Exception:
             continue
 
@@ -507,12 +1447,19 @@ def _project_silhouette_polylines(shape3d: "Part.Shape") -> Tuple[List[List[Tupl
             except Exception:
                 pass
 
-    polylines = _polylines_from_wires(wires)
-    extra = {"wires": len(wires), "edges": len(proj_edges)}
+    polylines = _polylines_from_wires(wires, chord_tol)
+    extra = {
+        "wires": len(wires),
+        "edges": len(proj_edges),
+        "dropped_degenerate": n_degenerate,
+        "dropped_duplicate": n_duplicate,
+    }
     return polylines, extra
 
 
-def _section_polylines(shape3d: "Part.Shape", ratio: float) -> Tuple[List[List[Tuple[float, float]]], Dict[str, Any]]:
+def _section_polylines(
+    shape3d: "Part.Shape", ratio: float, chord_tol: float = 0.01
+) -> Tuple[List[List[Tuple[float, float]]], Dict[str, Any]]:
     zmin, zmax = _bbox_zminmax(shape3d)
     z = zmin + (zmax - zmin) * max(0.0, min(1.0, ratio))
 
@@ -533,7 +1480,7 @@ def _section_polylines(shape3d: "Part.Shape", ratio: float) -> Tuple[List[List[T
             except Exception:
                 pass
 
-    polylines = _polylines_from_wires(wires)
+    polylines = _polylines_from_wires(wires, chord_tol)
     extra = {"wires": len(wires), "edges": len(sec.Edges)}
     return polylines, extra
 
@@ -541,14 +1488,28 @@ def _section_polylines(shape3d: "Part.Shape", ratio: float) -> Tuple[List[List[T
 # ----------------------------
 # Public API
 # ----------------------------
-def convert_step_to_dxf(step_path: str, out_dxf: str, opts: Optional[ConvertOptions] = None) -> Dict:
+def convert_step_to_dxf(
+    step_path: str,
+    out_dxf: Optional[str],
+    opts: Optional[ConvertOptions] = None,
+    progress: Optional[ProgressFn] = None,
+    out_geometry: Optional[str] = None,
+) -> Dict:
     """
+    progress(stage, data): import → orientation → slice(k/n) → projection → dxf_write → svg
+
+    out_dxf: None이면 견적 전용(metrics/SVG만, DXF 직렬화·디스크 쓰기 없음)
+    out_geometry: 지정하면 2D 폴리라인(+DXF 엔티티) + 방향 + 두께를 .npz로 저장
+                  (FreeCAD 없이 DXF/SVG 재생성·재견적용)
+
     Returns:
       - status: ok/failed
-      - out_dxf
+      - out_dxf (견적 전용이면 None)
       - thickness_mm
       - metrics (loops, cut_length_mm, bbox_mm.area_mm2, hole_count, ...)
       - svg (if opts.make_svg True)
+      - polylines (2D 결과 좌표, 캐시/재사용용)
+      - geometry (out_geometry 경로, 저장했을 때만)
       - debug (if opts.debug True)
     """
     _require_freecad()
@@ -557,12 +1518,16 @@ def convert_step_to_dxf(step_path: str, out_dxf: str, opts: Optional[ConvertOpti
     if not os.path.exists(step_path):
         raise ConvertError(f"CAD 파일이 없습니다: {step_path}")
 
-    os.makedirs(os.path.dirname(out_dxf) or ".", exist_ok=True)
-    doc = FreeCAD.newDocument("ConvertDoc")
+    if out_dxf:
+        os.makedirs(os.path.dirname(out_dxf) or ".", exist_ok=True)
+    # ✅ 문서 이름을 변환마다 고유하게(동시 변환 시 문서 충돌 방지)
+    doc = FreeCAD.newDocument(f"ConvertDoc_{uuid.uuid4().hex[:12]}")
 
     ext = os.path.splitext(step_path.lower())[1]
 
     try:
+        _emit(progress, "import", format=ext.lstrip("."))
+
         # ✅ STEP/STP는 Import, IGS/IGES는 Part.insert 사용
         if ext in [".igs", ".iges"]:
             Part.insert(step_path, doc.Name)
@@ -594,79 +1559,117 @@ def convert_step_to_dxf(step_path: str, out_dxf: str, opts: Optional[ConvertOpti
             raise ConvertError("평면 방향 후보를 추출하지 못했습니다.")
 
         cand = clusters[: max(1, opts.k_face_candidates)]
+        _emit(progress, "orientation", faces=len(faces), clusters=len(clusters), candidates=len(cand))
         z_axis = FreeCAD.Vector(0, 0, 1)
 
-        debug_info = []
-
-        for idx, c in enumerate(cand):
-            n = c["normal"]
-
-            rot = _rotation_from_to(n, z_axis)
-            placed = shape.copy()
-            placed.Placement = FreeCAD.Placement(
-                FreeCAD.Vector(0, 0, 0),
-                rot,
-                FreeCAD.Vector(0, 0, 0),
-            )
-
-            zmin, zmax = _bbox_zminmax(placed)
-            thickness_mm = float(zmax - zmin)
-
-            if thickness_mm <= 1e-9:
-                debug_info.append({"candidate": idx, "reason": "bbox thickness ~0"})
-                continue
-
-            eps = 0.02
-            areas = []
-            for i in range(opts.n_slices):
-                t = (i + 0.5) / opts.n_slices
-                t = eps + (1 - 2 * eps) * t
-                z = zmin + thickness_mm * t
-                a = _section_area_at_z(placed, z)
-                areas.append(a)
-
-            ok = _areas_are_constant(areas, opts.rel_tol, opts.abs_tol_area)
-
-            dbg = {
-                "candidate": idx,
-                "area_sum_cluster": c["area_sum"],
-                "areas_min": min(areas),
-                "areas_max": max(areas),
-                "areas_mean": sum(areas) / len(areas),
-                "ok": ok,
-                "thickness_mm": thickness_mm,
-            }
-
-            if not ok:
+        debug_info: List[Dict[str, Any]] = []
+        winner: Optional[int] = None
+        placed = None
+        evaluated = False
+
+        # ✅ 판금(2.5D) 부품은 면 토폴로지만으로 바로 판정(슬라이싱 생략)
+        # 첫 후보만 검사: 통과 못 하면(애매) 슬라이싱으로 → "낮은 index 우선" 규칙 유지
+        if opts.analytic_precheck:
+            pre = _planar_prism_precheck(shape, faces, 0, cand[0]["normal"])
+            if pre is not None:
+                _emit(progress, "orientation_analytic", candidate=0, thickness_mm=pre["thickness_mm"])
+                debug_info, winner, evaluated = [pre], 0, True
+                placed = _place(shape, _rotation_from_to(cand[0]["normal"], z_axis))
+
+        # mesh 엔진: 테셀레이션은 1회, 후보별로는 좌표만 회전
+        base_mesh = None
+        if not evaluated and opts.slice_engine == "mesh":
+            if np is None:
+                raise ConvertError("mesh 단면 엔진에는 numpy가 필요합니다.")
+            base_mesh = _tessellate_np(shape, opts.mesh_deflection_mm)
+
+        # ✅ 후보가 여럿이면 자식 프로세스에서 동시에 평가(실패 시 순차로 폴백)
+        if not evaluated and opts.candidate_workers > 1 and len(cand) > 1 and base_mesh is None:
+            try:
+                debug_info, winner = _evaluate_candidates_parallel(shape, cand, opts, progress)
+                evaluated = True
+                if winner is not None:
+                    placed = _place(shape, _rotation_from_to(cand[winner]["normal"], z_axis))
+            except Exception:
+                _reset_candidate_executor()
+                debug_info, winner = [], None
+
+        if not evaluated:
+            for idx, c in enumerate(cand):
+                dbg, pl = _evaluate_candidate(
+                    shape, idx, c["normal"], c["area_sum"], opts, progress, base_mesh=base_mesh
+                )
                 debug_info.append(dbg)
-                continue
+                if dbg.get("ok"):
+                    winner, placed = idx, pl
+                    break
+
+        if winner is not None:
+            idx = winner
+            dbg = next(d for d in debug_info if d["candidate"] == idx)
+            thickness_mm = float(dbg["thickness_mm"])
 
             # 2D 생성
+            _emit(progress, "projection", candidate=idx, thickness_mm=thickness_mm)
             if opts.silhouette:
-                polylines, extra = _project_silhouette_polylines(placed)
+                polylines, extra = _project_silhouette_polylines(placed, opts.chord_tol_mm)
                 mode = "silhouette_projection_ezdxf"
             else:
-                polylines, extra = _section_polylines(placed, opts.section_z_ratio)
+                polylines, extra = _section_polylines(placed, opts.section_z_ratio, opts.chord_tol_mm)
                 mode = "section_at_ratio_ezdxf"
 
             if not polylines:
                 raise ConvertError("2D 폴리라인 생성 결과가 비어 있습니다.")
 
-            metrics = _metrics_from_polylines(polylines)
+            # 이후 metrics/DXF/SVG는 연속 버퍼 하나로 처리
+            if PolylineSet is not None:
+                pset = PolylineSet.from_lists(polylines).deduped()
+            else:
+                pset = polylines
+            metrics = _metrics_from_polylines(pset)
 
             # DXF 저장
-            _write_dxf_from_polylines(out_dxf, polylines)
+            entities = None
+            if opts.dxf_entities == "native":
+                if opts.silhouette:
+                    src_edges = list(placed.Edges)
+                else:
+                    zmin_p, zmax_p = _bbox_zminmax(placed)
+                    z = zmin_p + (zmax_p - zmin_p) * max(0.0, min(1.0, opts.section_z_ratio))
+                    plane = Part.Plane(FreeCAD.Vector(0, 0, z), FreeCAD.Vector(0, 0, 1))
+                    src_edges = list(placed.section(plane.toShape()).Edges)
+                entities = _entities_from_edges(src_edges, opts.chord_tol_mm)
+
+            if out_dxf:
+                _emit(progress, "dxf_write", polylines=len(polylines), entities=len(entities or []))
+                write_dxf(out_dxf, pset, entities)
 
             # SVG 생성(옵션)
             svg = None
             if opts.make_svg:
-                svg = _svg_from_polylines(polylines, stroke_mm=opts.svg_stroke_mm)
+                _emit(progress, "svg")
+                svg = _svg_from_polylines(pset, stroke_mm=opts.svg_stroke_mm)
 
             dbg.update({"dxf": {"extra": extra, "metrics": metrics}})
-            debug_info.append(dbg)
+
+            # 중간 형상 저장(재견적/재렌더링 시 FreeCAD 생략)
+            geometry = None
+            if out_geometry and save_geometry is not None:
+                normal = cand[idx]["normal"]
+                rot = _rotation_from_to(normal, z_axis)
+                save_geometry(
+                    out_geometry,
+                    pset,
+                    thickness_mm,
+                    normal=(normal.x, normal.y, normal.z),
+                    rotation=tuple(rot.Q),
+                    meta={"candidate": idx, "mode": mode, "chord_tol_mm": opts.chord_tol_mm},
+                    entities=entities,
+                )
+                geometry = out_geometry
 
             # 생성 검증
-            if (not os.path.exists(out_dxf)) or os.path.getsize(out_dxf) <= 0:
+            if out_dxf and ((not os.path.exists(out_dxf)) or os.path.getsize(out_dxf) <= 0):
                 raise ConvertError(f"변환은 성공으로 판정됐지만 DXF 파일이 생성되지 않았습니다: {out_dxf}")
 
             return {
@@ -679,6 +1682,9 @@ def convert_step_to_dxf(step_path: str, out_dxf: str, opts: Optional[ConvertOpti
                 "thickness_mm": thickness_mm,
                 "metrics": metrics,
                 "svg": svg,
+                "polylines": polylines,
+                "entities": entities,
+                "geometry": geometry,
                 "debug": debug_info if opts.debug else None,
                 "out_dxf": out_dxf,
             }
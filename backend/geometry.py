@@ -0,0 +1,68 @@
+import json
+import os
+import uuid
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from polyline_set import PolylineSet
+
+# =============================
+# job별 2D 중간 형상 저장 (.npz)
+# =============================
+# - 변환 결과 폴리라인(coords/offsets) + 선택된 방향(법선/회전) + 두께
+# - 재견적/SVG·DXF 재생성/새 metrics 계산 시 STEP을 FreeCAD로 다시 읽지 않음
+# - 파일 구성: coords(N,2 float64), offsets(M+1 int64), thickness_mm, normal(3), rotation(4, FreeCAD 쿼터니언 x,y,z,w), meta(json)
+#   + entities(json, native DXF 엔티티 — 없으면 "null") → DXF를 변환 때와 같은 내용으로 재생성
+
+FORMAT_VERSION = 2
+
+
+def save_geometry(
+    path: str,
+    polylines,
+    thickness_mm: float,
+    normal: Optional[Sequence[float]] = None,
+    rotation: Optional[Sequence[float]] = None,
+    meta: Optional[Dict[str, Any]] = None,
+    entities: Optional[List[Dict[str, Any]]] = None,
+) -> None:
+    """
+    임시 파일에 쓰고 rename → 읽는 쪽이 반쯤 쓴 파일을 보지 않음
+    """
+    pset = PolylineSet.from_lists(polylines)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{uuid.uuid4().hex[:8]}.part"
+    try:
+        with open(tmp, "wb") as f:
+            np.savez_compressed(
+                f,
+                format_version=np.int64(FORMAT_VERSION),
+                coords=pset.coords,
+                offsets=pset.offsets,
+                thickness_mm=np.float64(thickness_mm),
+                normal=np.asarray(normal if normal is not None else (0.0, 0.0, 1.0), dtype=np.float64),
+                rotation=np.asarray(rotation if rotation is not None else (0.0, 0.0, 0.0, 1.0), dtype=np.float64),
+                meta=np.array(json.dumps(meta or {}, ensure_ascii=False)),
+                entities=np.array(json.dumps(entities, ensure_ascii=False)),
+            )
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+def load_geometry(path: str) -> Dict[str, Any]:
+    """
+    Returns: polylines(PolylineSet), thickness_mm, normal, rotation, meta, entities(None이면 폴리라인만)
+    """
+    with np.load(path, allow_pickle=False) as z:
+        return {
+            "format_version": int(z["format_version"]),
+            "polylines": PolylineSet(z["coords"], z["offsets"]),
+            "thickness_mm": float(z["thickness_mm"]),
+            "normal": [float(v) for v in z["normal"]],
+            "rotation": [float(v) for v in z["rotation"]],
+            "meta": json.loads(str(z["meta"])),
+            "entities": json.loads(str(z["entities"])) if "entities" in z.files else None,
+        }
@@ -0,0 +1,381 @@
+import math
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select, update, or_, and_, exists, func
+from sqlalchemy.orm import Session, aliased
+
+import events
+from models import ConvertTask, Job, JobStatus, TaskKind, TaskStatus
+
+# =============================
+# DB 기반 변환 작업 큐
+# =============================
+# - enqueue: convert_tasks에 PENDING 행 추가 + job.status=QUEUED
+# - claim: 조건부 UPDATE(compare-and-set)로 1개 워커만 lease 획득 → 프로세스 간에도 안전
+# - lease 만료(워커 다운/재시작) 시 다른 워커가 재수거, MAX_ATTEMPTS 초과 시 실패 처리
+# - job별 single-flight: 진행 중(PENDING/RUNNING) 작업이 있으면 새로 만들지 않고 합류
+#   (job 행을 먼저 UPDATE해 잠근 뒤 확인 → 동시 요청/다른 프로세스와도 하나만 생성)
+#   같은 job의 작업은 동시에 하나만 RUNNING
+# - admission control: 대기(PENDING) 작업이 QUEUE_MAX_PENDING 이상이면 새 작업 거절(QueueFull → 429)
+#   Retry-After = 대기 작업 수 × 평균 변환 시간 / 동시 실행 슬롯 (최근 실제 변환 기준)
+# - 전체 동시 실행 상한(MAX_RUNNING): claim 조건에 "실행 중 lease 수 < 상한"을 포함
+# - 스케줄링: 짧은 작업 먼저(SJF) + aging, 레인 2개(interactive=견적 / batch=변환)
+#   점수 = 예상 변환 시간(est_cost_s) + 레인 가산(batch) - AGING_PER_S × 대기 시간 → 낮은 것부터 claim
+#   (오래 기다린 큰 작업/배치 작업도 결국 앞으로 옴)
+
+LEASE_S = float(os.getenv("TASK_LEASE_S", "120"))
+MAX_ATTEMPTS = int(os.getenv("TASK_MAX_ATTEMPTS", "3"))
+
+# 대기열 상한(0이면 무제한) / 전체 동시 실행 상한(0이면 러너 스레드 수만큼)
+QUEUE_MAX_PENDING = int(os.getenv("QUEUE_MAX_PENDING", "32"))
+MAX_RUNNING = int(os.getenv("CONVERT_MAX_RUNNING", "0"))
+# 완료 이력이 없을 때 가정할 변환 시간(초), 평균 계산에 쓰는 최근 작업 수
+DEFAULT_CONVERT_S = float(os.getenv("CONVERT_DEFAULT_S", "30"))
+MEAN_WINDOW = int(os.getenv("CONVERT_MEAN_WINDOW", "50"))
+RETRY_AFTER_MAX_S = int(os.getenv("RETRY_AFTER_MAX_S", "600"))
+_MEAN_TTL_S = 10.0
+
+LANE_INTERACTIVE = "interactive"
+LANE_BATCH = "batch"
+# batch 레인 가산(초) / 대기 1초당 점수 감소 / claim 시 점수를 매길 오래된 후보 수
+BATCH_OFFSET_S = float(os.getenv("SCHED_BATCH_OFFSET_S", "120"))
+AGING_PER_S = float(os.getenv("SCHED_AGING_PER_S", "1.0"))
+SCHED_WINDOW = int(os.getenv("SCHED_WINDOW", "64"))
+# 이미 있는 형상/캐시를 재사용하는 작업의 예상 시간
+REUSE_COST_S = 0.5
+
+# 같은 프로세스 안에서 enqueue 즉시 러너를 깨우기 위한 이벤트
+wakeup = threading.Event()
+
+
+def _now() -> datetime:
+    return datetime.utcnow()
+
+
+class QueueFull(RuntimeError):
+    def __init__(self, depth: int, retry_after_s: int) -> None:
+        super().__init__(f"conversion queue is full ({depth} pending)")
+        self.depth = depth
+        self.retry_after_s = retry_after_s
+
+
+_mean_lock = threading.Lock()
+_mean_cache: Dict[str, float] = {"at": 0.0, "value": DEFAULT_CONVERT_S, "samples": 0}
+
+
+def mean_convert_s(db: Session) -> float:
+    """
+    최근 실제 변환(convert_s 기록된 작업) 평균 시간(초), 10초간 메모리 캐시
+    (캐시 적중/공유/형상 재사용으로 끝난 작업은 제외 — 포함하면 평균이 0에 가까워짐)
+    """
+    with _mean_lock:
+        if time.monotonic() - _mean_cache["at"] < _MEAN_TTL_S:
+            return _mean_cache["value"]
+
+    durations = [
+        max(0.0, float(v))
+        for v in db.execute(
+            select(ConvertTask.convert_s)
+            .where(ConvertTask.convert_s.is_not(None), ConvertTask.finished_at.is_not(None))
+            .order_by(ConvertTask.finished_at.desc())
+            .limit(MEAN_WINDOW)
+        ).scalars()
+    ]
+    value = sum(durations) / len(durations) if durations else DEFAULT_CONVERT_S
+
+    with _mean_lock:
+        _mean_cache.update(at=time.monotonic(), value=value, samples=len(durations))
+    return value
+
+
+def _slots(runner_threads: int) -> int:
+    return MAX_RUNNING if MAX_RUNNING > 0 else max(1, runner_threads)
+
+
+def _counts(db: Session) -> tuple[int, int]:
+    now = _now()
+    pending = db.execute(
+        select(func.count()).select_from(ConvertTask).where(ConvertTask.status == TaskStatus.PENDING)
+    ).scalar_one()
+    running = db.execute(
+        select(func.count())
+        .select_from(ConvertTask)
+        .where(ConvertTask.status == TaskStatus.RUNNING, ConvertTask.lease_expires_at >= now)
+    ).scalar_one()
+    return int(pending), int(running)
+
+
+def retry_after_s(depth: int, mean_s: float, slots: int) -> int:
+    # 지금 대기 중인 작업이 모두 빠질 때까지의 예상 시간
+    est = math.ceil(max(1, depth) * mean_s / max(1, slots))
+    return int(min(RETRY_AFTER_MAX_S, max(1, est)))
+
+
+def queue_stats(db: Session, runner_threads: int) -> Dict[str, Any]:
+    pending, running = _counts(db)
+    by_lane = db.execute(
+        select(ConvertTask.lane, ConvertTask.kind, func.count(), func.coalesce(func.sum(ConvertTask.est_cost_s), 0.0))
+        .where(ConvertTask.status == TaskStatus.PENDING)
+        .group_by(ConvertTask.lane, ConvertTask.kind)
+    ).all()
+    lanes: Dict[str, Dict[str, float]] = {
+        LANE_INTERACTIVE: {"pending": 0, "est_cost_s": 0.0},
+        LANE_BATCH: {"pending": 0, "est_cost_s": 0.0},
+    }
+    for lane, kind, n, est in by_lane:
+        d = lanes.setdefault(lane or lane_for(kind), {"pending": 0, "est_cost_s": 0.0})
+        d["pending"] += int(n)
+        d["est_cost_s"] = round(d["est_cost_s"] + float(est), 3)
+    mean_s = mean_convert_s(db)
+    slots = _slots(runner_threads)
+    full = QUEUE_MAX_PENDING > 0 and pending >= QUEUE_MAX_PENDING
+    return {
+        "pending": pending,
+        "running": running,
+        "max_pending": QUEUE_MAX_PENDING,
+        "max_running": MAX_RUNNING or None,
+        "slots": slots,
+        "mean_convert_s": round(mean_s, 3),
+        "mean_samples": int(_mean_cache["samples"]),
+        "saturated": full,
+        "retry_after_s": retry_after_s(pending, mean_s, slots) if full else 0,
+        "lanes": lanes,
+    }
+
+
+def _active_tasks(db: Session, job_id: str) -> list[ConvertTask]:
+    return list(
+        db.execute(
+            select(ConvertTask)
+            .where(
+                ConvertTask.job_id == job_id,
+                ConvertTask.status.in_((TaskStatus.PENDING, TaskStatus.RUNNING)),
+            )
+            .order_by(ConvertTask.created_at)
+        ).scalars().all()
+    )
+
+
+def has_active_task(db: Session, job_id: str) -> bool:
+    return bool(_active_tasks(db, job_id))
+
+
+def lane_for(kind: TaskKind) -> str:
+    return LANE_INTERACTIVE if kind == TaskKind.QUOTE else LANE_BATCH
+
+
+def enqueue(
+    db: Session,
+    job: Job,
+    kind: TaskKind,
+    runner_threads: int = 1,
+    est_cost_s: Optional[float] = None,
+) -> tuple[ConvertTask, bool]:
+    """
+    작업 추가 + job 상태 QUEUED (commit은 여기서 수행)
+    est_cost_s: 예상 변환 시간(없으면 DEFAULT_CONVERT_S) — claim 우선순위에 사용
+    Returns: (task, joined) — joined=True면 이미 진행 중인 작업에 합류(새 변환 없음)
+    Raises: QueueFull — 새 작업이 필요한데 대기열이 가득 참(합류는 항상 허용)
+    - 같은 종류 진행 중 → 합류
+    - START 진행 중에 QUOTE → 합류(START가 견적까지 계산)
+    - QUOTE 대기 중에 START → 대기 작업을 START로 승격(레인은 그대로 — 사용자가 견적을 기다리는 중)
+    - QUOTE 실행 중에 START → START 추가(QUOTE가 끝난 뒤 그 형상을 재사용)
+    """
+    # job 행 잠금(SQLite: 쓰기 락 / 그 외: 행 락) → 같은 job에 대한 동시 enqueue 직렬화
+    db.execute(update(Job).where(Job.id == job.id).values(updated_at=_now()))
+
+    active = _active_tasks(db, job.id)
+    for t in active:
+        if t.kind == kind or t.kind == TaskKind.START:
+            db.commit()
+            return t, True
+
+    if kind == TaskKind.START:
+        for t in active:
+            if t.status != TaskStatus.PENDING:
+                continue
+            res = db.execute(
+                update(ConvertTask)
+                .where(ConvertTask.id == t.id, ConvertTask.status == TaskStatus.PENDING)
+                .values(kind=TaskKind.START, updated_at=_now())
+            )
+            if res.rowcount == 1:
+                db.commit()
+                db.refresh(t)
+                events.emit(job.id, "state", status=JobStatus.QUEUED.value, kind=TaskKind.START.value)
+                wakeup.set()
+                return t, True
+
+    if QUEUE_MAX_PENDING > 0:
+        pending, _ = _counts(db)
+        if pending >= QUEUE_MAX_PENDING:
+            db.rollback()
+            raise QueueFull(pending, retry_after_s(pending, mean_convert_s(db), _slots(runner_threads)))
+
+    if active:
+        # 실행 중인 QUOTE의 형상을 재사용하므로 거의 비용 없음
+        est_cost_s = REUSE_COST_S
+
+    t = ConvertTask(
+        id=str(uuid.uuid4()),
+        job_id=job.id,
+        kind=kind,
+        status=TaskStatus.PENDING,
+        est_cost_s=est_cost_s,
+        lane=lane_for(kind),
+        attempts=0,
+        created_at=_now(),
+        updated_at=_now(),
+    )
+    db.add(t)
+
+    if not active:
+        job.status = JobStatus.QUEUED
+        job.error_message = None
+    job.updated_at = _now()
+    db.commit()
+    db.refresh(t)
+
+    if active:
+        # 실행 중인 QUOTE의 이벤트 스트림은 유지
+        events.emit(job.id, "state", status=JobStatus.QUEUED.value, kind=kind.value)
+    else:
+        # 진행 이벤트 로그는 실행 단위로 새로 시작
+        events.reset(job.id, "state", status=JobStatus.QUEUED.value, kind=kind.value)
+    wakeup.set()
+    return t, False
+
+
+def _claimable(now: datetime):
+    expired = and_(
+        ConvertTask.status == TaskStatus.RUNNING,
+        ConvertTask.lease_expires_at < now,
+        ConvertTask.attempts < MAX_ATTEMPTS,
+    )
+    # 같은 job의 다른 작업이 lease를 잡고 실행 중이면 대기
+    other = aliased(ConvertTask)
+    job_busy = exists().where(
+        other.job_id == ConvertTask.job_id,
+        other.id != ConvertTask.id,
+        other.status == TaskStatus.RUNNING,
+        other.lease_expires_at >= now,
+    )
+    cond = and_(or_(ConvertTask.status == TaskStatus.PENDING, expired), ~job_busy)
+    if MAX_RUNNING > 0:
+        # 전체 동시 실행 상한(다른 프로세스의 실행 중 작업 포함)
+        live = aliased(ConvertTask)
+        n_running = (
+            select(func.count())
+            .select_from(live)
+            .where(live.status == TaskStatus.RUNNING, live.lease_expires_at >= now)
+            .scalar_subquery()
+        )
+        cond = and_(cond, n_running < MAX_RUNNING)
+    return cond
+
+
+def schedule_score(est_cost_s: Optional[float], lane: Optional[str], kind: TaskKind, waited_s: float) -> float:
+    est = DEFAULT_CONVERT_S if est_cost_s is None else est_cost_s
+    offset = BATCH_OFFSET_S if (lane or lane_for(kind)) == LANE_BATCH else 0.0
+    return est + offset - AGING_PER_S * max(0.0, waited_s)
+
+
+def claim(db: Session, owner: str) -> Optional[ConvertTask]:
+    """
+    점수(schedule_score)가 가장 낮은 대기 작업(또는 lease 만료 작업) 1개를 lease와 함께 획득.
+    다른 워커와 경합하면 다음 후보로 넘어감.
+    """
+    now = _now()
+    rows = db.execute(
+        select(ConvertTask.id, ConvertTask.est_cost_s, ConvertTask.lane, ConvertTask.kind, ConvertTask.created_at)
+        .where(_claimable(now))
+        .order_by(ConvertTask.created_at)
+        .limit(SCHED_WINDOW)
+    ).all()
+    ranked = sorted(
+        rows,
+        key=lambda r: (schedule_score(r.est_cost_s, r.lane, r.kind, (now - r.created_at).total_seconds()), r.created_at),
+    )
+
+    for task_id in (r.id for r in ranked):
+        res = db.execute(
+            update(ConvertTask)
+            .where(ConvertTask.id == task_id, _claimable(now))
+            .values(
+                status=TaskStatus.RUNNING,
+                lease_owner=owner,
+                lease_expires_at=now + timedelta(seconds=LEASE_S),
+                attempts=ConvertTask.attempts + 1,
+                started_at=now,
+                updated_at=now,
+            )
+        )
+        db.commit()
+        if res.rowcount == 1:
+            return db.get(ConvertTask, task_id)
+    return None
+
+
+def heartbeat(db: Session, task_id: str, owner: str) -> bool:
+    """
+    lease 연장. 이미 다른 워커에게 넘어갔으면 False.
+    """
+    now = _now()
+    res = db.execute(
+        update(ConvertTask)
+        .where(
+            ConvertTask.id == task_id,
+            ConvertTask.lease_owner == owner,
+            ConvertTask.status == TaskStatus.RUNNING,
+        )
+        .values(lease_expires_at=now + timedelta(seconds=LEASE_S), updated_at=now)
+    )
+    db.commit()
+    return res.rowcount == 1
+
+
+def finish(db: Session, task: ConvertTask, error: Optional[str] = None) -> None:
+    """
+    작업 종료 기록(commit은 호출자가 job 갱신과 함께 수행)
+    """
+    now = _now()
+    task.status = TaskStatus.FAILED if error else TaskStatus.DONE
+    task.error_message = error
+    task.lease_expires_at = None
+    task.finished_at = now
+    task.updated_at = now
+
+
+def recover_expired(db: Session) -> int:
+    """
+    lease가 만료됐고 재시도 횟수도 소진된 작업 → FAILED + job ERROR
+    """
+    now = _now()
+    stuck = db.execute(
+        select(ConvertTask).where(
+            ConvertTask.status == TaskStatus.RUNNING,
+            ConvertTask.lease_expires_at < now,
+            ConvertTask.attempts >= MAX_ATTEMPTS,
+        )
+    ).scalars().all()
+
+    failed_jobs = []
+    for t in stuck:
+        msg = f"conversion abandoned after {t.attempts} attempts (lease expired)"
+        finish(db, t, error=msg)
+        job = db.get(Job, t.job_id)
+        if job is not None and job.status in (JobStatus.QUEUED, JobStatus.CONVERTING):
+            job.status = JobStatus.ERROR
+            job.error_message = msg
+            job.updated_at = now
+            failed_jobs.append((job.id, msg))
+    if stuck:
+        db.commit()
+    for job_id, msg in failed_jobs:
+        events.emit(job_id, "state", status=JobStatus.ERROR.value, error=msg)
+    return len(stuck)
@@ -1,4 +1,4 @@
-import io
+import asyncio
 import json
 import os
 import uuid
@@ -7,36 +7,38 @@ from datetime import datetime
 from typing import Any
 
 from fastapi import FastAPI, UploadFile, File, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response, StreamingResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
 from db import SessionLocal, init_db
-from models import Job, Vendor, Dispatch, JobStatus
+from models import Job, Vendor, Dispatch, JobStatus, TaskKind
 from schemas import (
     CreateJobIn,
     JobOut,
     QuoteOut,
     DispatchCreateIn,
+    UpdatePricingIn,
     ProcessQuoteOut,
 )
 from storage import (
     ensure_data_root,
-    source_path,
     cad_path,
     step_path,  # 호환용(남겨둠)
-    preview_svg_path,
-    dxf_path,
+    geometry_path,
 )
-from pricing import estimate_won, build_validation
-from worker import run_quote, run_convert
+import artifacts
+import convert_cache
+import convert_pool
+import downloads
+import events
+import jobqueue
+import preflight
+import uploads
+import pricing
+import worker
 from dispatcher import build_dispatch_payload, payload_to_json
 
-# 업로드 허용 확장자
-ALLOWED_EXTS = {".step", ".stp", ".igs", ".iges"}
-
-def get_ext(filename: str) -> str:
-    return os.path.splitext((filename or "").lower())[1]
-
 
 app = FastAPI(title="STEP / IGES → Laser DXF Converter API", version="4.3.0")
 
@@ -48,6 +50,12 @@ logger = logging.getLogger("uvicorn.error")
 # 또는 "http://141.164.49.94.sslip.io:8080"
 PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL")
 
+# SSE: 이벤트 로그 확인 주기 / keepalive 주기(초)
+SSE_POLL_S = float(os.getenv("SSE_POLL_S", "0.25"))
+SSE_KEEPALIVE_S = float(os.getenv("SSE_KEEPALIVE_S", "15"))
+# 가격 매트릭스 축(공정/재질/두께/수량)별 최대 길이 → 한 요청이 만드는 그리드 크기 상한
+PRICE_MATRIX_MAX_AXIS = int(os.getenv("PRICE_MATRIX_MAX_AXIS", "50"))
+
 # CORS (운영 시 도메인 제한 권장)
 app.add_middleware(
     CORSMiddleware,
@@ -57,6 +65,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 업로드: 본문을 받기 전에 Content-Length로 먼저 거절(multipart 경계/헤더 여유분 포함)
+_UPLOAD_OVERHEAD_BYTES = 64 * 1024
+
+@app.middleware("http")
+async def _reject_oversized_upload(request: Request, call_next):
+    if request.method == "POST" and request.url.path.endswith("/upload"):
+        try:
+            length = int(request.headers.get("content-length") or 0)
+        except ValueError:
+            length = 0
+        if length > uploads.UPLOAD_MAX_BYTES + _UPLOAD_OVERHEAD_BYTES:
+            return JSONResponse(
+                {"detail": f"file too large (max {uploads.UPLOAD_MAX_BYTES // (1024 * 1024)} MB)"},
+                status_code=413,
+            )
+    return await call_next(request)
+
 def now():
     return datetime.utcnow()
 
@@ -73,6 +98,17 @@ def _base_url(request: Request) -> str:
         return str(PUBLIC_BASE_URL).rstrip("/")
     return str(request.base_url).rstrip("/")
 
+_ARTIFACT_READY = (JobStatus.QUOTED, JobStatus.DONE)
+# 견적 단계(QUOTED)에서는 미리보기만 — 가공용 산출물(DXF/PDF)은 /start(결제) 이후 DONE에서만
+_PREVIEW_FORMATS = ("svg",)
+
+
+def _artifact_allowed(job: Job, fmt: str) -> bool:
+    if fmt in _PREVIEW_FORMATS:
+        return job.status in _ARTIFACT_READY
+    return job.status == JobStatus.DONE
+
+
 def job_to_out(job: Job, request: Request) -> JobOut:
     base_url = _base_url(request)
 
@@ -85,13 +121,17 @@ def job_to_out(job: Job, request: Request) -> JobOut:
 
     svg_url = None
     dxf_url = None
+    artifact_urls = None
 
-    # ✅ URL은 "파일 존재" 기준으로만 내려주기 (status와 분리)
-    if preview_svg_path(job.id).exists():
+    # ✅ 산출물은 요청 시 형상에서 생성 → 포맷별 파일 존재 확인 없이 status 기준으로 URL 제공
+    # (quoted/done이면 geometry.npz가 있음, quoted는 미리보기만)
+    if job.status in _ARTIFACT_READY:
+        artifact_urls = {
+            k: f"{base_url}/v1/jobs/{job.id}/artifacts/{k}" for k in artifacts.FORMATS if _artifact_allowed(job, k)
+        }
         svg_url = f"{base_url}/v1/jobs/{job.id}/preview.svg"
-
-    if dxf_path(job.id).exists():
-        dxf_url = f"{base_url}/v1/jobs/{job.id}/download/dxf"
+        if job.status == JobStatus.DONE:
+            dxf_url = f"{base_url}/v1/jobs/{job.id}/download/dxf"
 
     # quotes -> ProcessQuoteOut 리스트로 변환(있으면)
     quotes_out = None
@@ -116,18 +156,59 @@ def job_to_out(job: Job, request: Request) -> JobOut:
         metrics=metrics,
         validation=validation,
         error_message=getattr(job, "error_message", None),
+        preflight=_safe_json_load(getattr(job, "preflight_json", None), None),
         dxf_url=dxf_url,
         svg_url=svg_url,
+        artifacts=artifact_urls,
     )
 
 @app.on_event("startup")
 def _startup():
     ensure_data_root()
     init_db()
+    # ✅ 단가표 파일 검증/로드(잘못된 파일이면 기동 실패)
+    pricing.current_index()
+    # ✅ FreeCAD 워커 미리 기동(첫 요청에서 import 비용을 치르지 않도록)
+    convert_pool.get_pool()
+    # ✅ 큐 소비 러너(JOB_RUNNER_THREADS=0이면 별도 worker 프로세스가 처리)
+    worker.start_runners()
+
+@app.on_event("shutdown")
+def _shutdown():
+    worker.stop_runners()
+    convert_pool.shutdown_pool()
+
+def _queue_stats() -> dict:
+    db = SessionLocal()
+    try:
+        return jobqueue.queue_stats(db, worker.JOB_RUNNER_THREADS)
+    finally:
+        db.close()
+
 
 @app.get("/health")
 def health():
-    return {"ok": True}
+    return {
+        "ok": True,
+        "convert_cache": convert_cache.stats(),
+        "convert_pool": convert_pool.pool_stats(),
+        "rate_table": pricing.table_info(),
+        "queue": _queue_stats(),
+    }
+
+@app.get("/health/ready")
+def health_ready():
+    """
+    로드밸런서용: 변환 대기열이 가득 차면 503 + Retry-After (다른 노드로 우회)
+    """
+    q = _queue_stats()
+    if q["saturated"]:
+        return JSONResponse(
+            {"ok": False, "queue": q},
+            status_code=503,
+            headers={"Retry-After": str(q["retry_after_s"])},
+        )
+    return {"ok": True, "queue": q}
 
 @app.post("/v1/jobs", response_model=JobOut)
 def create_job(payload: CreateJobIn, request: Request):
@@ -170,6 +251,86 @@ def get_job(job_id: str, request: Request):
     finally:
         db.close()
 
+def _load_job_out(job_id: str, request: Request) -> dict | None:
+    db = SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        return job_to_out(job, request).model_dump() if job else None
+    finally:
+        db.close()
+
+def _has_active_task(job_id: str) -> bool:
+    db = SessionLocal()
+    try:
+        return jobqueue.has_active_task(db, job_id)
+    finally:
+        db.close()
+
+def _sse(event: str, data: Any, event_id: int | None = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.get("/v1/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """
+    SSE 진행 스트림: state(queued/converting/...) + stage(import, orientation, slice k/n,
+    projection, dxf_write, svg ...) 이벤트, 종료 시 최종 JobOut을 "job" 이벤트로 전송.
+    진행 중이 아니면 현재 JobOut만 보내고 종료.
+    """
+    db = SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        if not job:
+            raise HTTPException(404, "job not found")
+        active = job.status in (JobStatus.QUEUED, JobStatus.CONVERTING) or jobqueue.has_active_task(db, job_id)
+        snapshot = None if active else job_to_out(job, request).model_dump()
+    finally:
+        db.close()
+
+    try:
+        resume_after = int(request.headers.get("last-event-id") or 0)
+    except ValueError:
+        resume_after = 0
+
+    async def stream():
+        if snapshot is not None:
+            yield _sse("job", snapshot)
+            return
+
+        offset = 0
+        seq = 0
+        idle = 0.0
+        while True:
+            if await request.is_disconnected():
+                return
+
+            evts, offset = events.read_from(job_id, offset)
+            for e in evts:
+                seq += 1
+                if seq <= resume_after:
+                    continue
+                yield _sse(e.get("event") or "stage", e, event_id=seq)
+                if events.is_terminal(e):
+                    # QUOTE가 끝났어도 뒤에 START가 대기 중이면 그 진행까지 계속 전달
+                    if await run_in_threadpool(_has_active_task, job_id):
+                        continue
+                    final = await run_in_threadpool(_load_job_out, job_id, request)
+                    yield _sse("job", final)
+                    return
+
+            if evts:
+                idle = 0.0
+                continue
+
+            await asyncio.sleep(SSE_POLL_S)
+            idle += SSE_POLL_S
+            if idle >= SSE_KEEPALIVE_S:
+                idle = 0.0
+                yield ": keepalive\n\n"
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(stream(), media_type="text/event-stream", headers=headers)
+
 @app.post("/v1/jobs/{job_id}/upload", response_model=dict)
 async def upload_step(job_id: str, request: Request, step: UploadFile = File(...)):
     db = SessionLocal()
@@ -178,20 +339,42 @@ async def upload_step(job_id: str, request: Request, step: UploadFile = File(...
         if not job:
             raise HTTPException(404, "job not found")
 
-        ext = get_ext(step.filename)
-        if ext not in ALLOWED_EXTS:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Unsupported file type: {ext}. Allowed: {sorted(ALLOWED_EXTS)}",
-            )
+        # ✅ 변환 대기/진행 중에는 파일 교체 금지(진행 중인 작업이 새 파일의 결과로 합류되는 것 방지)
+        if jobqueue.has_active_task(db, job_id):
+            raise HTTPException(409, "conversion in progress for this job; retry after it finishes")
+
+        # ✅ 확장자 검사는 본문 복사 전에
+        try:
+            uploads.resolve_name(step.filename)
+        except uploads.UploadError as e:
+            raise HTTPException(e.status_code, e.detail)
+
+        # ✅ 청크 단위 저장 + sha256 + (gz/zip 해제) → 확장자에 맞는 파일명으로 atomic rename
+        # (블로킹 파일 I/O는 이벤트 루프 밖에서)
+        try:
+            saved = await run_in_threadpool(uploads.save_upload, step.file, step.filename, job_id)
+        except uploads.UploadError as e:
+            raise HTTPException(e.status_code, e.detail)
+        finally:
+            await step.close()
+
+        ext = saved["ext"]
+        p = saved["path"]
 
         # ✅ 포맷 기록
         job.input_format = "iges" if ext in {".igs", ".iges"} else "step"
-
-        # ✅ 확장자에 맞는 파일명으로 저장
-        p = source_path(job_id, ext)
-        data = await step.read()
-        p.write_bytes(data)
+        job.source_sha256 = saved["sha256"]
+        job.preflight_json = json.dumps(saved["preflight"], ensure_ascii=False)
+
+        # ✅ 이전 업로드로 만든 중간 형상/산출물/견적은 무효(재사용·재견적 방지)
+        geometry_path(job_id).unlink(missing_ok=True)
+        artifacts.invalidate(job_id)
+        job.metrics_json = None
+        job.validation_json = None
+        job.quotes_json = None
+        job.thickness_auto_mm = None
+        job.unit_won = None
+        job.total_won = None
 
         job.status = JobStatus.UPLOADED
         job.error_message = None
@@ -206,6 +389,10 @@ async def upload_step(job_id: str, request: Request, step: UploadFile = File(...
                     "filename": step.filename,
                     "format": job.input_format,
                     "saved_to": str(p),
+                    "archive": saved["archive"],
+                    "size": saved["size"],
+                    "sha256": saved["sha256"],
+                    "preflight": saved["preflight"],
                 }
             },
         }
@@ -221,258 +408,251 @@ def _ensure_processes_selected(job: Job) -> list[str]:
         raise HTTPException(status_code=400, detail="processes 형식이 올바르지 않습니다")
     return processes
 
-def _build_quotes_and_validation(
-    processes: list[str],
-    material: str,
-    used_th: float,
-    qty: int,
-    metrics: dict[str, Any],
-    auto_th: float,
-):
-    quotes_list: list[dict[str, Any]] = []
-    validation_map: dict[str, Any] = {}
-
-    for proc in processes:
-        if proc not in ("laser", "waterjet"):
-            continue
-
-        est = estimate_won(proc, material, used_th, qty, metrics)
-        quotes_list.append(est)
+def _queue_full(e: jobqueue.QueueFull) -> HTTPException:
+    logger.warning(f"[admission] rejected: {e} retry_after={e.retry_after_s}s")
+    return HTTPException(
+        429,
+        f"{e}; retry after {e.retry_after_s}s",
+        headers={"Retry-After": str(e.retry_after_s)},
+    )
 
-        validation_map[proc] = build_validation(
-            used_th,
-            auto_th if auto_th > 0 else None,
-            metrics,
-            proc,
-        )
+def _enqueue_conversion(db, job: Job, sp, kind: TaskKind) -> None:
+    # ✅ 사전 검사 없이 올라온(이전 버전) 업로드는 여기서 검사 — 한도 초과면 FreeCAD까지 가지 않음
+    if not job.preflight_json:
+        report = preflight.scan_file(sp)
+        job.preflight_json = json.dumps(report, ensure_ascii=False)
+        db.commit()
+    report = _safe_json_load(job.preflight_json, {}) or {}
+    problem = preflight.check(report, sp.suffix.lower())
+    if problem is not None:
+        raise HTTPException(*problem)
 
-    if not quotes_list:
-        # ✅ MVP: 여기까지 왔는데도 비면 기본 laser
-        est = estimate_won("laser", material, used_th, qty, metrics)
-        quotes_list = [est]
-        validation_map["laser"] = build_validation(
-            used_th,
-            auto_th if auto_th > 0 else None,
-            metrics,
-            "laser",
+    # ✅ 중복 클릭/재시도: 진행 중인 변환이 있으면 새로 돌리지 않고 합류
+    # ✅ 예상 변환 시간 → 스케줄러 우선순위(짧은 작업 먼저)
+    try:
+        task, joined = jobqueue.enqueue(
+            db, job, kind, worker.JOB_RUNNER_THREADS, est_cost_s=worker.task_cost_s(job, kind)
         )
+    except jobqueue.QueueFull as e:
+        # ✅ 과부하: 대기열이 가득 차면 변환을 받지 않고 재시도 시점 안내
+        raise _queue_full(e)
+    if joined:
+        logger.info(f"[{kind.value}] job={job.id} joined in-flight task={task.id} kind={task.kind.value}")
 
-    return quotes_list, validation_map
-
-@app.post("/v1/jobs/{job_id}/quote", response_model=QuoteOut)
+@app.post("/v1/jobs/{job_id}/quote", response_model=QuoteOut, status_code=202)
 def quote(job_id: str, request: Request):
+    """
+    견적 변환을 큐에 넣고 즉시 202 반환.
+    진행/결과는 GET /v1/jobs/{id} 의 status(queued → converting → quoted | error)로 확인.
+    """
     db = SessionLocal()
     try:
         job = db.get(Job, job_id)
         if not job:
             raise HTTPException(404, "job not found")
 
-        processes = _ensure_processes_selected(job)
+        _ensure_processes_selected(job)
 
         sp = cad_path(job_id)
         if not sp or not sp.exists():
             raise HTTPException(400, "CAD file not uploaded")
 
-        tmp_dxf = str(dxf_path(job_id)) + ".tmp"
-        result = run_quote(str(sp), tmp_dxf)
-
-        if not isinstance(result, dict):
-            job.status = JobStatus.ERROR
-            job.error_message = f"quote failed: worker returned {type(result).__name__}"
-            job.updated_at = now()
-            db.commit()
-            out = job_to_out(job, request)
-            return QuoteOut(status="error", job=out, quotes=[])
-
-        if result.get("status") != "ok":
-            job.status = JobStatus.ERROR
-            job.error_message = result.get("message") or "quote failed"
-            job.updated_at = now()
-            db.commit()
-            out = job_to_out(job, request)
-            return QuoteOut(status="error", job=out, quotes=[])
-
-        auto_th = float(result.get("thickness_mm", 0.0) or 0.0)
-        used_th = job.thickness_mm if job.thickness_mm and job.thickness_mm > 0 else auto_th
-
-        metrics = result.get("metrics") or {}
-
-        # SVG 저장
-        svg = result.get("svg") or ""
-        if svg:
-            preview_svg_path(job_id).write_text(svg, encoding="utf-8")
-
-        quotes_list, validation_map = _build_quotes_and_validation(
-            processes=processes,
-            material=job.material,
-            used_th=used_th,
-            qty=job.qty,
-            metrics=metrics,
-            auto_th=auto_th,
-        )
-
-        # 레거시 필드(unit/total)는 "첫번째 공정" 값을 대표로 채움(호환)
-        primary = quotes_list[0]
-        job.unit_won = int(primary["unit_won"])
-        job.total_won = int(primary["total_won"])
-
-        job.status = JobStatus.QUOTED
-        job.thickness_auto_mm = auto_th
-        job.metrics_json = json.dumps(metrics, ensure_ascii=False)
-        job.validation_json = json.dumps(validation_map, ensure_ascii=False)
-
-        if hasattr(job, "quotes_json"):
-            job.quotes_json = json.dumps(quotes_list, ensure_ascii=False)
-
-        job.error_message = None
-        job.updated_at = now()
-        db.commit()
+        _enqueue_conversion(db, job, sp, TaskKind.QUOTE)
         db.refresh(job)
 
-        out = job_to_out(job, request)
-        quotes_out = [ProcessQuoteOut(**q) for q in quotes_list]
-        return QuoteOut(status="ok", job=out, quotes=quotes_out)
+        return QuoteOut(status="queued", job=job_to_out(job, request), quotes=[])
     finally:
         db.close()
 
-@app.post("/v1/jobs/{job_id}/start", response_model=JobOut)
+@app.post("/v1/jobs/{job_id}/start", response_model=JobOut, status_code=202)
 def start_convert(job_id: str, request: Request):
+    """
+    DXF 변환을 큐에 넣고 즉시 202 반환.
+    진행/결과는 GET /v1/jobs/{id} 의 status(queued → converting → done | error)로 확인.
+    """
     db = SessionLocal()
     try:
         job = db.get(Job, job_id)
         if not job:
             raise HTTPException(404, "job not found")
 
-        processes = _ensure_processes_selected(job)
+        _ensure_processes_selected(job)
 
         sp = cad_path(job_id)
         if not sp or not sp.exists():
             raise HTTPException(400, "CAD file not uploaded")
 
-        tmp_dxf = str(dxf_path(job_id)) + ".tmp"
-        result = run_quote(str(sp), tmp_dxf)
-
-        if not isinstance(result, dict) or result.get("status") != "ok":
-            job.status = JobStatus.ERROR
-            job.error_message = (result.get("message") if isinstance(result, dict) else None) or "quote failed"
-            job.updated_at = now()
-            db.commit()
-            db.refresh(job)
-            return job_to_out(job, request)
-
-        svg = result.get("svg") or ""
-        if svg:
-            preview_svg_path(job_id).write_text(svg, encoding="utf-8")
-
-        auto_th = float(result.get("thickness_mm", 0.0) or 0.0)
-        used_th = job.thickness_mm if job.thickness_mm and job.thickness_mm > 0 else auto_th
-        metrics = result.get("metrics") or {}
-
-        quotes_list, validation_map = _build_quotes_and_validation(
-            processes=processes,
-            material=job.material,
-            used_th=used_th,
-            qty=job.qty,
-            metrics=metrics,
-            auto_th=auto_th,
-        )
+        _enqueue_conversion(db, job, sp, TaskKind.START)
+        db.refresh(job)
 
-        primary = quotes_list[0]
-        job.status = JobStatus.CONVERTING
-        job.thickness_auto_mm = auto_th
-        job.unit_won = int(primary["unit_won"])
-        job.total_won = int(primary["total_won"])
-        job.metrics_json = json.dumps(metrics, ensure_ascii=False)
-        job.validation_json = json.dumps(validation_map, ensure_ascii=False)
+        return job_to_out(job, request)
+    finally:
+        db.close()
 
-        if hasattr(job, "quotes_json"):
-            job.quotes_json = json.dumps(quotes_list, ensure_ascii=False)
+@app.patch("/v1/jobs/{job_id}/pricing", response_model=QuoteOut)
+def update_pricing(job_id: str, payload: UpdatePricingIn, request: Request):
+    """
+    재질/두께/수량/공정 변경 → 저장된 metrics_json + thickness_auto_mm로 즉시 재견적(CAD 재변환 없음).
+    - QUOTED일 때만 재견적, 아직 견적 전이면 값만 저장하고 status="pending"
+    - 변환 중 / 이미 시작(DONE)한 job은 409
+    """
+    db = SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        if not job:
+            raise HTTPException(404, "job not found")
 
-        job.error_message = None
+        if job.status in (JobStatus.QUEUED, JobStatus.CONVERTING):
+            raise HTTPException(409, "conversion in progress")
+        if job.status == JobStatus.DONE:
+            raise HTTPException(409, "job already started; pricing is locked")
+
+        if payload.processes is not None:
+            job.processes_json = json.dumps(payload.processes or ["laser"], ensure_ascii=False)
+        if payload.material is not None:
+            job.material = payload.material
+        if payload.thickness_mm is not None:
+            job.thickness_mm = payload.thickness_mm
+        if payload.qty is not None:
+            job.qty = payload.qty
         job.updated_at = now()
-        db.commit()
 
-        # =========================
-        # ✅ 요청 1: DXF 생성 시점/경로/존재 로그
-        # =========================
-        outp = dxf_path(job_id)
-        logger.info(f"[start] job={job_id} cad={str(sp)} dxf_target={str(outp)} exists_before={outp.exists()}")
+        metrics = _safe_json_load(job.metrics_json, None)
+        if job.status != JobStatus.QUOTED or not isinstance(metrics, dict):
+            db.commit()
+            return QuoteOut(status="pending", job=job_to_out(job, request), quotes=[])
 
-        conv = run_convert(str(sp), str(outp))
-        logger.info(f"[start] job={job_id} run_convert returned: {conv}")
+        quotes_list = worker.price_job(job, metrics, _ensure_processes_selected(job))
+        db.commit()
 
-        # run_convert 실패
-        if not isinstance(conv, dict) or conv.get("status") != "ok":
-            job.status = JobStatus.ERROR
-            job.error_message = (conv.get("message") if isinstance(conv, dict) else None) or "convert failed"
-            job.updated_at = now()
-            db.commit()
-            db.refresh(job)
-            return job_to_out(job, request)
+        return QuoteOut(
+            status="ok",
+            job=job_to_out(job, request),
+            quotes=[ProcessQuoteOut(**q) for q in quotes_list],
+        )
+    finally:
+        db.close()
 
-        # =========================
-        # ✅ 요청 2: DONE은 "DXF 파일 생성 성공" 이후에만
-        # =========================
-        if not outp.exists():
-            job.status = JobStatus.ERROR
-            job.error_message = f"convert ok but dxf missing at {str(outp)}"
-            job.updated_at = now()
-            db.commit()
-            db.refresh(job)
-            logger.error(f"[start] job={job_id} dxf missing after convert: {str(outp)}")
-            return job_to_out(job, request)
+def _csv_param(raw: str | None, cast, name: str, max_len: int | None = None) -> list | None:
+    if not raw:
+        return None
+    try:
+        values = [cast(v.strip()) for v in raw.split(",") if v.strip()]
+    except ValueError:
+        raise HTTPException(400, f"invalid {name}")
+    if max_len is not None and len(values) > max_len:
+        raise HTTPException(422, f"too many {name}: {len(values)} (max {max_len})")
+    return values
+
+@app.get("/v1/jobs/{job_id}/price-matrix", response_model=dict)
+def price_matrix(
+    job_id: str,
+    processes: str | None = None,
+    materials: str | None = None,
+    thicknesses: str | None = None,
+    qtys: str | None = None,
+):
+    """
+    공정 × 재질 × 두께 × 수량 견적 그리드(저장된 metrics 기준, 변환 없음).
+    쿼리: 쉼표 구분 목록(생략 시 단가표 전체 / 수량 1,5,10,30,100), 축마다 최대 PRICE_MATRIX_MAX_AXIS개
+    - PATCH /pricing과 같은 조건: QUOTED(견적 완료, 시작 전)일 때만
+    """
+    lim = PRICE_MATRIX_MAX_AXIS
+    procs = _csv_param(processes, str, "processes", lim)
+    if procs is not None:
+        known = pricing.current_index().processes
+        unknown = [p for p in procs if p not in known]
+        if unknown:
+            raise HTTPException(422, f"unknown processes: {', '.join(unknown)} (supported: {', '.join(known)})")
+    mats = _csv_param(materials, str, "materials", lim)
+    th = _csv_param(thicknesses, float, "thicknesses", lim)
+    qs = _csv_param(qtys, int, "qtys", lim)
 
-        size = outp.stat().st_size
-        logger.info(f"[start] job={job_id} dxf_created path={str(outp)} size={size}")
+    db = SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        if not job:
+            raise HTTPException(404, "job not found")
 
-        job.status = JobStatus.DONE
-        job.updated_at = now()
-        db.commit()
-        db.refresh(job)
-        return job_to_out(job, request)
+        if job.status in (JobStatus.QUEUED, JobStatus.CONVERTING):
+            raise HTTPException(409, "conversion in progress")
+        if job.status == JobStatus.DONE:
+            raise HTTPException(409, "job already started; pricing is locked")
+        metrics = _safe_json_load(job.metrics_json, None)
+        if job.status != JobStatus.QUOTED or not isinstance(metrics, dict):
+            raise HTTPException(409, "no metrics yet (run /quote first)")
 
+        if th is None and job.thickness_auto_mm and job.thickness_auto_mm > 0:
+            # 기본 그리드: 단가표 두께 + 자동 측정 두께
+            th = sorted(set(pricing.price_matrix_thicknesses()) | {float(job.thickness_auto_mm)})
+
+        matrix = pricing.price_matrix(
+            metrics,
+            processes=procs,
+            materials=mats,
+            thicknesses_mm=th,
+            qtys=qs,
+        )
+        return {"job_id": job.id, "thickness_auto_mm": job.thickness_auto_mm, "matrix": matrix}
     finally:
         db.close()
 
-@app.get("/v1/jobs/{job_id}/download/dxf")
-def download_dxf(job_id: str):
+@app.api_route("/v1/jobs/{job_id}/download/dxf", methods=["GET", "HEAD"])
+def download_dxf(job_id: str, request: Request):
     db = SessionLocal()
     try:
         job = db.get(Job, job_id)
         if not job:
             raise HTTPException(404, "job not found")
 
-        p = dxf_path(job_id)
-
         # =========================
-        # ✅ 요청 3(MVP): status 체크 제거
-        # "파일 존재"만으로 다운로드 허용
+        # ✅ DXF는 /start 이후(DONE)에만 — 견적 단계에서도 형상은 있지만 가공 파일은 내주지 않음
+        # (DONE이면 DXF가 아직 없어도 저장된 형상에서 바로 생성)
         # =========================
-        exists = p.exists()
-        logger.info(f"[download] job={job_id} dxf_path={str(p)} exists={exists} status={job.status.value}")
+        logger.info(f"[download] job={job_id} status={job.status.value}")
+        if not _artifact_allowed(job, "dxf"):
+            raise HTTPException(409, "dxf not available until the job is started")
+        return _serve_job_artifact(job_id, "dxf", request, download=True)
+    finally:
+        db.close()
 
-        if not exists:
-            raise HTTPException(409, "dxf not ready")
+@app.api_route("/v1/jobs/{job_id}/preview.svg", methods=["GET", "HEAD"])
+def preview_svg(job_id: str, request: Request):
+    # ✅ 프론트의 반복 조회는 대부분 304
+    return _serve_job_artifact(job_id, "svg", request, download=False)
 
-        data = p.read_bytes()
-        headers = {
-            "Content-Disposition": f'attachment; filename="{job_id}.dxf"',
-            "Cache-Control": "no-store",
-        }
-        return StreamingResponse(io.BytesIO(data), media_type="application/dxf", headers=headers)
+@app.api_route("/v1/jobs/{job_id}/artifacts/{fmt}", methods=["GET", "HEAD"])
+def download_artifact(job_id: str, fmt: str, request: Request):
+    if fmt not in artifacts.FORMATS:
+        raise HTTPException(404, f"unknown format: {fmt} (supported: {', '.join(artifacts.FORMATS)})")
+    db = SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        if not job:
+            raise HTTPException(404, "job not found")
+        if not _artifact_allowed(job, fmt):
+            raise HTTPException(409, f"{fmt} not available until the job is started")
     finally:
         db.close()
+    return _serve_job_artifact(job_id, fmt, request, download=fmt not in _PREVIEW_FORMATS)
 
-@app.get("/v1/jobs/{job_id}/preview.svg")
-def preview_svg(job_id: str):
-    p = preview_svg_path(job_id)
-    if not p.exists():
-        raise HTTPException(404, "preview not found")
-    return Response(
-        content=p.read_text(encoding="utf-8"),
-        media_type="image/svg+xml",
-        headers={"Cache-Control": "no-store"},
-    )
+
+def _serve_job_artifact(job_id: str, fmt: str, request: Request, download: bool):
+    """
+    첫 요청 때 저장된 형상에서 생성(동시 요청은 한 번만), 이후엔 캐시 파일을 그대로 전송
+    """
+    try:
+        p = artifacts.ensure(job_id, fmt)
+    except Exception as e:
+        logger.exception(f"[artifact] job={job_id} format={fmt} render failed")
+        raise HTTPException(500, f"{fmt} render failed: {type(e).__name__}: {e}")
+    if p is None:
+        raise HTTPException(409, f"{fmt} not ready")
+
+    spec = artifacts.FORMATS[fmt]
+    filename = f"{job_id}{spec.download_suffix}" if download else None
+    # ✅ ETag/304, Range, gzip/br, 파일 스트리밍(메모리에 전체 로드 없음)
+    return downloads.serve_artifact(request, p, spec.media_type, filename=filename)
 
 @app.post("/v1/vendors/seed", response_model=dict)
 def seed_vendor():
@@ -497,8 +677,8 @@ def create_dispatch(job_id: str, payload: DispatchCreateIn):
         if job.status != JobStatus.DONE:
             raise HTTPException(409, "job not ready for dispatch")
 
-        p = dxf_path(job_id)
-        if not p.exists():
+        p = artifacts.ensure_dxf(job_id)
+        if p is None:
             raise HTTPException(500, "dxf missing")
 
         quotes = _safe_json_load(getattr(job, "quotes_json", None), None)
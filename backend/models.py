@@ -21,6 +21,7 @@ from db import Base
 class JobStatus(str, Enum):
     CREATED = "created"
     UPLOADED = "uploaded"
+    QUEUED = "queued"
     QUOTED = "quoted"
     CONVERTING = "converting"
     DONE = "done"
@@ -40,6 +41,10 @@ class Job(Base):
 
     # 업로드 원본 포맷(step/iges)
     input_format = Column(String, nullable=True)
+    # 업로드 CAD 내용(압축 해제 후) sha256 — 변환 캐시 키에 재사용
+    source_sha256 = Column(String(64), nullable=True)
+    # 업로드 사전 검사 결과 JSON(엔티티 수, 예상 변환 시간 est_cost_s)
+    preflight_json = Column(Text, nullable=True)
 
     # ✅ 공정 선택 목록 JSON: '["laser","waterjet"]'
     processes_json = Column(Text, nullable=True)
@@ -66,6 +71,57 @@ class Job(Base):
 
     # relationships (선택)
     dispatches = relationship("Dispatch", back_populates="job", cascade="all, delete-orphan")
+    tasks = relationship("ConvertTask", back_populates="job", cascade="all, delete-orphan")
+
+
+class TaskKind(str, Enum):
+    QUOTE = "quote"
+    START = "start"
+
+
+class TaskStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class ConvertTask(Base):
+    """
+    변환 작업 큐(DB 기반, 외부 브로커 없음)
+    - 워커가 lease를 잡고 처리, lease 만료 시 다른 워커가 재수거
+    """
+    __tablename__ = "convert_tasks"
+
+    id = Column(String, primary_key=True, index=True)
+    job_id = Column(String, ForeignKey("jobs.id"), nullable=False, index=True)
+
+    kind = Column(SAEnum(TaskKind, name="task_kind", native_enum=False), nullable=False)
+    status = Column(
+        SAEnum(TaskStatus, name="task_status", native_enum=False),
+        nullable=False,
+        default=TaskStatus.PENDING,
+        index=True,
+    )
+
+    attempts = Column(Integer, nullable=False, default=0)
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+
+    error_message = Column(Text, nullable=True)
+
+    # 스케줄링: 예상 변환 시간(짧은 작업 먼저) + 레인(interactive=견적 / batch=변환)
+    est_cost_s = Column(Float, nullable=True)
+    lane = Column(String(16), nullable=True)
+    # 실제 FreeCAD 변환 시간(초) — 캐시 적중/공유/형상 재사용이면 NULL (평균 변환 시간 표본)
+    convert_s = Column(Float, nullable=True)
+
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    job = relationship("Job", back_populates="tasks")
 
 
 class Vendor(Base):
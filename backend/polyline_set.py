@@ -0,0 +1,136 @@
+from typing import Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+# =============================
+# 배열 기반 2D 폴리라인 묶음
+# =============================
+# - 모든 점을 하나의 연속 float64 버퍼(coords, (N,2))에 두고 offsets(M+1)로 구분
+# - polyline k = coords[offsets[k]:offsets[k+1]]
+# - 길이/부호 면적/bbox/중복점 제거를 점 단위 파이썬 루프 없이 벡터 연산으로 처리
+
+
+class PolylineSet:
+    __slots__ = ("coords", "offsets")
+
+    def __init__(self, coords: np.ndarray, offsets: np.ndarray) -> None:
+        self.coords = np.ascontiguousarray(coords, dtype=np.float64).reshape(-1, 2)
+        self.offsets = np.ascontiguousarray(offsets, dtype=np.int64)
+
+    @classmethod
+    def from_lists(cls, polylines: Sequence[Sequence[Tuple[float, float]]]) -> "PolylineSet":
+        if isinstance(polylines, PolylineSet):
+            return polylines
+        counts = [len(p) for p in polylines]
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        if counts:
+            np.cumsum(counts, out=offsets[1:])
+        if offsets[-1] == 0:
+            return cls(np.empty((0, 2)), offsets)
+        coords = np.array([pt for p in polylines for pt in p], dtype=np.float64)
+        return cls(coords, offsets)
+
+    def to_lists(self) -> List[List[Tuple[float, float]]]:
+        out: List[List[Tuple[float, float]]] = []
+        for a in self:
+            out.append([(x, y) for x, y in a.tolist()])
+        return out
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        c = self.coords
+        o = self.offsets.tolist()
+        for i in range(len(o) - 1):
+            yield c[o[i]:o[i + 1]]
+
+    def __getitem__(self, k: int) -> np.ndarray:
+        return self.coords[self.offsets[k]:self.offsets[k + 1]]
+
+    @property
+    def counts(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def _segment_sums(self, seg: np.ndarray) -> np.ndarray:
+        """
+        점 i→i+1 구간 값(seg, 길이 N-1)을 폴리라인별로 합산.
+        폴리라인 경계를 넘는 구간은 0으로 처리.
+        """
+        n = self.counts
+        out = np.zeros(len(n), dtype=np.float64)
+        valid = n >= 2
+        if not valid.any():
+            return out
+        seg = seg.copy()
+        ends = self.offsets[1:-1] - 1
+        seg[ends[(ends >= 0) & (ends < len(seg))]] = 0.0
+        out[valid] = np.add.reduceat(seg, self.offsets[:-1][valid])
+        return out
+
+    def lengths(self) -> np.ndarray:
+        if len(self.coords) < 2:
+            return np.zeros(len(self), dtype=np.float64)
+        d = np.diff(self.coords, axis=0)
+        return self._segment_sums(np.hypot(d[:, 0], d[:, 1]))
+
+    def signed_areas(self) -> np.ndarray:
+        """
+        슈레이스 부호 면적(열린 폴리라인도 끝→시작으로 닫아서 계산, 점 3개 미만은 0)
+        """
+        c = self.coords
+        out = np.zeros(len(self), dtype=np.float64)
+        if len(c) < 3:
+            return out
+        x, y = c[:, 0], c[:, 1]
+        cross = self._segment_sums(x[:-1] * y[1:] - x[1:] * y[:-1])
+
+        n = self.counts
+        valid = n >= 3
+        s = self.offsets[:-1][valid]
+        e = self.offsets[1:][valid] - 1
+        closing = x[e] * y[s] - x[s] * y[e]
+        out[valid] = 0.5 * (cross[valid] + closing)
+        return out
+
+    def closed_mask(self, tol: float = 1e-6) -> np.ndarray:
+        n = self.counts
+        out = np.zeros(len(n), dtype=bool)
+        valid = n >= 3
+        if not valid.any():
+            return out
+        first = self.coords[self.offsets[:-1][valid]]
+        last = self.coords[self.offsets[1:][valid] - 1]
+        out[valid] = np.all(np.abs(first - last) <= tol, axis=1)
+        return out
+
+    def bbox(self, min_points: int = 2) -> Tuple[float, float, float, float]:
+        """
+        (xmin, ymin, xmax, ymax) — 점 min_points개 미만인 폴리라인은 제외, 비면 0
+        """
+        small = self.counts < min_points
+        if small.any():
+            pts = self.coords[np.repeat(~small, self.counts)]
+        else:
+            pts = self.coords
+        if len(pts) == 0:
+            return 0.0, 0.0, 0.0, 0.0
+        # (N,2)에서 axis=0 축약보다 열 단위 축약이 훨씬 빠름
+        x, y = pts[:, 0], pts[:, 1]
+        return float(x.min()), float(y.min()), float(x.max()), float(y.max())
+
+    def deduped(self, tol: float = 1e-6) -> "PolylineSet":
+        """
+        연속 중복점 제거(직전 점과 x,y 모두 tol 이내면 제거, 각 폴리라인 첫 점은 유지)
+        """
+        c = self.coords
+        if len(c) == 0:
+            return self
+        keep = np.ones(len(c), dtype=bool)
+        if len(c) > 1:
+            keep[1:] = np.any(np.abs(np.diff(c, axis=0)) > tol, axis=1)
+        starts = self.offsets[:-1][self.counts > 0]
+        keep[starts] = True
+
+        kept_per_point = np.concatenate(([0], np.cumsum(keep)))
+        return PolylineSet(c[keep], kept_per_point[self.offsets])
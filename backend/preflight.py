@@ -0,0 +1,242 @@
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+# =============================
+# 업로드 사전 검사 (FreeCAD 없이)
+# =============================
+# - STEP: 헤더(FILE_SCHEMA/FILE_NAME) + 엔티티 타입별 개수 (#id=TYPE( … ); 단위로 스트리밍 파싱)
+# - IGES: 80컬럼 레코드의 73번째 컬럼(섹션) 기준, D(Directory) 섹션 엔트리(2줄 1개)의 타입 번호 집계
+# - 개수 → 예상 변환 시간(est_cost_s) → 스케줄러 우선순위(짧은 작업 먼저) + 한도 초과 파일 거절
+# - 업로드 저장 중 청크를 그대로 feed → 파일을 다시 읽지 않음
+
+# 예상 변환 시간 모델(초) — 면/스플라인 면/솔리드 수, 파일 크기에 선형
+COST_BASE_S = float(os.getenv("PREFLIGHT_BASE_S", "2.0"))
+COST_PER_FACE_S = float(os.getenv("PREFLIGHT_PER_FACE_S", "0.02"))
+COST_PER_BSPLINE_S = float(os.getenv("PREFLIGHT_PER_BSPLINE_S", "0.05"))
+COST_PER_SOLID_S = float(os.getenv("PREFLIGHT_PER_SOLID_S", "0.5"))
+COST_PER_MB_S = float(os.getenv("PREFLIGHT_PER_MB_S", "0.3"))
+
+# 한도(0이면 검사 안 함) → 넘으면 변환 전에 413
+MAX_FACES = int(os.getenv("PREFLIGHT_MAX_FACES", "50000"))
+MAX_SOLIDS = int(os.getenv("PREFLIGHT_MAX_SOLIDS", "500"))
+MAX_COST_S = float(os.getenv("PREFLIGHT_MAX_COST_S", "900"))
+
+_HEADER_BYTES = 64 * 1024
+_MAX_TAIL = 1024 * 1024  # 구분자 없이 계속되는 데이터(바이너리 등)는 버퍼에 쌓지 않음
+
+_STEP_MAGIC = b"ISO-10303-21"
+_STEP_SIMPLE = re.compile(rb"#\d+\s*=\s*([A-Z][A-Z0-9_]*)\s*\(")
+_STEP_COMPLEX = re.compile(rb"#\d+\s*=\s*\(([^;]*)")
+_STEP_SCHEMA = re.compile(rb"FILE_SCHEMA\s*\(\s*\(\s*'([^']*)'")
+_STEP_NAME = re.compile(rb"FILE_NAME\s*\(\s*'([^']*)'")
+
+_STEP_FACES = ("ADVANCED_FACE", "FACE_SURFACE")
+_STEP_SOLIDS = ("MANIFOLD_SOLID_BREP", "BREP_WITH_VOIDS")
+_STEP_ASSEMBLY = ("NEXT_ASSEMBLY_USAGE_OCCURRENCE",)
+
+# IGES 엔티티 타입 번호
+_IGES_FACES = (510, 144, 143)   # face / trimmed surface / bounded surface
+_IGES_BSPLINE = (128,)          # rational B-spline surface
+_IGES_SOLIDS = (186,)           # manifold solid B-rep object
+_IGES_ASSEMBLY = (408,)         # singular subfigure instance
+
+
+class Scanner:
+    """
+    청크 단위 feed → finish()로 보고서(dict). 형식은 내용으로 판별(STEP 매직 / IGES 섹션 컬럼).
+    """
+
+    def __init__(self) -> None:
+        self.bytes = 0
+        self.format: Optional[str] = None
+        self._head = b""
+        self._pending = b""  # 형식 판별 전까지 받은 데이터
+        self._tail = b""
+        self._types: Counter = Counter()
+        self._complex = 0
+        self._complex_bspline = 0
+        self._iges_sections: Counter = Counter()
+        self._iges_records = False
+        self._iges_d_index = 0
+
+    # ---------- 입력 ----------
+    def feed(self, data: bytes) -> None:
+        if not data:
+            return
+        self.bytes += len(data)
+        if len(self._head) < _HEADER_BYTES:
+            self._head += data[: _HEADER_BYTES - len(self._head)]
+        if self.format is None:
+            self._pending += data
+            self._sniff(final=False)
+            if self.format is None:
+                return
+            data, self._pending = self._pending, b""
+        self._process(data)
+
+    def _sniff(self, final: bool) -> None:
+        head = self._head
+        if _STEP_MAGIC in head[:1024]:
+            self.format = "step"
+            return
+        # IGES: 첫 줄 73번째 컬럼이 'S'(Start), 줄바꿈이 없으면 80바이트 고정 레코드
+        if len(head) >= 80:
+            nl = head.find(b"\n")
+            if nl < 0 and len(head) < 83 and not final:
+                # 80컬럼 뒤 줄바꿈(CR LF 포함)이 아직 안 들어왔을 수 있음 → 더 받고 판별
+                return
+            first = head[:nl] if nl >= 0 else head[:80]
+            if len(first.rstrip(b"\r")) >= 73 and first[72:73] == b"S":
+                self.format = "iges"
+                self._iges_records = nl < 0 or nl > 82
+                return
+        if final or len(head) >= _HEADER_BYTES:
+            self.format = "unknown"
+
+    def _process(self, data: bytes) -> None:
+        if self.format == "step":
+            self._feed_step(data)
+        elif self.format == "iges":
+            self._feed_iges(data)
+
+    # ---------- STEP ----------
+    def _feed_step(self, data: bytes) -> None:
+        buf = self._tail + data
+        cut = buf.rfind(b";")
+        if cut < 0:
+            self._tail = buf if len(buf) <= _MAX_TAIL else b""
+            return
+        self._tail = buf[cut + 1:]
+        if len(self._tail) > _MAX_TAIL:
+            self._tail = b""
+        self._step_block(buf[: cut + 1])
+
+    def _step_block(self, block: bytes) -> None:
+        self._types.update(_STEP_SIMPLE.findall(block))
+        for body in _STEP_COMPLEX.findall(block):
+            self._complex += 1
+            if b"B_SPLINE_SURFACE" in body:
+                self._complex_bspline += 1
+
+    # ---------- IGES ----------
+    def _feed_iges(self, data: bytes) -> None:
+        buf = self._tail + data
+        if self._iges_records:
+            cut = len(buf) - len(buf) % 80
+            lines = [buf[i:i + 80] for i in range(0, cut, 80)]
+        else:
+            cut = buf.rfind(b"\n") + 1
+            lines = buf[:cut].split(b"\n")
+        self._tail = buf[cut:]
+        if len(self._tail) > _MAX_TAIL:
+            self._tail = b""
+        for line in lines:
+            line = line.rstrip(b"\r")
+            if len(line) < 73:
+                continue
+            sec = line[72:73]
+            self._iges_sections[sec] += 1
+            if sec == b"D":
+                # D 엔트리는 2줄 1개, 첫 줄 1~8컬럼 = 엔티티 타입 번호
+                if self._iges_d_index % 2 == 0:
+                    try:
+                        self._types[int(line[0:8])] += 1
+                    except ValueError:
+                        pass
+                self._iges_d_index += 1
+
+    # ---------- 결과 ----------
+    def finish(self) -> Dict[str, Any]:
+        if self.format is None:
+            self._sniff(final=True)
+            pending, self._pending = self._pending, b""
+            self._process(pending)
+        if self._tail:
+            tail, self._tail = self._tail, b""
+            if self.format == "step":
+                self._step_block(tail)
+            elif self.format == "iges":
+                self._feed_iges(tail + b"\n")
+
+        fmt = self.format if self.format in ("step", "iges") else "unknown"
+        report: Dict[str, Any] = {"format": fmt, "bytes": self.bytes}
+        t = self._types
+
+        if fmt == "step":
+            m = _STEP_SCHEMA.search(self._head)
+            n = _STEP_NAME.search(self._head)
+            bspline = sum(c for k, c in t.items() if k.startswith((b"B_SPLINE_SURFACE", b"RATIONAL_B_SPLINE_SURFACE")))
+            report.update(
+                schema=m.group(1).decode("latin-1").strip() if m else None,
+                name=n.group(1).decode("latin-1").strip() if n else None,
+                entities=sum(t.values()) + self._complex,
+                faces=sum(t[k.encode()] for k in _STEP_FACES),
+                bspline_surfaces=bspline + self._complex_bspline,
+                solids=sum(t[k.encode()] for k in _STEP_SOLIDS),
+                assembly_links=sum(t[k.encode()] for k in _STEP_ASSEMBLY),
+                valid=sum(t.values()) + self._complex > 0,
+            )
+        elif fmt == "iges":
+            s = self._iges_sections
+            report.update(
+                schema="IGES",
+                name=None,
+                entities=self._iges_d_index // 2,
+                faces=sum(t[k] for k in _IGES_FACES),
+                bspline_surfaces=sum(t[k] for k in _IGES_BSPLINE),
+                solids=sum(t[k] for k in _IGES_SOLIDS),
+                assembly_links=sum(t[k] for k in _IGES_ASSEMBLY),
+                valid=s[b"D"] > 0 and s[b"P"] > 0,
+            )
+        else:
+            report.update(valid=False)
+
+        report["est_cost_s"] = round(estimate_s(report), 3)
+        return report
+
+
+def estimate_s(report: Dict[str, Any]) -> float:
+    return (
+        COST_BASE_S
+        + COST_PER_FACE_S * report.get("faces", 0)
+        + COST_PER_BSPLINE_S * report.get("bspline_surfaces", 0)
+        + COST_PER_SOLID_S * report.get("solids", 0)
+        + COST_PER_MB_S * report.get("bytes", 0) / (1024 * 1024)
+    )
+
+
+def scan_file(path: Path, chunk: int = 1024 * 1024) -> Dict[str, Any]:
+    """
+    저장된 파일 검사(사전 검사 없이 올라온 이전 업로드용)
+    """
+    sc = Scanner()
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(chunk)
+            if not data:
+                break
+            sc.feed(data)
+    return sc.finish()
+
+
+def check(report: Dict[str, Any], ext: Optional[str] = None) -> Optional[Tuple[int, str]]:
+    """
+    거절 사유 (status_code, detail), 통과면 None
+    """
+    fmt = report.get("format")
+    if fmt == "unknown" or not report.get("valid"):
+        return 400, "not a STEP/IGES file (header/entity section not found)"
+    if ext:
+        expected = "iges" if ext in (".igs", ".iges") else "step"
+        if fmt != expected:
+            return 400, f"file content is {fmt.upper()} but extension is {ext}"
+    if MAX_FACES > 0 and report.get("faces", 0) > MAX_FACES:
+        return 413, f"model too complex: {report['faces']} faces (max {MAX_FACES})"
+    if MAX_SOLIDS > 0 and report.get("solids", 0) > MAX_SOLIDS:
+        return 413, f"model too complex: {report['solids']} solids (max {MAX_SOLIDS})"
+    if MAX_COST_S > 0 and report.get("est_cost_s", 0) > MAX_COST_S:
+        return 413, f"estimated conversion time {report['est_cost_s']:.0f}s exceeds limit ({MAX_COST_S:.0f}s)"
+    return None
@@ -1,101 +1,219 @@
 from __future__ import annotations
 
-from typing import Dict, Any, List, Optional, Literal
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional, Literal, Sequence, Tuple
+import bisect
+import json
+import logging
 import math
 import os
+import threading
+import time
+
+import numpy as np
 
 ProcessKey = Literal["laser", "waterjet"]
 
+logger = logging.getLogger("uvicorn.error")
+
 # =============================
-# 1) 두께별 단가표 (가공비)
+# 1) 단가표 / 소재 DB (데이터 파일)
 # =============================
-# 단위:
-# - base_fee: 원
-# - cut_per_mm: 원/mm
-# - pierce_per_loop: 원/loop(윤곽/홀 1개)
-# - area_per_mm2: 원/mm^2 (필요 없으면 0)
+# rates.json (RATE_TABLE_PATH로 변경 가능)
+# - version: 견적 factors에 기록(어느 단가표로 계산했는지 추적)
+# - rate_table: 공정 → 재질 → 두께(mm, 문자열 키) → 가공 단가 행
+#     base_fee: 원 / cut_per_mm: 원/mm / pierce_per_loop: 원/loop(윤곽/홀 1개)
+#     area_per_mm2: 원/mm^2 (필요 없으면 0) / min_unit: 원
+# - material_db: 재질 → density_kg_m3, price_per_kg_won(원/kg), min_material_won
+# - aliases: 재질 별칭 → 재질 키
 #
-# ✅ 여기 숫자만 "현장 단가"로 채우면 됨.
-RATE_TABLE: Dict[ProcessKey, Dict[str, Dict[float, Dict[str, float]]]] = {
-    "laser": {
-        "steel": {
-            1.0: {"base_fee": 7000, "cut_per_mm": 100, "pierce_per_loop": 250, "area_per_mm2": 0.0, "min_unit": 12000},
-            2.0: {"base_fee": 7000, "cut_per_mm": 120, "pierce_per_loop": 280, "area_per_mm2": 0.0, "min_unit": 12000},
-            3.0: {"base_fee": 7000, "cut_per_mm": 140, "pierce_per_loop": 310, "area_per_mm2": 0.0, "min_unit": 13000},
-            4.0: {"base_fee": 8000, "cut_per_mm": 170, "pierce_per_loop": 360, "area_per_mm2": 0.0, "min_unit": 15000},
-            5.0: {"base_fee": 9000, "cut_per_mm": 210, "pierce_per_loop": 420, "area_per_mm2": 0.0, "min_unit": 17000},
-            6.0: {"base_fee": 10000, "cut_per_mm": 260, "pierce_per_loop": 480, "area_per_mm2": 0.0, "min_unit": 19000},
-            8.0: {"base_fee": 12000, "cut_per_mm": 340, "pierce_per_loop": 600, "area_per_mm2": 0.0, "min_unit": 23000},
-            10.0: {"base_fee": 14000, "cut_per_mm": 430, "pierce_per_loop": 760, "area_per_mm2": 0.0, "min_unit": 28000},
-            12.0: {"base_fee": 16000, "cut_per_mm": 520, "pierce_per_loop": 920, "area_per_mm2": 0.0, "min_unit": 33000},
-        },
-        "stainless": {
-            1.0: {"base_fee": 9000, "cut_per_mm": 130, "pierce_per_loop": 320, "area_per_mm2": 0.0, "min_unit": 15000},
-            2.0: {"base_fee": 9000, "cut_per_mm": 155, "pierce_per_loop": 360, "area_per_mm2": 0.0, "min_unit": 15000},
-            3.0: {"base_fee": 9000, "cut_per_mm": 185, "pierce_per_loop": 410, "area_per_mm2": 0.0, "min_unit": 16000},
-            4.0: {"base_fee": 10500, "cut_per_mm": 225, "pierce_per_loop": 480, "area_per_mm2": 0.0, "min_unit": 19000},
-            6.0: {"base_fee": 12500, "cut_per_mm": 340, "pierce_per_loop": 650, "area_per_mm2": 0.0, "min_unit": 24000},
-            8.0: {"base_fee": 14500, "cut_per_mm": 450, "pierce_per_loop": 820, "area_per_mm2": 0.0, "min_unit": 30000},
-        },
-        "aluminum": {
-            1.0: {"base_fee": 7000, "cut_per_mm": 110, "pierce_per_loop": 260, "area_per_mm2": 0.0, "min_unit": 12000},
-            2.0: {"base_fee": 7000, "cut_per_mm": 130, "pierce_per_loop": 290, "area_per_mm2": 0.0, "min_unit": 12000},
-            3.0: {"base_fee": 7000, "cut_per_mm": 150, "pierce_per_loop": 330, "area_per_mm2": 0.0, "min_unit": 13000},
-        },
-        "acrylic": {
-            3.0: {"base_fee": 6000, "cut_per_mm": 60, "pierce_per_loop": 200, "area_per_mm2": 0.0, "min_unit": 10000},
-        },
-    },
-
-    "waterjet": {
-        "steel": {
-            1.0: {"base_fee": 11000, "cut_per_mm": 140, "pierce_per_loop": 180, "area_per_mm2": 0.0, "min_unit": 16000},
-            2.0: {"base_fee": 11000, "cut_per_mm": 160, "pierce_per_loop": 190, "area_per_mm2": 0.0, "min_unit": 17000},
-            3.0: {"base_fee": 11000, "cut_per_mm": 180, "pierce_per_loop": 200, "area_per_mm2": 0.0, "min_unit": 18000},
-            4.0: {"base_fee": 12000, "cut_per_mm": 210, "pierce_per_loop": 220, "area_per_mm2": 0.0, "min_unit": 20000},
-            6.0: {"base_fee": 13000, "cut_per_mm": 270, "pierce_per_loop": 260, "area_per_mm2": 0.0, "min_unit": 24000},
-            8.0: {"base_fee": 14000, "cut_per_mm": 330, "pierce_per_loop": 300, "area_per_mm2": 0.0, "min_unit": 28000},
-            10.0: {"base_fee": 15500, "cut_per_mm": 400, "pierce_per_loop": 340, "area_per_mm2": 0.0, "min_unit": 32000},
-            12.0: {"base_fee": 17000, "cut_per_mm": 470, "pierce_per_loop": 390, "area_per_mm2": 0.0, "min_unit": 36000},
-        },
-        "stainless": {
-            6.0: {"base_fee": 15000, "cut_per_mm": 320, "pierce_per_loop": 300, "area_per_mm2": 0.0, "min_unit": 28000},
-        },
-    },
-}
+# ✅ 파일 숫자만 "현장 단가"로 고치면 재시작 없이 반영
+#    (mtime/size 변경 감지 → 새 인덱스를 완성한 뒤 참조 1개를 교체, 파싱 실패 시 이전 버전 유지)
+#    파일은 임시 파일에 쓰고 rename으로 교체 권장
+
+RATE_TABLE_PATH = os.getenv("RATE_TABLE_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "rates.json"
+)
+RATE_RELOAD_CHECK_S = float(os.getenv("RATE_RELOAD_CHECK_S", "2.0"))
 
 DEFAULT_MATERIAL = "steel"
 DEFAULT_PROCESS: ProcessKey = "laser"
 
-# =============================
-# 1-B) 소재비: 무게(kg) 기반
-# =============================
-# density: kg/m^3, price_per_kg_won: 원/kg
-# ✅ 여기 price_per_kg_won만 현장 단가로 바꾸면 됨.
-MATERIAL_DB: Dict[str, Dict[str, float]] = {
-    "steel": {"density_kg_m3": 7850.0, "price_per_kg_won": 2500.0, "min_material_won": 800.0},
-    "stainless": {"density_kg_m3": 8000.0, "price_per_kg_won": 9000.0, "min_material_won": 1500.0},
-    "aluminum": {"density_kg_m3": 2700.0, "price_per_kg_won": 6500.0, "min_material_won": 1000.0},
-    "acrylic": {"density_kg_m3": 1180.0, "price_per_kg_won": 4500.0, "min_material_won": 800.0},
-}
-
 # 환경변수로 쉽게 조절 가능(없으면 기본값 사용)
 DEFAULT_SCRAP_FACTOR = float(os.getenv("MATERIAL_SCRAP_FACTOR", "1.15"))  # 바운딩박스 + 스크랩 여유
 
+_RATE_COLS = ("base_fee", "cut_per_mm", "pierce_per_loop", "area_per_mm2", "min_unit")
+
+
+@dataclass(frozen=True)
+class RateIndex:
+    """
+    불변 단가 인덱스: 로드 시 1회 구성(두께 정렬/별칭 정규화/배열 컴파일), 조회는 읽기만
+    """
 
-def _normalize_material_key(material: str) -> str:
-    k = (material or DEFAULT_MATERIAL).strip().lower()
-    # alias 처리(필요하면 추가)
-    alias = {
-        "ss304": "stainless",
-        "sus304": "stainless",
-        "al6061": "aluminum",
-        "al5052": "aluminum",
+    version: str
+    path: str
+    mtime_ns: int
+    size: int
+    loaded_at: float
+    processes: Tuple[str, ...]
+    materials: Tuple[str, ...]
+    aliases: Mapping[str, str]                                 # 소문자 별칭/키 → 재질 키
+    material_db: Mapping[str, Mapping[str, float]]
+    keys: Mapping[Tuple[str, str], Tuple[float, ...]]          # (공정, 재질) → 정렬된 두께
+    rows: Mapping[Tuple[str, str], Tuple[Mapping[str, float], ...]]
+    rate_material: Mapping[Tuple[str, str], str]               # 폴백 반영된 실제 표 재질
+    compiled: Mapping[str, Any]                                # 가격 매트릭스용 배열
+
+
+def _frozen_array(values, dtype=np.float64) -> np.ndarray:
+    a = np.array(values, dtype=dtype)
+    a.flags.writeable = False
+    return a
+
+
+def _build_index(doc: Dict[str, Any], path: str, mtime_ns: int, size: int) -> RateIndex:
+    version = str(doc.get("version") or "").strip()
+    if not version:
+        raise ValueError("rate table: version is required")
+
+    material_db: Dict[str, Mapping[str, float]] = {}
+    for mat, spec in (doc.get("material_db") or {}).items():
+        material_db[str(mat).lower()] = MappingProxyType({k: float(v) for k, v in spec.items()})
+    if DEFAULT_MATERIAL not in material_db:
+        raise ValueError(f"rate table: material_db must contain '{DEFAULT_MATERIAL}'")
+
+    aliases = {m: m for m in material_db}
+    for alias, mat in (doc.get("aliases") or {}).items():
+        mat = str(mat).lower()
+        if mat not in material_db:
+            raise ValueError(f"rate table: alias {alias!r} → unknown material {mat!r}")
+        aliases[str(alias).strip().lower()] = mat
+
+    rate_table = doc.get("rate_table") or {}
+    if DEFAULT_PROCESS not in rate_table:
+        raise ValueError(f"rate table: rate_table must contain '{DEFAULT_PROCESS}'")
+
+    keys: Dict[Tuple[str, str], Tuple[float, ...]] = {}
+    rows: Dict[Tuple[str, str], Tuple[Mapping[str, float], ...]] = {}
+    rate_material: Dict[Tuple[str, str], str] = {}
+    for proc, proc_table in rate_table.items():
+        proc_table = {str(m).lower(): t for m, t in (proc_table or {}).items()}
+        for mat in material_db:
+            # 해당 재질 표가 없으면 기본 재질 표
+            src = mat if proc_table.get(mat) else DEFAULT_MATERIAL
+            mat_table = proc_table.get(src)
+            if not mat_table:
+                continue
+            pairs = sorted((float(t), row) for t, row in mat_table.items())
+            keys[(proc, mat)] = tuple(t for t, _ in pairs)
+            rows[(proc, mat)] = tuple(
+                MappingProxyType({c: float(row.get(c, 0.0)) for c in _RATE_COLS}) for _, row in pairs
+            )
+            rate_material[(proc, mat)] = src
+
+    mats = tuple(material_db.keys())
+    compiled = {
+        "rates": MappingProxyType(
+            {
+                k: {
+                    "keys": _frozen_array(keys[k]),
+                    "rows": _frozen_array([[r[c] for c in _RATE_COLS] for r in rows[k]]),
+                    "source": rate_material[k],
+                }
+                for k in keys
+            }
+        ),
+        "density": _frozen_array([material_db[m]["density_kg_m3"] for m in mats]),
+        "price_per_kg": _frozen_array([material_db[m]["price_per_kg_won"] for m in mats]),
+        "min_material": _frozen_array([material_db[m].get("min_material_won", 0.0) for m in mats]),
+        "thicknesses": tuple(sorted({t for ks in keys.values() for t in ks})),
     }
-    k = alias.get(k, k)
-    if k not in MATERIAL_DB:
-        return DEFAULT_MATERIAL
-    return k
+
+    return RateIndex(
+        version=version,
+        path=path,
+        mtime_ns=mtime_ns,
+        size=size,
+        loaded_at=time.time(),
+        processes=tuple(rate_table.keys()),
+        materials=mats,
+        aliases=MappingProxyType(aliases),
+        material_db=MappingProxyType(material_db),
+        keys=MappingProxyType(keys),
+        rows=MappingProxyType(rows),
+        rate_material=MappingProxyType(rate_material),
+        compiled=MappingProxyType(compiled),
+    )
+
+
+def load_index(path: str = RATE_TABLE_PATH) -> RateIndex:
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        doc = json.loads(f.read().decode("utf-8"))
+    return _build_index(doc, path, st.st_mtime_ns, st.st_size)
+
+
+_index: Optional[RateIndex] = None
+_index_lock = threading.Lock()
+_next_check = 0.0
+
+
+def current_index() -> RateIndex:
+    """
+    활성 단가 인덱스. RATE_RELOAD_CHECK_S마다 파일 stat만 확인하고, 바뀌었으면 새로 로드해 교체.
+    (교체는 참조 대입 1번 → 읽는 쪽은 항상 완성된 인덱스 하나만 봄)
+    """
+    global _index, _next_check
+    idx = _index
+    if idx is not None and time.monotonic() < _next_check:
+        return idx
+
+    with _index_lock:
+        if _index is not None and time.monotonic() < _next_check:
+            return _index
+        _next_check = time.monotonic() + RATE_RELOAD_CHECK_S
+
+        try:
+            st = os.stat(RATE_TABLE_PATH)
+        except OSError as e:
+            if _index is None:
+                raise
+            logger.warning(f"[pricing] rate table stat failed, keeping version={_index.version}: {e}")
+            return _index
+
+        if _index is not None and (st.st_mtime_ns, st.st_size) == (_index.mtime_ns, _index.size):
+            return _index
+
+        try:
+            new = load_index(RATE_TABLE_PATH)
+        except Exception as e:
+            if _index is None:
+                raise
+            logger.error(f"[pricing] rate table reload failed, keeping version={_index.version}: {e}")
+            return _index
+
+        if _index is None or new.version != _index.version:
+            logger.info(f"[pricing] rate table loaded version={new.version} path={new.path}")
+        _index = new
+        return _index
+
+
+def table_info() -> Dict[str, Any]:
+    idx = current_index()
+    return {
+        "version": idx.version,
+        "path": idx.path,
+        "loaded_at": idx.loaded_at,
+        "processes": list(idx.processes),
+        "materials": list(idx.materials),
+    }
+
+
+def _normalize_material_key(material: str, idx: Optional[RateIndex] = None) -> str:
+    idx = idx or current_index()
+    return idx.aliases.get((material or DEFAULT_MATERIAL).strip().lower(), DEFAULT_MATERIAL)
 
 
 def _material_cost_from_bbox_weight(
@@ -105,9 +223,11 @@ def _material_cost_from_bbox_weight(
     bbox_h_mm: float,
     thickness_mm: float,
     scrap_factor: float,
+    idx: Optional[RateIndex] = None,
 ) -> Dict[str, Any]:
-    mk = _normalize_material_key(material_key)
-    spec = MATERIAL_DB.get(mk) or MATERIAL_DB[DEFAULT_MATERIAL]
+    idx = idx or current_index()
+    mk = _normalize_material_key(material_key, idx)
+    spec = idx.material_db[mk]
 
     density = float(spec["density_kg_m3"])
     price_per_kg = float(spec["price_per_kg_won"])
@@ -150,86 +270,68 @@ def _clamp(x: float, lo: float, hi: float) -> float:
     return max(lo, min(hi, x))
 
 
-def _sorted_keys(d: Dict[float, Any]) -> List[float]:
-    return sorted(float(k) for k in d.keys())
-
-
-def _nearest_key(x: float, keys: List[float]) -> float:
-    best = keys[0]
-    best_dist = abs(x - best)
-    for k in keys[1:]:
-        dist = abs(x - k)
-        if dist < best_dist:
-            best = k
-            best_dist = dist
-    return best
-
-
 def _lerp(a: float, b: float, t: float) -> float:
     return a + (b - a) * t
 
 
-def _get_rate_row(process: ProcessKey, material: str, thickness_mm: float) -> Dict[str, float]:
-    proc_table = RATE_TABLE.get(process) or RATE_TABLE[DEFAULT_PROCESS]
-    mat_key = _normalize_material_key(material)
-    mat_table = proc_table.get(mat_key) or proc_table.get(DEFAULT_MATERIAL)
-
-    if not mat_table:
+def _get_rate_row(
+    process: ProcessKey,
+    material: str,
+    thickness_mm: float,
+    idx: Optional[RateIndex] = None,
+) -> Tuple[Mapping[str, float], Optional[float], Optional[List[float]]]:
+    """
+    Returns: (단가 행(읽기 전용), 선택 두께(표 두께와 정확히 일치하면 None), lerp 구간)
+    두께 조회는 정렬된 키에 bisect → O(log n)
+    """
+    idx = idx or current_index()
+    proc = process if process in idx.processes else DEFAULT_PROCESS
+    mat_key = _normalize_material_key(material, idx)
+    k = (proc, mat_key)
+    keys = idx.keys.get(k)
+    if not keys:
         raise ValueError(f"No rate table for process={process}, material={material}")
+    rows = idx.rows[k]
 
     t = float(thickness_mm or 0.0)
     t = _clamp(t, 0.1, 200.0)
 
-    keys = _sorted_keys(mat_table)
+    n = len(keys)
+    i = bisect.bisect_left(keys, t)
+    if i < n and keys[i] == t:
+        return rows[i], None, None
 
-    if t in mat_table:
-        return dict(mat_table[t])
+    if THICKNESS_LOOKUP_MODE == "nearest" or n == 1:
+        if i == 0:
+            j = 0
+        elif i == n:
+            j = n - 1
+        else:
+            # 동률이면 작은 두께
+            j = i - 1 if (t - keys[i - 1]) <= (keys[i] - t) else i
+        return rows[j], float(keys[j]), None
+
+    if i == 0:
+        return rows[0], float(keys[0]), None
+    if i == n:
+        return rows[-1], float(keys[-1]), None
+
+    t0, t1 = keys[i - 1], keys[i]
+    r0, r1 = rows[i - 1], rows[i]
+    tt = (t - t0) / (t1 - t0) if t1 != t0 else 0.0
+    out = {c: float(_lerp(r0[c], r1[c], tt)) for c in _RATE_COLS}
+    return out, float(t), [float(t0), float(t1)]
 
-    if THICKNESS_LOOKUP_MODE == "nearest" or len(keys) == 1:
-        k = _nearest_key(t, keys)
-        row = dict(mat_table[k])
-        row["_picked_thickness_mm"] = float(k)
-        return row
-
-    if t <= keys[0]:
-        row = dict(mat_table[keys[0]])
-        row["_picked_thickness_mm"] = float(keys[0])
-        return row
-    if t >= keys[-1]:
-        row = dict(mat_table[keys[-1]])
-        row["_picked_thickness_mm"] = float(keys[-1])
-        return row
-
-    for i in range(len(keys) - 1):
-        t0, t1 = keys[i], keys[i + 1]
-        if t0 <= t <= t1:
-            r0 = mat_table[t0]
-            r1 = mat_table[t1]
-            tt = (t - t0) / (t1 - t0) if t1 != t0 else 0.0
-
-            out = {}
-            for k in ("base_fee", "cut_per_mm", "pierce_per_loop", "area_per_mm2", "min_unit"):
-                out[k] = float(_lerp(float(r0.get(k, 0.0)), float(r1.get(k, 0.0)), tt))
-            out["_picked_thickness_mm"] = float(t)
-            out["_bracket"] = [float(t0), float(t1)]
-            return out
-
-    k = _nearest_key(t, keys)
-    row = dict(mat_table[k])
-    row["_picked_thickness_mm"] = float(k)
-    return row
+
+# 수량 할인: (이 수량부터, 계수) — qty_discount_factor / 가격 매트릭스 공통
+QTY_DISCOUNTS: Tuple[Tuple[int, float], ...] = ((1, 1.0), (2, 0.97), (5, 0.94), (10, 0.90), (30, 0.87))
+_QTY_STARTS = tuple(q for q, _ in QTY_DISCOUNTS[1:])
+_QTY_BREAKS = np.array(_QTY_STARTS, dtype=np.int64)
+_QTY_FACTORS = np.array([f for _, f in QTY_DISCOUNTS], dtype=np.float64)
 
 
 def qty_discount_factor(qty: int) -> float:
-    if qty <= 1:
-        return 1.0
-    if qty < 5:
-        return 0.97
-    if qty < 10:
-        return 0.94
-    if qty < 30:
-        return 0.90
-    return 0.87
+    return QTY_DISCOUNTS[bisect.bisect_right(_QTY_STARTS, qty)][1]
 
 
 # =============================
@@ -258,8 +360,11 @@ def estimate_won(
     bbox_w = float(bbox.get("w") or 0.0)
     bbox_h = float(bbox.get("h") or 0.0)
 
+    # ✅ 같은 견적 안에서는 단가표 버전 1개만 사용
+    idx = current_index()
+
     # ✅ 가공 단가 조회
-    row = _get_rate_row(proc, material_key, float(thickness_mm))
+    row, picked_th, bracket = _get_rate_row(proc, material_key, float(thickness_mm), idx)
 
     base_fee = float(row.get("base_fee", 0.0))
     cut_per_mm = float(row.get("cut_per_mm", 0.0))
@@ -278,6 +383,7 @@ def estimate_won(
         bbox_h_mm=bbox_h,
         thickness_mm=float(thickness_mm),
         scrap_factor=scrap_factor,
+        idx=idx,
     )
     material_unit = float(mat["material_won"])
 
@@ -293,8 +399,9 @@ def estimate_won(
 
     factors: Dict[str, Any] = {
         "qty_factor": round(q_factor, 4),
+        "rate_table_version": idx.version,
         "lookup_mode": THICKNESS_LOOKUP_MODE,
-        "picked_thickness_mm": row.get("_picked_thickness_mm"),
+        "picked_thickness_mm": picked_th,
         "rate": {
             "base_fee": base_fee,
             "cut_per_mm": cut_per_mm,
@@ -313,12 +420,12 @@ def estimate_won(
             **mat,
         },
     }
-    if "_bracket" in row:
-        factors["lerp_bracket_mm"] = row["_bracket"]
+    if bracket is not None:
+        factors["lerp_bracket_mm"] = bracket
 
     return {
         "process": proc,
-        "material": _normalize_material_key(material_key),
+        "material": _normalize_material_key(material_key, idx),
         "thickness_mm": float(thickness_mm),
         "qty": q,
         "unit_won": unit_won,
@@ -374,3 +481,167 @@ def build_validation(
         "ok": ok,
         "route": route,
     }
+
+
+def build_quotes_and_validation(
+    processes: List[str],
+    material: str,
+    used_th: float,
+    qty: int,
+    metrics: Dict[str, Any],
+    auto_th: float,
+):
+    """
+    선택된 공정별 견적 + 검증 결과 (quote/start 워커, 재견적 공통)
+    """
+    quotes_list: List[Dict[str, Any]] = []
+    validation_map: Dict[str, Any] = {}
+
+    for proc in processes:
+        if proc not in ("laser", "waterjet"):
+            continue
+
+        est = estimate_won(proc, material, used_th, qty, metrics)
+        quotes_list.append(est)
+
+        validation_map[proc] = build_validation(
+            used_th,
+            auto_th if auto_th > 0 else None,
+            metrics,
+            proc,
+        )
+
+    if not quotes_list:
+        # ✅ MVP: 여기까지 왔는데도 비면 기본 laser
+        est = estimate_won("laser", material, used_th, qty, metrics)
+        quotes_list = [est]
+        validation_map["laser"] = build_validation(
+            used_th,
+            auto_th if auto_th > 0 else None,
+            metrics,
+            "laser",
+        )
+
+    return quotes_list, validation_map
+
+
+# =============================
+# 4) 가격 매트릭스 (공정 × 재질 × 두께 × 수량, 벡터화)
+# =============================
+# 단가 인덱스 로드 시 배열로 미리 컴파일(RateIndex.compiled) → 셀마다 dict 생성/키 조회 없이 한 번에 계산
+# (셀 값은 estimate_won과 동일한 식/연산 순서)
+
+DEFAULT_MATRIX_QTYS: List[int] = [1, 5, 10, 30, 100]
+
+
+def price_matrix_thicknesses() -> List[float]:
+    """
+    단가표에 등장하는 모든 두께(기본 그리드 축)
+    """
+    return list(current_index().compiled["thicknesses"])
+
+
+def _rate_rows_vec(keys: np.ndarray, rows: np.ndarray, t: np.ndarray):
+    """
+    두께 배열 t → (행렬 (T,5), 선택 두께 (T,))
+    """
+    tc = np.clip(t, 0.1, 200.0)
+    if THICKNESS_LOOKUP_MODE == "nearest" or len(keys) == 1:
+        # argmin은 동률이면 앞(작은 두께) → _get_rate_row와 동일
+        idx = np.abs(tc[:, None] - keys[None, :]).argmin(axis=1)
+        return rows[idx], keys[idx]
+
+    out = np.empty((len(tc), rows.shape[1]), dtype=np.float64)
+    for j in range(rows.shape[1]):
+        out[:, j] = np.interp(tc, keys, rows[:, j])
+    return out, np.clip(tc, keys[0], keys[-1])
+
+
+def qty_discount_factors(qtys: np.ndarray) -> np.ndarray:
+    q = np.maximum(1, np.asarray(qtys, dtype=np.int64))
+    return _QTY_FACTORS[np.searchsorted(_QTY_BREAKS, q, side="right")]
+
+
+def price_matrix(
+    metrics: Dict[str, Any],
+    processes: Optional[Sequence[str]] = None,
+    materials: Optional[Sequence[str]] = None,
+    thicknesses_mm: Optional[Sequence[float]] = None,
+    qtys: Optional[Sequence[int]] = None,
+) -> Dict[str, Any]:
+    """
+    공정 × 재질 × 두께 × 수량 전체 견적 그리드.
+    Returns: 축 목록 + unit_won[p][m][t] + total_won[p][m][t][q] + picked_thickness_mm[p][m][t]
+    """
+    ix = current_index()
+    c = ix.compiled
+    procs = [p for p in (processes or ix.processes) if p in ix.processes]
+    mats = []
+    for m in materials or ix.materials:
+        mk = _normalize_material_key(m, ix)
+        if mk not in mats:
+            mats.append(mk)
+    t = np.array(thicknesses_mm or c["thicknesses"], dtype=np.float64)
+    q = np.maximum(1, np.array(qtys or DEFAULT_MATRIX_QTYS, dtype=np.int64))
+
+    loops = float(int(metrics.get("loops") or 0))
+    perim = float(metrics.get("perimeter_mm") or 0.0)
+    area = float(metrics.get("area_mm2") or 0.0)
+    bbox = metrics.get("bbox_mm") or {}
+    bbox_w = max(0.0, float(bbox.get("w") or 0.0))
+    bbox_h = max(0.0, float(bbox.get("h") or 0.0))
+
+    P, M, T = len(procs), len(mats), len(t)
+
+    # 가공비 (P,M,T)
+    process_unit = np.zeros((P, M, T), dtype=np.float64)
+    picked = np.zeros((P, M, T), dtype=np.float64)
+    rate_source: List[List[Optional[str]]] = []
+    for i, proc in enumerate(procs):
+        srcs: List[Optional[str]] = []
+        for j, mat in enumerate(mats):
+            ent = c["rates"].get((proc, mat))
+            if ent is None:
+                srcs.append(None)
+                continue
+            r, pk = _rate_rows_vec(ent["keys"], ent["rows"], t)
+            pu = r[:, 0] + perim * r[:, 1] + loops * r[:, 2] + area * r[:, 3]
+            process_unit[i, j] = np.maximum(pu, r[:, 4])
+            picked[i, j] = pk
+            srcs.append(ent["source"])
+        rate_source.append(srcs)
+
+    # 소재비 (M,T): bbox × 두께 × 스크랩 → 무게 → 원
+    mi = [ix.materials.index(m) for m in mats]
+    scrap = max(1.0, float(DEFAULT_SCRAP_FACTOR))
+    vol_m3 = ((bbox_w * bbox_h * np.maximum(t, 0.0)) * scrap) * 1e-9
+    weight = vol_m3[None, :] * c["density"][mi][:, None]
+    material_unit = np.maximum(weight * c["price_per_kg"][mi][:, None], c["min_material"][mi][:, None])
+
+    unit_won = np.ceil(process_unit + material_unit[None, :, :])
+    q_factor = qty_discount_factors(q)
+    total_won = np.ceil(unit_won[..., None] * q[None, None, None, :] * q_factor[None, None, None, :])
+
+    # 표가 없는 (공정, 재질) 조합은 None
+    missing = np.array([[s is None for s in row] for row in rate_source], dtype=bool).reshape(P, M)
+    unit_out = unit_won.astype(np.int64).tolist()
+    total_out = total_won.astype(np.int64).tolist()
+    picked_out = picked.tolist()
+    for i, j in zip(*np.nonzero(missing)):
+        unit_out[i][j] = [None] * T
+        total_out[i][j] = [[None] * len(q)] * T
+        picked_out[i][j] = [None] * T
+
+    return {
+        "processes": procs,
+        "materials": mats,
+        "thicknesses_mm": t.tolist(),
+        "qtys": q.tolist(),
+        "qty_factors": q_factor.tolist(),
+        "rate_table_version": ix.version,
+        "lookup_mode": THICKNESS_LOOKUP_MODE,
+        "rate_material": rate_source,
+        "picked_thickness_mm": picked_out,
+        "unit_won": unit_out,
+        "total_won": total_out,
+    }
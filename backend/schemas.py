@@ -19,6 +19,16 @@ class CreateJobIn(BaseModel):
     qty: int = Field(default=1, ge=1)
 
 
+class UpdatePricingIn(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    # 보낸 필드만 변경(나머지는 기존 값 유지)
+    processes: Optional[List[ProcessKey]] = None
+    material: Optional[str] = None
+    thickness_mm: Optional[float] = Field(default=None, ge=0.0)
+    qty: Optional[int] = Field(default=None, ge=1)
+
+
 class DispatchCreateIn(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
@@ -68,11 +78,16 @@ class JobOut(BaseModel):
 
     dxf_url: Optional[str] = None
     svg_url: Optional[str] = None
+    # 업로드 사전 검사(형식/엔티티 수/예상 변환 시간)
+    preflight: Optional[Dict[str, Any]] = None
+
+    # 포맷 키(dxf, dxf-r12, dxf-binary, svg, pdf) → 다운로드 URL (첫 요청 때 생성)
+    artifacts: Optional[Dict[str, str]] = None
 
 
 class QuoteOut(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
-    status: str  # "ok" | "error"
+    status: str  # "queued" | "ok" | "error" | "pending"(아직 metrics 없음)
     job: JobOut
     quotes: List[ProcessQuoteOut] = Field(default_factory=list)
@@ -10,6 +10,8 @@ def data_root() -> Path:
 
 def ensure_data_root() -> None:
     (data_root() / "objects").mkdir(parents=True, exist_ok=True)
+    (data_root() / "cache").mkdir(parents=True, exist_ok=True)
+    (data_root() / "locks").mkdir(parents=True, exist_ok=True)
 
 
 def objects_dir(job_id: str) -> Path:
@@ -51,3 +53,27 @@ def preview_svg_path(job_id: str) -> Path:
 
 def dxf_path(job_id: str) -> Path:
     return objects_dir(job_id) / "output.dxf"
+
+
+# 변환 중간 형상(2D 폴리라인 + 방향 + 두께, .npz) — FreeCAD 없이 재견적/재렌더링
+def geometry_path(job_id: str) -> Path:
+    return objects_dir(job_id) / "geometry.npz"
+
+
+# 진행 이벤트 로그(jsonl, SSE 스트림 소스)
+def events_path(job_id: str) -> Path:
+    return objects_dir(job_id) / "events.jsonl"
+
+
+# 변환 결과 캐시(파일 해시 + 옵션 기준, job과 무관)
+def cache_dir() -> Path:
+    d = data_root() / "cache"
+    d.mkdir(parents=True, exist_ok=True)
+    return d
+
+
+# 프로세스 간 파일 락(flock) 위치
+def locks_dir() -> Path:
+    d = data_root() / "locks"
+    d.mkdir(parents=True, exist_ok=True)
+    return d
@@ -0,0 +1,58 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# 앱 모듈 import 전에 임시 데이터 디렉토리 / SQLite DB 지정
+_TMP = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ["DATA_ROOT"] = _TMP
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP}/test.db"
+# FreeCAD 워커 풀 / 큐 러너 스레드 없이(테스트는 변환하지 않음)
+os.environ["CONVERT_POOL_SIZE"] = "0"
+os.environ["JOB_RUNNER_THREADS"] = "0"
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    from db import Base, SessionLocal, engine, init_db
+
+    init_db()
+    s = SessionLocal()
+    try:
+        yield s
+    finally:
+        s.close()
+        with engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+
+
+@pytest.fixture
+def client(db):
+    from fastapi.testclient import TestClient
+
+    import main
+
+    with TestClient(main.app) as c:
+        yield c
+
+
+@pytest.fixture
+def make_job(db):
+    import uuid
+
+    from models import Job, JobStatus
+
+    def make(status=JobStatus.UPLOADED, **kw) -> Job:
+        kw.setdefault("material", "SS400")
+        kw.setdefault("qty", 1)
+        job = Job(id=str(uuid.uuid4()), status=status, **kw)
+        db.add(job)
+        db.commit()
+        return job
+
+    return make
@@ -0,0 +1,89 @@
+import os
+
+import artifacts
+import geometry
+from models import JobStatus
+from storage import geometry_path
+
+SQUARE = [[(0.0, 0.0), (40.0, 0.0), (40.0, 20.0), (0.0, 20.0), (0.0, 0.0)]]
+TRIANGLE = [[(0.0, 0.0), (70.0, 0.0), (0.0, 30.0), (0.0, 0.0)]]
+
+
+def _save(job_id, polylines):
+    gp = geometry_path(job_id)
+    gp.parent.mkdir(parents=True, exist_ok=True)
+    geometry.save_geometry(str(gp), polylines, 2.0)
+    return gp
+
+
+def test_render_all_formats(make_job):
+    job = make_job()
+    _save(job.id, SQUARE)
+    for key, fmt in artifacts.FORMATS.items():
+        p = artifacts.ensure(job.id, key)
+        assert p == artifacts.artifact_path(job.id, key)
+        assert p.stat().st_size > 0
+    assert artifacts.artifact_path(job.id, "pdf").read_bytes().startswith(b"%PDF-1.4")
+    assert "<svg" in artifacts.artifact_path(job.id, "svg").read_text()
+    assert "LWPOLYLINE" in artifacts.artifact_path(job.id, "dxf").read_text()
+
+
+def test_ensure_without_geometry_returns_none(make_job):
+    assert artifacts.ensure(make_job().id, "dxf") is None
+
+
+def test_cached_until_geometry_changes(make_job):
+    job = make_job()
+    gp = _save(job.id, SQUARE)
+    p = artifacts.ensure(job.id, "svg")
+    before = p.read_text()
+    mtime = p.stat().st_mtime_ns
+    assert artifacts.ensure(job.id, "svg").stat().st_mtime_ns == mtime
+
+    # 재견적으로 형상이 바뀌면(형상 mtime > 산출물 mtime) 다시 생성
+    _save(job.id, TRIANGLE)
+    st = gp.stat()
+    os.utime(gp, ns=(st.st_atime_ns, mtime + 1))
+    after = artifacts.ensure(job.id, "svg").read_text()
+    assert after != before and "70.000000" in after
+
+
+def test_invalidate_removes_outputs_and_compressed_variants(make_job):
+    job = make_job()
+    _save(job.id, SQUARE)
+    p = artifacts.ensure(job.id, "dxf")
+    gz = p.with_name(f"{p.name}.0123456789abcdef.gz")
+    gz.write_bytes(b"x")
+    artifacts.invalidate(job.id)
+    assert not p.exists() and not gz.exists()
+    assert geometry_path(job.id).exists()
+
+
+def test_quoted_job_serves_only_preview(client, make_job):
+    job = make_job(JobStatus.QUOTED)
+    _save(job.id, SQUARE)
+
+    out = client.get(f"/v1/jobs/{job.id}").json()["job"]
+    assert set(out["artifacts"]) == {"svg"}
+    assert out["dxf_url"] is None
+
+    assert client.get(f"/v1/jobs/{job.id}/preview.svg").status_code == 200
+    assert client.get(f"/v1/jobs/{job.id}/artifacts/svg").status_code == 200
+    assert client.get(f"/v1/jobs/{job.id}/download/dxf").status_code == 409
+    for key in ("dxf", "dxf-r12", "dxf-binary", "pdf"):
+        assert client.get(f"/v1/jobs/{job.id}/artifacts/{key}").status_code == 409
+
+
+def test_done_job_serves_all_artifacts(client, make_job):
+    job = make_job(JobStatus.DONE)
+    _save(job.id, SQUARE)
+
+    out = client.get(f"/v1/jobs/{job.id}").json()["job"]
+    assert set(out["artifacts"]) == set(artifacts.FORMATS)
+    assert out["dxf_url"].endswith(f"/v1/jobs/{job.id}/download/dxf")
+
+    r = client.get(f"/v1/jobs/{job.id}/download/dxf")
+    assert r.status_code == 200
+    assert f'filename="{job.id}.dxf"' in r.headers["content-disposition"]
+    r = client.get(f"/v1/jobs/{job.id}/artifacts/pdf")
+    assert r.status_code == 200 and r.content.startswith(b"%PDF-1.4")
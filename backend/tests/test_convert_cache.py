@@ -0,0 +1,24 @@
+import convert_cache
+from freecad_convert import ConvertOptions
+
+
+def test_fingerprint_ignores_execution_only_options():
+    base = convert_cache.cache_key("abc", ConvertOptions())
+    assert convert_cache.cache_key("abc", ConvertOptions(candidate_workers=4, debug=True)) == base
+    assert convert_cache.cache_key("abc", ConvertOptions(n_slices=10)) != base
+
+
+def test_shared_relookup_does_not_count_a_second_miss(tmp_path, monkeypatch):
+    monkeypatch.setattr(convert_cache, "_stats", dict.fromkeys(convert_cache._stats, 0))
+    key = convert_cache.cache_key("missing", ConvertOptions())
+    out = str(tmp_path / "geometry.npz")
+
+    assert convert_cache.lookup(key, out) is None
+    with convert_cache.inflight(key):
+        assert convert_cache.lookup(key, out, shared=True) is None
+    assert convert_cache._stats["misses"] == 1
+
+    convert_cache.store(key, {"status": "failed", "message": "not a plate"}, None)
+    hit = convert_cache.lookup(key, out, shared=True)
+    assert hit["cache"] == "shared"
+    assert convert_cache._stats["hits"] == 1 and convert_cache._stats["shared"] == 1
@@ -0,0 +1,41 @@
+import threading
+
+import pytest
+
+import convert_pool
+from freecad_convert import ConvertError, ConvertOptions
+
+
+@pytest.fixture
+def pool():
+    p = convert_pool.ConvertPool(1)
+    yield p
+    p.shutdown()
+
+
+def test_waiting_caller_wakes_up_on_shutdown(pool):
+    busy = pool._idle.get()  # 워커 1개를 변환 중인 것처럼 점유
+    errors = []
+
+    def call():
+        try:
+            pool.convert("missing.step", None, ConvertOptions())
+        except ConvertError as e:
+            errors.append(e)
+
+    t = threading.Thread(target=call)
+    t.start()
+    t.join(1.0)
+    assert t.is_alive()  # 빈 워커를 기다리는 중
+
+    pool.shutdown()
+    t.join(5.0)
+    assert not t.is_alive()
+    assert len(errors) == 1
+    busy.stop()
+
+
+def test_convert_after_shutdown_fails_fast(pool):
+    pool.shutdown()
+    with pytest.raises(ConvertError):
+        pool.convert("missing.step", None, ConvertOptions())
@@ -0,0 +1,99 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+import downloads
+
+BODY = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / "output.dxf"
+    path.write_bytes(BODY)
+
+    app = FastAPI()
+
+    @app.get("/f")
+    def f(request: Request):
+        return downloads.serve_artifact(request, path, "application/dxf", filename="part.dxf")
+
+    with TestClient(app) as c:
+        c.headers["accept-encoding"] = "identity"
+        yield c
+
+
+def test_full_response_has_strong_etag(client):
+    r = client.get("/f")
+    assert r.status_code == 200
+    assert r.content == BODY
+    assert r.headers["accept-ranges"] == "bytes"
+    assert r.headers["etag"].startswith('"') and not r.headers["etag"].startswith("W/")
+    assert r.headers["content-length"] == str(len(BODY))
+    assert 'filename="part.dxf"' in r.headers["content-disposition"]
+
+
+def test_if_none_match_returns_304(client):
+    etag = client.get("/f").headers["etag"]
+    r = client.get("/f", headers={"if-none-match": etag})
+    assert r.status_code == 304
+    assert r.content == b""
+    assert r.headers["etag"] == etag
+    # 약한 비교(W/ 접두어 무시)
+    assert client.get("/f", headers={"if-none-match": f'"x", W/{etag}'}).status_code == 304
+    assert client.get("/f", headers={"if-none-match": '"other"'}).status_code == 200
+
+
+@pytest.mark.parametrize(
+    "header, start, end",
+    [
+        ("bytes=10-19", 10, 19),
+        ("bytes=100-", 100, len(BODY) - 1),
+        ("bytes=-16", len(BODY) - 16, len(BODY) - 1),
+        ("bytes=0-999999", 0, len(BODY) - 1),
+    ],
+)
+def test_range(client, header, start, end):
+    r = client.get("/f", headers={"range": header})
+    assert r.status_code == 206
+    assert r.content == BODY[start:end + 1]
+    assert r.headers["content-range"] == f"bytes {start}-{end}/{len(BODY)}"
+
+
+def test_unsatisfiable_range_returns_416(client):
+    r = client.get("/f", headers={"range": f"bytes={len(BODY)}-"})
+    assert r.status_code == 416
+    assert r.headers["content-range"] == f"bytes */{len(BODY)}"
+
+
+def test_malformed_or_multi_range_returns_full(client):
+    for header in ("bytes=0-1,4-5", "items=0-1", "bytes=-"):
+        r = client.get("/f", headers={"range": header})
+        assert r.status_code == 200
+        assert r.content == BODY
+
+
+def test_if_range(client):
+    etag = client.get("/f").headers["etag"]
+    r = client.get("/f", headers={"range": "bytes=0-3", "if-range": etag})
+    assert r.status_code == 206
+    assert r.content == BODY[:4]
+
+    # 내용이 바뀌었으면(ETag 불일치) 전체 응답
+    r = client.get("/f", headers={"range": "bytes=0-3", "if-range": '"stale"'})
+    assert r.status_code == 200
+    assert r.content == BODY
+
+
+def test_gzip_variant_has_own_etag(client):
+    identity = client.get("/f").headers["etag"]
+    r = client.get("/f", headers={"accept-encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.headers["etag"] != identity
+    assert "accept-ranges" not in r.headers
+    # httpx가 자동으로 풀어 줌 → 원본과 같아야 함
+    assert r.content == BODY
+    # 압축본은 한 번만 만들고 재사용(같은 바이트 → 같은 ETag)
+    again = client.get("/f", headers={"accept-encoding": "gzip", "if-none-match": r.headers["etag"]})
+    assert again.status_code == 304
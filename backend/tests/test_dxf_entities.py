@@ -0,0 +1,68 @@
+import ezdxf
+import pytest
+
+import freecad_convert as fc
+from polyline_set import PolylineSet
+
+UPPER = {"type": "arc", "center": (0.0, 0.0), "radius": 5.0, "start_angle": 0.0, "end_angle": 180.0}
+LOWER = {"type": "arc", "center": (0.0, 0.0), "radius": 5.0, "start_angle": 180.0, "end_angle": 0.0}
+
+
+def test_arc_key_separates_complementary_halves():
+    assert fc._entity_key(UPPER) != fc._entity_key(LOWER)
+    # 같은 호(각도 표기만 다름)는 같은 키
+    same = dict(UPPER, start_angle=360.0, end_angle=180.0 + 1e-9)
+    assert fc._entity_key(same) == fc._entity_key(UPPER)
+
+
+def test_split_circle_keeps_both_halves(monkeypatch):
+    # B-rep이 구멍을 반원 두 개로 나눈 경우 + 윗면/아랫면 쌍둥이 에지
+    monkeypatch.setattr(fc, "_edge_to_entity_xy", lambda e, tol: dict(e))
+    line = {"type": "line", "start": (10.0, 0.0), "end": (20.0, 0.0)}
+    line_rev = {"type": "line", "start": (20.0, 0.0), "end": (10.0, 0.0)}
+    ents = fc._entities_from_edges([UPPER, LOWER, dict(UPPER), dict(LOWER), line, line_rev], 0.01)
+    assert [e["type"] for e in ents] == ["arc", "arc", "line"]
+    assert {(e["start_angle"], e["end_angle"]) for e in ents if e["type"] == "arc"} == {(0.0, 180.0), (180.0, 0.0)}
+
+
+ENTITIES = [
+    {"type": "line", "start": (0.0, 0.0), "end": (40.0, 0.0)},
+    UPPER,
+    LOWER,
+    {"type": "circle", "center": (20.0, 10.0), "radius": 3.0},
+    {
+        "type": "spline",
+        "degree": 3,
+        "control_points": [(0.0, 0.0), (5.0, 10.0), (15.0, 10.0), (20.0, 0.0)],
+        "knots": [0, 0, 0, 0, 1, 1, 1, 1],
+        "weights": None,
+    },
+    {"type": "polyline", "points": [(0.0, 20.0), (10.0, 20.0), (10.0, 30.0)], "closed": False},
+]
+
+
+def _types(path):
+    return sorted(e.dxftype() for e in ezdxf.readfile(path).modelspace())
+
+
+def test_native_entities_written_as_is(tmp_path):
+    out = str(tmp_path / "native.dxf")
+    fc.write_dxf(out, PolylineSet.from_lists([]), ENTITIES)
+    assert _types(out) == ["ARC", "ARC", "CIRCLE", "LINE", "LWPOLYLINE", "SPLINE"]
+
+
+def test_r12_flattens_splines(tmp_path):
+    out = str(tmp_path / "r12.dxf")
+    fc.write_dxf(out, PolylineSet.from_lists([]), ENTITIES, dxfversion="R12")
+    assert _types(out) == ["ARC", "ARC", "CIRCLE", "LINE", "POLYLINE", "POLYLINE"]
+
+
+def test_without_entities_falls_back_to_polylines(tmp_path):
+    out = str(tmp_path / "poly.dxf")
+    fc.write_dxf(out, [[(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 0.0)]])
+    assert _types(out) == ["LWPOLYLINE"]
+
+
+def test_empty_entities_rejected(tmp_path):
+    with pytest.raises(fc.ConvertError):
+        fc._write_dxf_from_entities(str(tmp_path / "x.dxf"), [{"type": "unknown"}])
@@ -0,0 +1,51 @@
+import json
+
+import events
+import jobqueue
+import main
+from models import JobStatus, TaskKind
+
+
+def _sse_events(text):
+    out = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        out.append((fields.get("event"), json.loads(fields["data"])))
+    return out
+
+
+def test_stream_continues_past_quoted_while_start_is_queued(client, make_job, db, monkeypatch):
+    job = make_job(JobStatus.QUOTED)
+    jobqueue.enqueue(db, job, TaskKind.START)
+
+    events.emit(job.id, "state", status="quoted")
+    events.emit(job.id, "stage", stage="reuse_quote")
+    events.emit(job.id, "state", status="done")
+    # "quoted" 시점엔 START가 대기 중, "done" 시점엔 남은 작업 없음
+    answers = iter([True, False])
+    monkeypatch.setattr(main, "_has_active_task", lambda job_id: next(answers))
+
+    r = client.get(f"/v1/jobs/{job.id}/events")
+    got = _sse_events(r.text)
+    states = [d["data"].get("status") for e, d in got if e == "state"]
+    assert "quoted" in states and states[-1] == "done"
+    assert any(e == "stage" and d["data"]["stage"] == "reuse_quote" for e, d in got)
+    assert got[-1][0] == "job"
+
+
+def test_stream_ends_on_quoted_without_pending_start(client, make_job):
+    job = make_job(JobStatus.CONVERTING)
+    events.reset(job.id, "state", status="converting")
+    events.emit(job.id, "state", status="quoted")
+    events.emit(job.id, "state", status="done")
+
+    got = _sse_events(client.get(f"/v1/jobs/{job.id}/events").text)
+    assert [e for e, _ in got] == ["state", "state", "job"]
+    assert got[1][1]["data"]["status"] == "quoted"
+
+
+def test_snapshot_only_when_nothing_is_running(client, make_job):
+    job = make_job(JobStatus.QUOTED)
+    got = _sse_events(client.get(f"/v1/jobs/{job.id}/events").text)
+    assert [e for e, _ in got] == ["job"]
+    assert got[0][1]["status"] == "quoted"
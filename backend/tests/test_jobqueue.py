@@ -0,0 +1,110 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+import jobqueue
+from models import ConvertTask, Job, JobStatus, TaskKind, TaskStatus
+
+
+def _job(db, **kw) -> Job:
+    job = Job(id=str(uuid.uuid4()), status=JobStatus.UPLOADED, material="SS400", qty=1, **kw)
+    db.add(job)
+    db.commit()
+    return job
+
+
+def test_enqueue_creates_task_and_queues_job(db):
+    job = _job(db)
+    t, joined = jobqueue.enqueue(db, job, TaskKind.QUOTE)
+    assert not joined
+    assert t.status == TaskStatus.PENDING
+    assert t.kind == TaskKind.QUOTE
+    db.refresh(job)
+    assert job.status == JobStatus.QUEUED
+
+
+def test_enqueue_same_kind_joins(db):
+    job = _job(db)
+    t1, _ = jobqueue.enqueue(db, job, TaskKind.QUOTE)
+    t2, joined = jobqueue.enqueue(db, job, TaskKind.QUOTE)
+    assert joined and t2.id == t1.id
+    assert db.query(ConvertTask).count() == 1
+
+
+def test_quote_joins_active_start(db):
+    job = _job(db)
+    t1, _ = jobqueue.enqueue(db, job, TaskKind.START)
+    t2, joined = jobqueue.enqueue(db, job, TaskKind.QUOTE)
+    assert joined and t2.id == t1.id
+
+
+def test_start_upgrades_pending_quote(db):
+    job = _job(db)
+    t1, _ = jobqueue.enqueue(db, job, TaskKind.QUOTE)
+    t2, joined = jobqueue.enqueue(db, job, TaskKind.START)
+    assert joined and t2.id == t1.id
+    assert t2.kind == TaskKind.START
+    # 레인은 그대로(견적을 기다리는 중)
+    assert t2.lane == jobqueue.LANE_INTERACTIVE
+    assert db.query(ConvertTask).count() == 1
+
+
+def test_start_after_running_quote_adds_reuse_task(db):
+    job = _job(db)
+    t1, _ = jobqueue.enqueue(db, job, TaskKind.QUOTE, est_cost_s=20.0)
+    t1.status = TaskStatus.RUNNING
+    t1.lease_expires_at = datetime.utcnow() + timedelta(seconds=60)
+    db.commit()
+
+    t2, joined = jobqueue.enqueue(db, job, TaskKind.START, est_cost_s=20.0)
+    assert not joined and t2.id != t1.id
+    assert t2.est_cost_s == jobqueue.REUSE_COST_S
+    assert jobqueue.has_active_task(db, job.id)
+
+
+def test_queue_full_rejects_new_but_allows_join(db, monkeypatch):
+    monkeypatch.setattr(jobqueue, "QUEUE_MAX_PENDING", 2)
+    jobs = [_job(db) for _ in range(3)]
+    jobqueue.enqueue(db, jobs[0], TaskKind.QUOTE)
+    jobqueue.enqueue(db, jobs[1], TaskKind.QUOTE)
+
+    with pytest.raises(jobqueue.QueueFull) as ei:
+        jobqueue.enqueue(db, jobs[2], TaskKind.QUOTE)
+    assert ei.value.depth == 2
+    assert ei.value.retry_after_s >= 1
+    assert db.query(ConvertTask).count() == 2
+
+    # 이미 있는 작업에 합류는 항상 허용
+    _, joined = jobqueue.enqueue(db, jobs[0], TaskKind.QUOTE)
+    assert joined
+
+
+def test_mean_convert_s_ignores_tasks_without_conversion(db, monkeypatch):
+    monkeypatch.setattr(jobqueue, "_mean_cache", {"at": 0.0, "value": 0.0, "samples": 0})
+    job = _job(db)
+    now = datetime.utcnow()
+    for convert_s in (10.0, None, None, 20.0):
+        db.add(
+            ConvertTask(
+                id=str(uuid.uuid4()),
+                job_id=job.id,
+                kind=TaskKind.QUOTE,
+                status=TaskStatus.DONE,
+                attempts=1,
+                started_at=now - timedelta(seconds=30),
+                finished_at=now,
+                convert_s=convert_s,
+            )
+        )
+    db.commit()
+    assert jobqueue.mean_convert_s(db) == pytest.approx(15.0)
+
+
+def test_enqueue_records_lane_and_cost(db):
+    t, _ = jobqueue.enqueue(db, _job(db), TaskKind.QUOTE, est_cost_s=3.0)
+    assert t.lane == jobqueue.LANE_INTERACTIVE
+    assert t.est_cost_s == 3.0
+    t, _ = jobqueue.enqueue(db, _job(db), TaskKind.START)
+    assert t.lane == jobqueue.LANE_BATCH
+    assert t.est_cost_s is None
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from polyline_set import PolylineSet
+
+SQUARE_CCW = [(0.0, 0.0), (10.0, 0.0), (10.0, 10.0), (0.0, 10.0), (0.0, 0.0)]
+TRIANGLE_CW = [(0.0, 0.0), (0.0, 3.0), (4.0, 0.0)]
+OPEN_LINE = [(20.0, 0.0), (20.0, 5.0)]
+SINGLE = [(50.0, 50.0)]
+
+
+@pytest.fixture
+def pset():
+    return PolylineSet.from_lists([SQUARE_CCW, TRIANGLE_CW, OPEN_LINE, SINGLE, []])
+
+
+def test_layout_roundtrip(pset):
+    assert len(pset) == 5
+    assert pset.counts.tolist() == [5, 3, 2, 1, 0]
+    assert pset.offsets.tolist() == [0, 5, 8, 10, 11, 11]
+    assert pset.to_lists() == [SQUARE_CCW, TRIANGLE_CW, OPEN_LINE, SINGLE, []]
+    assert pset[2].tolist() == [list(p) for p in OPEN_LINE]
+
+
+def test_lengths_do_not_cross_polyline_boundaries(pset):
+    # 삼각형은 닫는 구간(4,0)→(0,0) 없이 열린 길이
+    assert pset.lengths() == pytest.approx([40.0, 3.0 + 5.0, 5.0, 0.0, 0.0])
+
+
+def test_signed_areas(pset):
+    # 열린 폴리라인도 끝→시작으로 닫아서 계산, 점 3개 미만은 0
+    assert pset.signed_areas() == pytest.approx([100.0, -6.0, 0.0, 0.0, 0.0])
+
+
+def test_closed_mask(pset):
+    assert pset.closed_mask().tolist() == [True, False, False, False, False]
+
+
+def test_bbox_skips_single_points(pset):
+    assert pset.bbox() == (0.0, 0.0, 20.0, 10.0)
+    assert pset.bbox(min_points=1) == (0.0, 0.0, 50.0, 50.0)
+    assert PolylineSet.from_lists([]).bbox() == (0.0, 0.0, 0.0, 0.0)
+
+
+def test_deduped_keeps_first_point_of_each_polyline():
+    p = PolylineSet.from_lists(
+        [
+            [(0.0, 0.0), (0.0, 0.0), (1.0, 0.0), (1.0, 1e-9)],
+            [(1.0, 0.0), (2.0, 0.0)],  # 첫 점이 앞 폴리라인 끝점과 같아도 유지
+        ]
+    ).deduped()
+    assert p.to_lists() == [[(0.0, 0.0), (1.0, 0.0)], [(1.0, 0.0), (2.0, 0.0)]]
+
+
+def test_empty_set():
+    p = PolylineSet.from_lists([])
+    assert len(p) == 0
+    assert p.lengths().shape == (0,)
+    assert p.signed_areas().shape == (0,)
+    assert p.deduped() is p
+    assert np.asarray(p.coords).shape == (0, 2)
@@ -0,0 +1,92 @@
+import pytest
+
+import preflight
+
+STEP = (
+    b"ISO-10303-21;\n"
+    b"HEADER;\n"
+    b"FILE_NAME('bracket.step','2024-01-01',(''),(''),'','','');\n"
+    b"FILE_SCHEMA(('AUTOMOTIVE_DESIGN'));\n"
+    b"ENDSEC;\n"
+    b"DATA;\n"
+    b"#1=MANIFOLD_SOLID_BREP('',#2);\n"
+    b"#2=CLOSED_SHELL('',(#3,#4,#5));\n"
+    b"#3=ADVANCED_FACE('',(#10),#20,.T.);\n"
+    b"#4=ADVANCED_FACE('',(#11),#21,.T.);\n"
+    b"#5 = ADVANCED_FACE('',(#12),#22,.F.);\n"
+    b"#20=B_SPLINE_SURFACE_WITH_KNOTS('',3,3,(),.UNSPECIFIED.,.F.,.F.,.F.,(),(),(),(),.UNSPECIFIED.);\n"
+    b"#21=(BOUNDED_SURFACE()B_SPLINE_SURFACE(3,3,(),.UNSPECIFIED.,.F.,.F.,.F.)\n"
+    b"RATIONAL_B_SPLINE_SURFACE(()));\n"
+    b"#30=NEXT_ASSEMBLY_USAGE_OCCURRENCE('','','',#1,#2,$);\n"
+    b"ENDSEC;\n"
+    b"END-ISO-10303-21;\n"
+)
+
+
+def _iges(line_end: bytes) -> bytes:
+    def rec(text: str, sec: str, seq: int) -> bytes:
+        return (text.ljust(72) + sec + str(seq).rjust(7)).encode("ascii") + line_end
+
+    lines = [rec("test part", "S", 1), rec("1H,,1H;", "G", 1)]
+    # D 엔트리 2줄 1개: 186(솔리드), 510(면) 2개, 128(B-spline 면)
+    for i, t in enumerate((186, 510, 510, 128)):
+        lines.append(rec(f"{t:>8}{2 * i + 1:>8}", "D", 2 * i + 1))
+        lines.append(rec(f"{t:>8}", "D", 2 * i + 2))
+    lines.append(rec("186,1;", "P", 1))
+    lines.append(rec("S      1G      1D      8P      1", "T", 1))
+    return b"".join(lines)
+
+
+def _scan(data: bytes, chunk: int) -> dict:
+    sc = preflight.Scanner()
+    for i in range(0, len(data), chunk):
+        sc.feed(data[i:i + chunk])
+    return sc.finish()
+
+
+@pytest.mark.parametrize("chunk", [1, 3, 7, 64, 1 << 20])
+def test_step_counts_independent_of_chunking(chunk):
+    r = _scan(STEP, chunk)
+    assert r["format"] == "step"
+    assert r["valid"]
+    assert r["schema"] == "AUTOMOTIVE_DESIGN"
+    assert r["name"] == "bracket.step"
+    assert r["faces"] == 3
+    assert r["solids"] == 1
+    assert r["bspline_surfaces"] == 2
+    assert r["assembly_links"] == 1
+    assert r["bytes"] == len(STEP)
+    assert r == _scan(STEP, len(STEP))
+
+
+def test_step_without_trailing_semicolon_counts_tail():
+    r = _scan(STEP[: STEP.rindex(b"#30")] + b"#30=ADVANCED_FACE('',(),#20,.T.)", 5)
+    assert r["faces"] == 4
+
+
+@pytest.mark.parametrize("line_end", [b"\n", b"\r\n", b""])
+@pytest.mark.parametrize("chunk", [1, 13, 80, 81, 4096])
+def test_iges_counts_independent_of_chunking(line_end, chunk):
+    data = _iges(line_end)
+    r = _scan(data, chunk)
+    assert r["format"] == "iges"
+    assert r["valid"]
+    assert r["entities"] == 4
+    assert r["solids"] == 1
+    assert r["faces"] == 2
+    assert r["bspline_surfaces"] == 1
+
+
+def test_unknown_content_rejected():
+    r = _scan(b"hello world\n" * 100, 17)
+    assert r["format"] == "unknown"
+    assert preflight.check(r) == (400, "not a STEP/IGES file (header/entity section not found)")
+
+
+def test_check_extension_mismatch_and_limits(monkeypatch):
+    r = _scan(STEP, 4096)
+    assert preflight.check(r, ".step") is None
+    assert preflight.check(r, ".igs")[0] == 400
+
+    monkeypatch.setattr(preflight, "MAX_FACES", 2)
+    assert preflight.check(r, ".step")[0] == 413
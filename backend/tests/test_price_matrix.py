@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+import main
+import pricing
+from models import JobStatus
+
+METRICS = {"loops": 4, "perimeter_mm": 615.5, "area_mm2": 9100.0, "bbox_mm": {"w": 150.0, "h": 80.0}}
+
+
+def test_matrix_matches_estimate_won_cell_by_cell():
+    qtys = [1, 3, 5, 9, 10, 29, 30, 200]
+    thicknesses = [0.5, 1.0, 1.5, 2.0, 2.7, 6.0, 11.0, 50.0]
+    m = pricing.price_matrix(METRICS, thicknesses_mm=thicknesses, qtys=qtys)
+    assert m["processes"] and m["materials"]
+    for i, proc in enumerate(m["processes"]):
+        for j, mat in enumerate(m["materials"]):
+            for k, t in enumerate(thicknesses):
+                if m["unit_won"][i][j][k] is None:
+                    continue
+                for n, q in enumerate(qtys):
+                    est = pricing.estimate_won(proc, mat, t, q, METRICS)
+                    assert m["unit_won"][i][j][k] == est["unit_won"], (proc, mat, t)
+                    assert m["total_won"][i][j][k][n] == est["total_won"], (proc, mat, t, q)
+                    # estimate_won은 표 두께와 정확히 같으면 None
+                    picked = est["factors"]["picked_thickness_mm"]
+                    assert m["picked_thickness_mm"][i][j][k] == pytest.approx(t if picked is None else picked)
+
+
+@pytest.mark.parametrize("qty", [0, 1, 2, 4, 5, 9, 10, 29, 30, 1000])
+def test_qty_discount_scalar_and_vector_agree(qty):
+    assert pricing.qty_discount_factors([qty])[0] == pricing.qty_discount_factor(qty)
+
+
+def _quoted(make_job, status=JobStatus.QUOTED):
+    return make_job(status, material="steel", thickness_auto_mm=2.0, metrics_json=json.dumps(METRICS))
+
+
+def test_endpoint_returns_grid_for_quoted_job(client, make_job):
+    job = _quoted(make_job)
+    r = client.get(f"/v1/jobs/{job.id}/price-matrix", params={"processes": "laser", "qtys": "1,10"})
+    assert r.status_code == 200
+    m = r.json()["matrix"]
+    assert m["processes"] == ["laser"] and m["qtys"] == [1, 10]
+    # 기본 두께 축 = 단가표 두께 + 자동 측정 두께
+    assert 2.0 in m["thicknesses_mm"]
+
+
+def test_endpoint_status_gate(client, make_job):
+    for status in (JobStatus.UPLOADED, JobStatus.QUEUED, JobStatus.CONVERTING, JobStatus.DONE):
+        job = _quoted(make_job, status)
+        assert client.get(f"/v1/jobs/{job.id}/price-matrix").status_code == 409, status
+
+
+def test_endpoint_rejects_oversized_axes_and_unknown_processes(client, make_job, monkeypatch):
+    monkeypatch.setattr(main, "PRICE_MATRIX_MAX_AXIS", 3)
+    job = _quoted(make_job)
+    url = f"/v1/jobs/{job.id}/price-matrix"
+    assert client.get(url, params={"qtys": "1,2,3"}).status_code == 200
+    for name, value in (("qtys", "1,2,3,4"), ("thicknesses", "1,2,3,4"), ("materials", "a,b,c,d")):
+        r = client.get(url, params={name: value})
+        assert r.status_code == 422 and name in r.json()["detail"]
+
+    r = client.get(url, params={"processes": "laser,plasma"})
+    assert r.status_code == 422 and "plasma" in r.json()["detail"]
+    assert client.get(url, params={"qtys": "x"}).status_code == 400
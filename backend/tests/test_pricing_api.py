@@ -0,0 +1,65 @@
+import json
+
+import pricing
+from models import JobStatus
+
+METRICS = {"loops": 3, "perimeter_mm": 420.0, "area_mm2": 5200.0, "bbox_mm": {"w": 120.0, "h": 60.0}}
+
+STEP = (
+    b"ISO-10303-21;\nHEADER;\nFILE_SCHEMA(('AUTOMOTIVE_DESIGN'));\nENDSEC;\nDATA;\n"
+    b"#1=MANIFOLD_SOLID_BREP('',#2);\n#2=ADVANCED_FACE('',(#3),#4,.T.);\nENDSEC;\nEND-ISO-10303-21;\n"
+)
+
+
+def _quoted(make_job, status=JobStatus.QUOTED):
+    return make_job(
+        status,
+        material="steel",
+        thickness_mm=2.0,
+        qty=1,
+        processes_json='["laser"]',
+        thickness_auto_mm=2.0,
+        metrics_json=json.dumps(METRICS),
+    )
+
+
+def test_patch_reprices_quoted_job(client, make_job):
+    job = _quoted(make_job)
+    r = client.patch(f"/v1/jobs/{job.id}/pricing", json={"qty": 10, "thickness_mm": 3.0})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["status"] == "ok"
+    expected = pricing.estimate_won("laser", "steel", 3.0, 10, METRICS)
+    assert body["quotes"][0]["unit_won"] == expected["unit_won"]
+    assert body["quotes"][0]["total_won"] == expected["total_won"]
+    assert body["job"]["qty"] == 10 and body["job"]["total_won"] == expected["total_won"]
+
+
+def test_patch_before_quote_only_stores_inputs(client, make_job):
+    job = make_job(material="steel")
+    r = client.patch(f"/v1/jobs/{job.id}/pricing", json={"qty": 7, "material": "stainless"})
+    assert r.status_code == 200
+    assert r.json()["status"] == "pending"
+    assert r.json()["quotes"] == []
+    assert r.json()["job"]["qty"] == 7 and r.json()["job"]["material"] == "stainless"
+
+
+def test_patch_rejected_while_converting_or_after_start(client, make_job):
+    for status in (JobStatus.QUEUED, JobStatus.CONVERTING, JobStatus.DONE):
+        job = _quoted(make_job, status)
+        r = client.patch(f"/v1/jobs/{job.id}/pricing", json={"qty": 2})
+        assert r.status_code == 409, status
+    assert client.patch("/v1/jobs/nope/pricing", json={"qty": 2}).status_code == 404
+
+
+def test_reupload_clears_previous_quote(client, make_job):
+    job = _quoted(make_job)
+    r = client.post(f"/v1/jobs/{job.id}/upload", files={"step": ("part.step", STEP)})
+    assert r.status_code == 200
+    out = r.json()["job"]
+    assert out["status"] == "uploaded"
+    assert out["metrics"] is None and out["quotes"] is None and out["thickness_auto_mm"] is None
+
+    r = client.patch(f"/v1/jobs/{job.id}/pricing", json={"qty": 2})
+    assert r.status_code == 200
+    assert r.json()["status"] == "pending"
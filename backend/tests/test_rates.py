@@ -0,0 +1,70 @@
+import json
+import os
+import shutil
+
+import pytest
+
+import pricing
+
+METRICS = {"loops": 2, "perimeter_mm": 300.0, "area_mm2": 4000.0, "bbox_mm": {"w": 100.0, "h": 50.0}}
+
+
+@pytest.fixture
+def rates(tmp_path, monkeypatch):
+    path = tmp_path / "rates.json"
+    shutil.copyfile(os.path.join(os.path.dirname(pricing.__file__), "rates.json"), path)
+    monkeypatch.setattr(pricing, "RATE_TABLE_PATH", str(path))
+    monkeypatch.setattr(pricing, "RATE_RELOAD_CHECK_S", 0.0)
+    monkeypatch.setattr(pricing, "_index", None)
+    monkeypatch.setattr(pricing, "_next_check", 0.0)
+    return path
+
+
+def _rewrite(path, mutate):
+    doc = json.loads(path.read_text())
+    mutate(doc)
+    st = path.stat()
+    path.write_text(json.dumps(doc))
+    # 같은 크기/같은 mtime으로 남지 않도록
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+def test_reload_picks_up_new_version(rates):
+    first = pricing.current_index()
+    assert pricing.current_index() is first  # 변경 없으면 같은 인덱스
+    before = pricing.estimate_won("laser", "steel", 2.0, 1, METRICS)
+
+    def bump(doc):
+        doc["version"] = "test.2"
+        doc["rate_table"]["laser"]["steel"]["2.0"]["base_fee"] += 1000
+
+    _rewrite(rates, bump)
+    after = pricing.estimate_won("laser", "steel", 2.0, 1, METRICS)
+    assert pricing.current_index().version == "test.2"
+    assert after["factors"]["rate_table_version"] == "test.2"
+    assert after["unit_won"] == before["unit_won"] + 1000
+
+
+def test_invalid_file_keeps_previous_table(rates):
+    good = pricing.current_index()
+    rates.write_text("{ not json")
+    assert pricing.current_index() is good
+
+    rates.write_text(json.dumps({"rate_table": {}}))
+    assert pricing.current_index() is good  # version 없음 → 거부
+
+
+def test_missing_file_on_first_load_raises(tmp_path, monkeypatch):
+    monkeypatch.setattr(pricing, "RATE_TABLE_PATH", str(tmp_path / "nope.json"))
+    monkeypatch.setattr(pricing, "_index", None)
+    monkeypatch.setattr(pricing, "_next_check", 0.0)
+    with pytest.raises(OSError):
+        pricing.current_index()
+
+
+def test_check_interval_limits_stat_calls(rates, monkeypatch):
+    monkeypatch.setattr(pricing, "RATE_RELOAD_CHECK_S", 3600.0)
+    first = pricing.current_index()
+    _rewrite(rates, lambda doc: doc.update(version="test.3"))
+    # 다음 확인 시각 전에는 파일을 보지 않음
+    assert pricing.current_index() is first
@@ -0,0 +1,99 @@
+import gzip
+import hashlib
+import io
+import zipfile
+
+import pytest
+
+import uploads
+from storage import cad_path
+
+STEP = (
+    b"ISO-10303-21;\nHEADER;\nFILE_SCHEMA(('AUTOMOTIVE_DESIGN'));\nENDSEC;\nDATA;\n"
+    + b"".join(b"#%d=ADVANCED_FACE('',(#1),#2,.T.);\n" % i for i in range(3, 200))
+    + b"#1=MANIFOLD_SOLID_BREP('',#2);\nENDSEC;\nEND-ISO-10303-21;\n"
+)
+
+
+def _zip(members):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        for name, data in members.items():
+            z.writestr(name, data)
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize(
+    "filename, payload, archive, ext",
+    [
+        ("part.step", STEP, None, ".step"),
+        ("part.STP.gz", gzip.compress(STEP), "gz", ".stp"),
+        ("bundle.zip", _zip({"readme.txt": b"hi", "dir/part.step": STEP}), "zip", ".step"),
+    ],
+)
+def test_save_upload_variants(make_job, filename, payload, archive, ext):
+    job = make_job()
+    out = uploads.save_upload(io.BytesIO(payload), filename, job.id)
+    assert out["archive"] == archive and out["ext"] == ext
+    assert out["sha256"] == hashlib.sha256(STEP).hexdigest()
+    assert out["size"] == len(STEP) and out["upload_bytes"] == len(payload)
+    assert out["preflight"]["format"] == "step" and out["preflight"]["faces"] == 197
+    assert out["path"].read_bytes() == STEP
+    assert cad_path(job.id) == out["path"]
+    # 임시 파일이 남지 않음
+    assert not list(out["path"].parent.glob(".upload.*"))
+
+
+def test_reupload_with_other_extension_replaces_previous_file(make_job):
+    job = make_job()
+    first = uploads.save_upload(io.BytesIO(STEP), "a.step", job.id)["path"]
+    second = uploads.save_upload(io.BytesIO(STEP), "b.stp", job.id)["path"]
+    assert not first.exists() and second.exists()
+    assert cad_path(job.id) == second
+
+
+@pytest.mark.parametrize(
+    "filename, payload",
+    [
+        ("part.step", STEP),
+        ("part.step.gz", gzip.compress(STEP)),  # 압축 해제 후 크기 기준
+        ("part.zip", _zip({"part.step": STEP})),
+    ],
+)
+def test_too_large_is_413_and_leaves_nothing(make_job, filename, payload):
+    job = make_job()
+    with pytest.raises(uploads.UploadError) as ei:
+        uploads.save_upload(io.BytesIO(payload), filename, job.id, max_bytes=len(STEP) - 1)
+    assert ei.value.status_code == 413
+    assert cad_path(job.id) is None
+
+
+@pytest.mark.parametrize(
+    "filename, payload",
+    [
+        ("part.dwg", STEP),
+        ("part.step", b""),
+        ("part.step.gz", b"not gzip at all"),
+        ("part.step.gz", gzip.compress(STEP)[:-20]),
+        ("part.zip", _zip({"a.step": STEP, "b.igs": STEP})),
+        ("part.zip", b"PK broken"),
+        ("part.step", b"hello world\n" * 50),  # 내용이 STEP이 아님(사전 검사)
+    ],
+)
+def test_bad_uploads_are_400(make_job, filename, payload):
+    job = make_job()
+    with pytest.raises(uploads.UploadError) as ei:
+        uploads.save_upload(io.BytesIO(payload), filename, job.id)
+    assert ei.value.status_code == 400
+
+
+def test_upload_endpoint_accepts_gzip_and_reports_413(client, make_job, monkeypatch):
+    job = make_job()
+    r = client.post(f"/v1/jobs/{job.id}/upload", files={"step": ("part.step.gz", gzip.compress(STEP))})
+    assert r.status_code == 200
+    log = r.json()["log"]["upload"]
+    assert log["archive"] == "gz" and log["size"] == len(STEP)
+
+    monkeypatch.setattr(uploads.save_upload, "__defaults__", (len(STEP) - 1,))
+    r = client.post(f"/v1/jobs/{job.id}/upload", files={"step": ("part.step", STEP)})
+    assert r.status_code == 413
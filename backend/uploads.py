@@ -0,0 +1,204 @@
+import hashlib
+import os
+import uuid
+import zipfile
+import zlib
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Optional, Tuple
+
+import preflight
+from storage import objects_dir, source_path
+
+# =============================
+# 업로드 저장 (스트리밍)
+# =============================
+# - 청크 단위로 임시 파일에 쓰면서 sha256 계산 → 완료 후 source_path로 atomic rename
+# - 크기 제한(UPLOAD_MAX_MB)은 쓰는 도중 초과 즉시 중단(압축 해제 후 크기 기준)
+# - .stp.gz / .step.gz / .igs.gz 등: gzip 스트리밍 해제
+# - .zip: CAD 파일 1개만 포함해야 함, 멤버를 청크 단위로 해제
+# - 해시는 압축 해제된 CAD 내용 기준(같은 부품이면 압축 여부와 무관하게 같은 값)
+# - 같은 청크로 사전 검사(preflight: 엔티티 수/예상 변환 시간) → 한도 초과면 기존 파일을 건드리지 않고 거절
+
+UPLOAD_MAX_BYTES = int(float(os.getenv("UPLOAD_MAX_MB", "300")) * 1024 * 1024)
+
+CAD_EXTS = {".step", ".stp", ".igs", ".iges"}
+ARCHIVE_EXTS = {".gz", ".zip"}
+
+_CHUNK = 1024 * 1024
+
+
+class UploadError(Exception):
+    def __init__(self, status_code: int, detail: str) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def get_ext(filename: str) -> str:
+    return os.path.splitext((filename or "").lower())[1]
+
+
+def resolve_name(filename: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Returns: (CAD 확장자(zip이면 None — 멤버에서 결정), 압축 형식 None/"gz"/"zip")
+    """
+    name = (filename or "").lower()
+    ext = get_ext(name)
+    if ext == ".gz":
+        inner = get_ext(name[:-3])
+        if inner not in CAD_EXTS:
+            raise UploadError(400, f"Unsupported file type: {inner or '?'}.gz. Allowed: {sorted(CAD_EXTS)}")
+        return inner, "gz"
+    if ext == ".zip":
+        return None, "zip"
+    if ext not in CAD_EXTS:
+        raise UploadError(
+            400,
+            f"Unsupported file type: {ext}. Allowed: {sorted(CAD_EXTS)} (+ .gz / .zip)",
+        )
+    return ext, None
+
+
+class _Sink:
+    """
+    임시 파일 쓰기 + sha256 + 크기 제한 + 사전 검사
+    """
+
+    def __init__(self, path: Path, max_bytes: int) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.sha = hashlib.sha256()
+        self.scanner = preflight.Scanner()
+        self._f = open(path, "wb")
+
+    def write(self, data: bytes) -> None:
+        if not data:
+            return
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise UploadError(413, f"file too large (max {self.max_bytes // (1024 * 1024)} MB)")
+        self.sha.update(data)
+        self.scanner.feed(data)
+        self._f.write(data)
+
+    def close(self) -> None:
+        self._f.close()
+
+
+def _copy_plain(src: BinaryIO, sink: _Sink) -> int:
+    n = 0
+    while True:
+        chunk = src.read(_CHUNK)
+        if not chunk:
+            return n
+        n += len(chunk)
+        sink.write(chunk)
+
+
+def _copy_gzip(src: BinaryIO, sink: _Sink) -> int:
+    # 16 + MAX_WBITS: gzip 헤더, max_length로 출력 청크 제한(압축 폭탄도 메모리 일정)
+    d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    n = 0
+    try:
+        while True:
+            chunk = src.read(_CHUNK)
+            if not chunk:
+                break
+            n += len(chunk)
+            buf = chunk
+            while buf and not d.eof:
+                sink.write(d.decompress(buf, _CHUNK))
+                buf = d.unconsumed_tail
+        while not d.eof:
+            out = d.decompress(b"", _CHUNK)
+            if not out:
+                break
+            sink.write(out)
+    except zlib.error as e:
+        raise UploadError(400, f"invalid gzip data: {e}")
+    if not d.eof:
+        raise UploadError(400, "truncated gzip data")
+    return n
+
+
+def _copy_zip(src: BinaryIO, sink: _Sink, tmp_dir: Path) -> Tuple[int, str]:
+    # zip은 끝의 central directory가 필요 → 원본을 먼저 임시 파일로(크기 제한 적용) 받은 뒤 멤버만 스트리밍 해제
+    raw_path = tmp_dir / f".upload.{uuid.uuid4().hex[:8]}.zip"
+    raw = _Sink(raw_path, sink.max_bytes)
+    try:
+        try:
+            n = _copy_plain(src, raw)
+        finally:
+            raw.close()
+
+        try:
+            with zipfile.ZipFile(raw_path) as zf:
+                members = [
+                    i
+                    for i in zf.infolist()
+                    if not i.is_dir()
+                    and not i.filename.startswith("__MACOSX/")
+                    and get_ext(i.filename) in CAD_EXTS
+                ]
+                if len(members) != 1:
+                    raise UploadError(400, f"zip must contain exactly one CAD file ({sorted(CAD_EXTS)}), found {len(members)}")
+                m = members[0]
+                if m.file_size > sink.max_bytes:
+                    raise UploadError(413, f"file too large (max {sink.max_bytes // (1024 * 1024)} MB)")
+                with zf.open(m) as f:
+                    _copy_plain(f, sink)
+                return n, get_ext(m.filename)
+        except zipfile.BadZipFile as e:
+            raise UploadError(400, f"invalid zip file: {e}")
+    finally:
+        raw_path.unlink(missing_ok=True)
+
+
+def save_upload(src: BinaryIO, filename: str, job_id: str, max_bytes: int = UPLOAD_MAX_BYTES) -> Dict[str, Any]:
+    """
+    업로드 스트림 → source_path(job_id, ext). (블로킹 I/O: 스레드풀에서 호출)
+    Returns: path, ext, archive, sha256, size(CAD 바이트), upload_bytes(받은 바이트), preflight(사전 검사 보고서)
+    """
+    ext, archive = resolve_name(filename)
+    d = objects_dir(job_id)
+    tmp = d / f".upload.{uuid.uuid4().hex[:8]}.part"
+    sink = _Sink(tmp, max_bytes)
+    try:
+        try:
+            if archive == "gz":
+                received = _copy_gzip(src, sink)
+            elif archive == "zip":
+                received, ext = _copy_zip(src, sink, d)
+            else:
+                received = _copy_plain(src, sink)
+        finally:
+            sink.close()
+
+        if sink.size == 0:
+            raise UploadError(400, "empty file")
+
+        report = sink.scanner.finish()
+        problem = preflight.check(report, ext)
+        if problem is not None:
+            raise UploadError(*problem)
+
+        # 이전 업로드가 다른 확장자면 cad_path가 옛 파일을 집지 않도록 제거
+        final = source_path(job_id, ext)
+        for other in CAD_EXTS:
+            p = source_path(job_id, other)
+            if p != final:
+                p.unlink(missing_ok=True)
+        os.replace(tmp, final)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+    return {
+        "path": final,
+        "ext": ext,
+        "archive": archive,
+        "sha256": sink.sha.hexdigest(),
+        "size": sink.size,
+        "upload_bytes": received,
+        "preflight": report,
+    }
@@ -1,19 +1,100 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime
 from typing import Any
-from freecad_convert import convert_step_to_dxf, ConvertOptions, ConvertError
 
+from freecad_convert import ConvertOptions, ConvertError, ProgressFn
+import artifacts
+import convert_cache
+import convert_pool
+import events
+import jobqueue
+from db import SessionLocal
+from geometry import load_geometry
+from models import ConvertTask, Job, JobStatus, TaskKind
+from pricing import build_quotes_and_validation
+from storage import cad_path, geometry_path
 
-def run_quote(step_path: str, tmp_dxf_path: str) -> dict[str, Any]:
-    opts = ConvertOptions(
+logger = logging.getLogger("uvicorn.error")
+
+# API 프로세스 안에서 큐를 소비할 러너 스레드 수(0이면 enqueue만, 별도 `python worker.py`가 처리)
+JOB_RUNNER_THREADS = int(os.getenv("JOB_RUNNER_THREADS", str(max(1, convert_pool.POOL_SIZE))))
+POLL_INTERVAL_S = float(os.getenv("JOB_POLL_INTERVAL_S", "1.0"))
+# 변환 1건 안에서 방향 후보를 동시에 평가할 프로세스 수(1이면 순차)
+CANDIDATE_WORKERS = convert_pool.CANDIDATE_WORKERS
+# DXF 엔티티 모드: native(LINE/ARC/CIRCLE/SPLINE) | polyline(LWPOLYLINE만)
+DXF_ENTITIES = os.getenv("DXF_ENTITIES", "native")
+
+
+def now():
+    return datetime.utcnow()
+
+
+def pipeline_options() -> ConvertOptions:
+    # ✅ quote/start 공통 옵션: 한 번의 변환으로 metrics + 중간 형상 생성
+    # (SVG/DXF/PDF는 artifacts가 첫 요청 때 형상에서 생성)
+    return ConvertOptions(
         k_face_candidates=2,
         n_slices=40,
         rel_tol=0.008,
         silhouette=True,
         debug=False,
-        make_svg=True,
-        svg_stroke_mm=0.20,
+        make_svg=False,
+        candidate_workers=CANDIDATE_WORKERS,
+        dxf_entities=DXF_ENTITIES,
     )
+
+
+def run_pipeline(
+    step_path: str,
+    out_geometry_path: str,
+    progress: ProgressFn | None = None,
+    file_hash: str | None = None,
+) -> dict[str, Any]:
+    """
+    견적 전용 변환: metrics + 중간 형상(geometry.npz)만 생성, 산출물 파일은 쓰지 않음
+    (SVG/DXF/PDF는 다운로드 시 artifacts가 저장된 형상에서 생성)
+    """
+    opts = pipeline_options()
     try:
-        return convert_step_to_dxf(step_path, tmp_dxf_path, opts)
+        # ✅ 같은 파일 + 같은 옵션이면 캐시 결과 사용(FreeCAD 미실행)
+        # (업로드 때 계산한 해시가 있으면 파일을 다시 읽지 않음)
+        key = convert_cache.cache_key(file_hash or convert_cache.file_sha256(step_path), opts)
+        hit = convert_cache.lookup(key, out_geometry_path)
+        if hit is not None:
+            if progress is not None:
+                progress("cache_hit", {})
+            return hit
+
+        # ✅ 같은 내용을 다른 요청/프로세스가 변환 중이면 끝날 때까지 기다렸다가 그 결과를 공유
+        with convert_cache.inflight(key):
+            hit = convert_cache.lookup(key, out_geometry_path, shared=True)
+            if hit is not None:
+                if progress is not None:
+                    progress("cache_hit", {"shared": True})
+                return hit
+
+            # ✅ 실제 FreeCAD 변환은 미리 띄워 둔 워커 프로세스에서 격리 실행
+            t0 = time.monotonic()
+            result = convert_pool.convert(step_path, None, opts, progress=progress, out_geometry=out_geometry_path)
+            convert_s = round(time.monotonic() - t0, 3)
+            if isinstance(result, dict) and result.get("status") == "ok" and not result.get("geometry"):
+                return {"status": "error", "message": "converter did not save geometry (numpy missing?)"}
+            if isinstance(result, dict) and result.get("status") in ("ok", "failed"):
+                try:
+                    convert_cache.store(key, result, result.get("geometry"))
+                except Exception:
+                    # 캐시 저장 실패는 변환 결과에 영향 없음
+                    pass
+            if isinstance(result, dict):
+                # 실제 변환 시간(캐시에는 저장하지 않음) → 큐의 평균 변환 시간 표본
+                result = {**result, "convert_s": convert_s}
+            return result
     except ConvertError as e:
         return {"status": "error", "message": str(e)}
     except Exception as e:
@@ -21,18 +102,341 @@ def run_quote(step_path: str, tmp_dxf_path: str) -> dict[str, Any]:
         return {"status": "error", "message": f"{type(e).__name__}: {e}"}
 
 
-def run_convert(step_path: str, out_dxf_path: str) -> dict[str, Any]:
-    opts = ConvertOptions(
-        k_face_candidates=2,
-        n_slices=40,
-        rel_tol=0.008,
-        silhouette=True,
-        debug=False,
-        make_svg=False,
+def task_cost_s(job: Job, kind: TaskKind) -> float | None:
+    """
+    스케줄러용 예상 변환 시간(초)
+    - START인데 직전 견적의 형상이 있음 / 같은 내용의 변환 캐시가 있음 → 재사용(거의 0)
+    - 그 외: 업로드 사전 검사(preflight) 예상치, 없으면 None(기본값 사용)
+    """
+    if kind == TaskKind.START and job.metrics_json and geometry_path(job.id).exists():
+        return jobqueue.REUSE_COST_S
+    if job.source_sha256:
+        try:
+            if convert_cache.contains(convert_cache.cache_key(job.source_sha256, pipeline_options())):
+                return jobqueue.REUSE_COST_S
+        except Exception:
+            pass
+    try:
+        pf = json.loads(job.preflight_json) if job.preflight_json else None
+    except Exception:
+        pf = None
+    if isinstance(pf, dict) and pf.get("est_cost_s") is not None:
+        return float(pf["est_cost_s"])
+    return None
+
+
+# =============================
+# job 처리 (큐에서 꺼낸 작업 1건)
+# =============================
+
+def job_processes(job: Job) -> list[str]:
+    # ✅ MVP: 비어있거나 형식이 이상하면 laser로 간주
+    try:
+        processes = json.loads(job.processes_json) if job.processes_json else []
+    except Exception:
+        processes = []
+    if not isinstance(processes, list) or not processes:
+        return ["laser"]
+    return processes
+
+
+def apply_pipeline_result(job: Job, result: dict[str, Any], processes: list[str]) -> list[dict[str, Any]]:
+    """
+    변환 결과(metrics/thickness)를 job에 반영하고 공정별 견적 리스트를 반환.
+    (commit은 호출자가 담당)
+    """
+    auto_th = float(result.get("thickness_mm", 0.0) or 0.0)
+    metrics = result.get("metrics") or {}
+
+    # 형상이 새로 저장됐으므로 이전 산출물은 버림(다음 요청 때 다시 생성)
+    artifacts.invalidate(job.id)
+
+    job.thickness_auto_mm = auto_th
+    job.metrics_json = json.dumps(metrics, ensure_ascii=False)
+    return price_job(job, metrics, processes)
+
+
+def price_job(job: Job, metrics: dict[str, Any], processes: list[str]) -> list[dict[str, Any]]:
+    """
+    저장된 metrics + thickness_auto_mm 기준으로 견적/검증을 다시 계산해 job에 반영(변환 없음).
+    (commit은 호출자가 담당)
+    """
+    auto_th = float(job.thickness_auto_mm or 0.0)
+    used_th = job.thickness_mm if job.thickness_mm and job.thickness_mm > 0 else auto_th
+
+    quotes_list, validation_map = build_quotes_and_validation(
+        processes=processes,
+        material=job.material,
+        used_th=used_th,
+        qty=job.qty,
+        metrics=metrics,
+        auto_th=auto_th,
+    )
+
+    # 레거시 필드(unit/total)는 "첫번째 공정" 값을 대표로 채움(호환)
+    primary = quotes_list[0]
+    job.unit_won = int(primary["unit_won"])
+    job.total_won = int(primary["total_won"])
+
+    job.validation_json = json.dumps(validation_map, ensure_ascii=False)
+
+    if hasattr(job, "quotes_json"):
+        job.quotes_json = json.dumps(quotes_list, ensure_ascii=False)
+
+    job.error_message = None
+    job.updated_at = now()
+    return quotes_list
+
+
+def _progress_for(job_id: str) -> ProgressFn:
+    def _progress(stage: str, data: dict[str, Any]) -> None:
+        events.emit(job_id, "stage", stage=stage, **data)
+
+    return _progress
+
+
+def _record_convert_s(task: ConvertTask | None, result: Any) -> None:
+    # FreeCAD를 실제로 돌린 경우만 기록(캐시 적중/공유 결과에는 convert_s 없음)
+    if task is not None and isinstance(result, dict) and result.get("convert_s") is not None:
+        task.convert_s = float(result["convert_s"])
+
+
+def _run_quote(job: Job, task: ConvertTask | None = None) -> str | None:
+    """
+    반환값: 실패 메시지(성공이면 None)
+    """
+    sp = cad_path(job.id)
+    if not sp or not sp.exists():
+        return "CAD file not uploaded"
+
+    # ✅ 견적은 DXF 없이(직렬화/디스크 쓰기 생략), 중간 형상만 남겨 /start에서 재사용
+    result = run_pipeline(
+        str(sp),
+        str(geometry_path(job.id)),
+        progress=_progress_for(job.id),
+        file_hash=job.source_sha256,
     )
+    _record_convert_s(task, result)
+
+    if not isinstance(result, dict):
+        return f"quote failed: worker returned {type(result).__name__}"
+    if result.get("status") != "ok":
+        return result.get("message") or "quote failed"
+
+    apply_pipeline_result(job, result, job_processes(job))
+    job.status = JobStatus.QUOTED
+    return None
+
+
+def _run_start(job: Job, task: ConvertTask | None = None) -> str | None:
+    sp = cad_path(job.id)
+    if not sp or not sp.exists():
+        return "CAD file not uploaded"
+
+    gp = geometry_path(job.id)
+    logger.info(f"[start] job={job.id} cad={str(sp)} geometry={str(gp)} exists_before={gp.exists()}")
+
+    # =========================
+    # ✅ 직전 /quote 결과 재사용: 같은 업로드로 만든 중간 형상이 있으면 재변환 없음
+    # (업로드 시 형상/DXF는 삭제되므로 다른 파일의 결과가 섞이지 않음)
+    # =========================
+    if job.metrics_json and gp.exists():
+        events.emit(job.id, "stage", stage="reuse_quote")
+        logger.info(f"[start] job={job.id} reused quote result (geometry)")
+    else:
+        # ✅ 단일 패스: metrics + 중간 형상을 한 번의 변환으로 생성(SVG/DXF는 다운로드 때 형상에서)
+        result = run_pipeline(
+            str(sp),
+            str(gp),
+            progress=_progress_for(job.id),
+            file_hash=job.source_sha256,
+        )
+        _record_convert_s(task, result)
+        logger.info(
+            f"[start] job={job.id} run_pipeline returned status="
+            f"{result.get('status') if isinstance(result, dict) else type(result).__name__}"
+        )
+
+        if not isinstance(result, dict) or result.get("status") != "ok":
+            return (result.get("message") if isinstance(result, dict) else None) or "convert failed"
+
+        apply_pipeline_result(job, result, job_processes(job))
+
+    # =========================
+    # ✅ DONE은 "DXF를 만들 수 있는 형상 확보" 이후에만
+    # (DXF 등 산출물 파일은 첫 다운로드 때 artifacts가 생성)
+    # =========================
+    if not gp.exists():
+        logger.error(f"[start] job={job.id} geometry missing after convert: {str(gp)}")
+        return f"convert ok but geometry missing at {str(gp)}"
+
     try:
-        return convert_step_to_dxf(step_path, out_dxf_path, opts)
-    except ConvertError as e:
-        return {"status": "error", "message": str(e)}
+        n = len(load_geometry(str(gp))["polylines"])
     except Exception as e:
-        return {"status": "error", "message": f"{type(e).__name__}: {e}"}
+        return f"geometry unreadable: {type(e).__name__}: {e}"
+    if n == 0:
+        return "convert ok but no 2D outline to export"
+    logger.info(f"[start] job={job.id} geometry ready path={str(gp)} polylines={n}")
+
+    job.status = JobStatus.DONE
+    return None
+
+
+class _LeaseKeeper:
+    """
+    변환이 도는 동안 lease를 주기적으로 연장
+    """
+
+    def __init__(self, task_id: str, owner: str) -> None:
+        self._task_id = task_id
+        self._owner = owner
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="lease-keeper", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(jobqueue.LEASE_S / 3):
+            db = SessionLocal()
+            try:
+                if not jobqueue.heartbeat(db, self._task_id, self._owner):
+                    return
+            except Exception as e:
+                logger.warning(f"[worker] lease heartbeat failed task={self._task_id}: {e}")
+            finally:
+                db.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join(5.0)
+
+
+def _current_source(job_id: str) -> str | None:
+    # 별도 세션: 이 작업의 미반영 변경과 무관하게 커밋된 값만 읽음
+    db = SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        return job.source_sha256 if job else None
+    finally:
+        db.close()
+
+
+def process_task(task_id: str, owner: str) -> None:
+    db = SessionLocal()
+    try:
+        task = db.get(ConvertTask, task_id)
+        if task is None:
+            return
+        job = db.get(Job, task.job_id)
+        if job is None:
+            jobqueue.finish(db, task, error="job not found")
+            db.commit()
+            return
+
+        source = job.source_sha256
+        job.status = JobStatus.CONVERTING
+        job.updated_at = now()
+        db.commit()
+        events.emit(job.id, "state", status=job.status.value, kind=task.kind.value, attempt=task.attempts)
+
+        with _LeaseKeeper(task.id, owner):
+            try:
+                if task.kind == TaskKind.QUOTE:
+                    error = _run_quote(job, task)
+                else:
+                    error = _run_start(job, task)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+
+        db.refresh(task)
+        if task.lease_owner != owner:
+            # lease를 잃음(만료 후 다른 워커가 수거) → 결과 반영하지 않음
+            db.rollback()
+            logger.warning(f"[worker] lost lease task={task.id} job={job.id}")
+            return
+
+        if _current_source(job.id) != source:
+            # 변환 중 파일이 다시 업로드됨 → 이전 파일의 결과(형상/견적)는 버림
+            db.rollback()
+            geometry_path(job.id).unlink(missing_ok=True)
+            artifacts.invalidate(job.id)
+            logger.warning(f"[worker] source changed during conversion task={task.id} job={job.id}")
+            jobqueue.finish(db, task, error="source re-uploaded during conversion")
+            db.commit()
+            events.emit(job.id, "state", status=job.status.value)
+            return
+
+        if error:
+            job.status = JobStatus.ERROR
+            job.error_message = error
+            job.updated_at = now()
+
+        jobqueue.finish(db, task, error=error)
+        db.commit()
+        events.emit(job.id, "state", status=job.status.value, error=error)
+    finally:
+        db.close()
+
+
+def run_forever(stop: threading.Event, owner: str | None = None) -> None:
+    owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    while not stop.is_set():
+        db = SessionLocal()
+        try:
+            jobqueue.recover_expired(db)
+            task = jobqueue.claim(db, owner)
+        except Exception as e:
+            logger.error(f"[worker] claim failed: {type(e).__name__}: {e}")
+            task = None
+        finally:
+            db.close()
+
+        if task is None:
+            jobqueue.wakeup.wait(POLL_INTERVAL_S)
+            jobqueue.wakeup.clear()
+            continue
+
+        logger.info(f"[worker] claimed task={task.id} kind={task.kind.value} job={task.job_id} owner={owner}")
+        try:
+            process_task(task.id, owner)
+        except Exception as e:
+            logger.error(f"[worker] task={task.id} crashed: {type(e).__name__}: {e}")
+
+
+_runner_stop = threading.Event()
+_runners: list[threading.Thread] = []
+
+
+def start_runners(n: int = JOB_RUNNER_THREADS) -> None:
+    for i in range(max(0, n)):
+        t = threading.Thread(target=run_forever, args=(_runner_stop,), name=f"job-runner-{i}", daemon=True)
+        t.start()
+        _runners.append(t)
+
+
+def stop_runners() -> None:
+    _runner_stop.set()
+    jobqueue.wakeup.set()
+    for t in _runners:
+        t.join(1.0)
+    _runners.clear()
+
+
+if __name__ == "__main__":
+    # 단독 워커 프로세스: python worker.py (API와 같은 DATABASE_URL / DATA_ROOT 공유)
+    from db import init_db
+    from storage import ensure_data_root
+
+    logging.basicConfig(level=logging.INFO)
+    ensure_data_root()
+    init_db()
+    start_runners(max(1, JOB_RUNNER_THREADS))
+    try:
+        _runner_stop.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_runners()
+        convert_pool.shutdown_pool()